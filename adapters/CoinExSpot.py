@@ -0,0 +1,309 @@
+# adapters/CoinExSpot.py
+import time
+import hashlib
+import hmac
+import json
+from urllib.parse import urlencode, quote_plus
+
+from batch import batches, collect, failed, fan_out, scatter, succeeded
+from config import EXCHANGE_KEYS, REST_URLS
+from health import HEALTH
+from http_pool import get_session
+from market_stream import MARKET_DATA
+from symbol_cache import SYMBOL_CACHE, make_info, step_from_precision
+
+class CoinExSpot:
+    name = "CoinEx"
+    maker_fee = 0.001  # 0.1%
+    order_endpoint = "/order/limit"
+    symbol_cache = SYMBOL_CACHE
+    batch_size = 10               # /order/limit/batch: поръчки за един пазар в пакет
+
+    def __init__(self):
+        self.access_id = EXCHANGE_KEYS["coinex"]["access_id"]
+        self.secret_key = EXCHANGE_KEYS["coinex"]["secret_key"]
+        self.base_url = REST_URLS.get("coinex", "https://api.coinex.com/v1")
+        self.session = get_session("coinex")
+        HEALTH.register(self.session.name, self.ping)
+        # При поръчка подписваният низ започва с access_id (първи по азбучен ред) и
+        # завършва със secret_key — MD5 състоянието на началото се пази готово
+        self._order_md5 = hashlib.md5(f"{urlencode({'access_id': self.access_id})}&amount=".encode("utf-8"))
+        self._order_secret = f"&type=limit&secret_key={self.secret_key}"
+        self._headers = {"Content-Type": "application/json"}
+        self._order_url = self.base_url + self.order_endpoint
+        self._order_timeout = self.session.timeout_for(self.order_endpoint)
+        self._order_templates = {}
+
+    def _sign(self, params):
+        """Генерира подпис според CoinEx изискванията."""
+        params["access_id"] = self.access_id
+        params["tonce"] = str(int(time.time() * 1000))
+        # Сортиране по ключ
+        query_string = urlencode(sorted(params.items()))
+        to_sign = f"{query_string}&secret_key={self.secret_key}"
+        return hashlib.md5(to_sign.encode("utf-8")).hexdigest().upper()
+
+    def _prepare(self, method, endpoint, params=None, signed=False):
+        """URL, заглавки и тяло на заявката (общо за sync и async адаптера)."""
+        url = self.base_url + endpoint
+        headers = {"Content-Type": "application/json"}
+        if signed:
+            # Копие — при повторение след 429 се подписва наново без стария подпис
+            params = dict(params or {})
+            params["signature"] = self._sign(params.copy())
+        if method == "GET":
+            if params:
+                url += "?" + urlencode(params)
+            return url, headers, None
+        return url, headers, params
+
+    def _request(self, method, endpoint, params=None, signed=False):
+        url, headers, body = self._prepare(method, endpoint, params, signed)
+        timeout = self.session.timeout_for(endpoint)
+        try:
+            resp = self.session.request(method, url, json=body, headers=headers, timeout=timeout,
+                                        resign=lambda: self._prepare(method, endpoint, params, signed))
+            return resp.json()
+        except Exception as e:
+            raise Exception(f"CoinEx API error: {e}")
+
+    def ping(self):
+        """Директна проверка на връзката (ползва се от фоновия HEALTH монитор)."""
+        try:
+            self._request("GET", "/market/ticker", {"market": "BTCUSDT"})
+            return True
+        except:
+            return False
+
+    def is_active(self):
+        return HEALTH.is_active(self.session.name)
+
+    # Разбор на отговорите — общ за sync и async адаптера (различен е само транспортът)
+    @staticmethod
+    def _parse_balance(data, asset):
+        if data.get("code") == 0:
+            return float(data["data"].get(asset, {}).get("available", 0))
+        return 0.0
+
+    @staticmethod
+    def _parse_balances(data):
+        if data.get("code") != 0:
+            raise Exception("Balance fetch failed")
+        return {asset: float(b.get("available", 0)) for asset, b in data["data"].items()}
+
+    @staticmethod
+    def _parse_price(data):
+        if data.get("code") == 0:
+            return float(data["data"]["ticker"]["last"])
+        raise Exception("Price fetch failed")
+
+    @staticmethod
+    def _parse_ticker(data):
+        if data.get("code") == 0:
+            ticker = data["data"]["ticker"]
+            return {
+                "bidPrice": ticker["buy"],
+                "askPrice": ticker["sell"]
+            }
+        raise Exception("Ticker fetch failed")
+
+    @staticmethod
+    def _parse_klines(data):
+        if data.get("code") == 0:
+            # CoinEx връща: [timestamp, open, close, high, low, volume, amount, market]
+            return [[float(c[0]), float(c[1]), float(c[3]), float(c[4]), float(c[2]), float(c[5])] for c in data["data"]]
+        return []
+
+    @staticmethod
+    def _parse_order_status(data):
+        if data.get("code") == 0:
+            status = data["data"]["status"]
+            return "filled" if status == "done" else "canceled" if status in ("cancel", "failed") else "open"
+        return "unknown"
+
+    @staticmethod
+    def _parse_trades(data):
+        if data.get("code") == 0:
+            return [{"qty": t["amount"], "quoteQty": t["deal_money"]} for t in data["data"]["data"]]
+        return []
+
+    @staticmethod
+    def _parse_open_orders(data):
+        if data.get("code") == 0:
+            return [{"orderId": item["id"]} for item in data["data"]["data"]]
+        return []
+
+    def get_balance(self, asset):
+        return self._parse_balance(self._request("GET", "/balance", signed=True), asset)
+
+    def get_balances(self):
+        """Свободните наличности по всички активи с една заявка: {актив: количество}."""
+        return self._parse_balances(self._request("GET", "/balance", signed=True))
+
+    def get_price(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return float(cached["bidPrice"])
+        return self._parse_price(self._request("GET", "/market/ticker", {"market": symbol.replace("/", "")}))
+
+    def get_ticker(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return cached
+        return self._parse_ticker(self._request("GET", "/market/ticker", {"market": symbol.replace("/", "")}))
+
+    def get_klines(self, symbol, interval="1h", limit=50):
+        market = symbol.replace("/", "")
+        interval_map = {"1h": "60", "4h": "240", "1d": "86400"}
+        period = interval_map.get(interval, "60")
+        data = self._request("GET", "/market/kline", {
+            "market": market,
+            "type": period,
+            "limit": str(limit)
+        })
+        return self._parse_klines(data)
+
+    def load_symbols_info(self):
+        """Всички пазари от /market/info наведнъж (за SYMBOL_CACHE)."""
+        data = self._request("GET", "/market/info")
+        if data.get("code") != 0:
+            raise Exception("Market info fetch failed")
+        return {
+            market: make_info(
+                m["min_amount"],
+                step_from_precision(m["trading_decimal"]),
+                step_from_precision(m["pricing_decimal"])
+            )
+            for market, m in data["data"].items()
+        }
+
+    def get_symbol_info(self, symbol):
+        return self.symbol_cache.get(self, symbol.replace("/", ""))
+
+    def _prepare_order(self, symbol, side, price, qty):
+        """
+        Бърз път за лимитна поръчка: същата заявка като _prepare(), но от
+        готови шаблони за (символ, страна) — за подписа и за JSON тялото.
+        """
+        templates = self._order_templates.get((symbol, side))
+        if templates is None:
+            market = symbol.replace("/", "")
+            body = {"market": market, "type": "limit", "side": side.lower(), "amount": "@@", "price": "@@",
+                    "signature": "@@"}
+            templates = self._order_templates[(symbol, side)] = (
+                f"&{urlencode({'market': market})}&price=", f"&{urlencode({'side': side.lower()})}&tonce=",
+                json.dumps(body).split("@@"))
+        market_price, side_tonce, (j0, j1, j2, j3) = templates
+        price, qty = str(price), str(qty)
+        md5 = self._order_md5.copy()
+        md5.update(f"{quote_plus(qty)}{market_price}{quote_plus(price)}{side_tonce}{int(time.time() * 1000)}"
+                   f"{self._order_secret}".encode("utf-8"))
+        signature = md5.hexdigest().upper()
+        return self._order_url, self._headers, f"{j0}{qty}{j1}{price}{j2}{signature}{j3}".encode("utf-8")
+
+    def place_order(self, symbol, side, price, qty):
+        url, headers, data = self._prepare_order(symbol, side, price, qty)
+        try:
+            resp = self.session.request("POST", url, headers=headers, data=data, timeout=self._order_timeout,
+                                        resign=lambda: self._prepare_order(symbol, side, price, qty))
+            return resp.json()
+        except Exception as e:
+            raise Exception(f"CoinEx API error: {e}")
+
+    def get_order_status(self, symbol, order_id):
+        market = symbol.replace("/", "")
+        data = self._request("GET", "/order/status", {
+            "market": market,
+            "id": str(order_id)
+        }, signed=True)
+        return self._parse_order_status(data)
+
+    def ws_sign_params(self):
+        """Параметри за server.sign в WebSocket API v1."""
+        tonce = int(time.time() * 1000)
+        to_sign = f"access_id={self.access_id}&tonce={tonce}&secret_key={self.secret_key}"
+        return [self.access_id, hashlib.md5(to_sign.encode("utf-8")).hexdigest().upper(), tonce]
+
+    def get_open_orders(self, symbol=None):
+        market = symbol.replace("/", "") if symbol else "BTCUSDT"
+        return self._parse_open_orders(self._request("GET", "/order/pending", {"market": market}, signed=True))
+
+    def cancel_order(self, symbol, order_id):
+        market = symbol.replace("/", "")
+        return self._request("DELETE", "/order/pending", {
+            "market": market,
+            "id": str(order_id)
+        }, signed=True)
+
+    def get_my_trades(self, symbol, order_id):
+        market = symbol.replace("/", "")
+        data = self._request("GET", "/order/deals", {
+            "market": market,
+            "order_id": str(order_id)
+        }, signed=True)
+        return self._parse_trades(data)
+
+    # Пакетните заявки — общи за sync и async адаптера: [(индекси/ID-та, заявка)],
+    # където заявката са аргументите на _request(), и разбор на отговора на всяка
+    def _order_batch_requests(self, orders):
+        requests = []
+        for symbol, idx in batches(orders, self.batch_size):
+            batch = [{"type": orders[i][1].lower(), "amount": str(orders[i][3]), "price": str(orders[i][2])}
+                     for i in idx]
+            requests.append((idx, ("POST", "/order/limit/batch", {
+                "market": symbol.replace("/", ""),
+                "batch_orders": json.dumps(batch, separators=(",", ":"))
+            }, True)))
+        return requests
+
+    @staticmethod
+    def _parse_order_batch(resp, count):
+        # Всеки елемент на data е {"code", "data", "message"} — като отговора на /order/limit
+        items = resp.get("data") if succeeded(resp) else None
+        if not isinstance(items, list) or len(items) != count:
+            return [failed(resp)] * count
+        return items
+
+    def _cancel_requests(self, symbol, order_ids):
+        market = symbol.replace("/", "")
+        return [([str(order_id)], ("DELETE", "/order/pending", {"market": market, "id": str(order_id)}, True))
+                for order_id in order_ids]
+
+    @staticmethod
+    def _parse_cancelled(resp, ids):
+        return ids if succeeded(resp) else []
+
+    def _cancel_all_requests(self, symbols):
+        # DELETE /order/pending без id отменя целия пазар
+        return [("DELETE", "/order/pending", {"market": symbol.replace("/", ""), "account_id": 0}, True)
+                for symbol in symbols]
+
+    @staticmethod
+    def _pending_ids(symbols, open_orders):
+        """[(символ, ID-та)] само за пазарите с отворени поръчки."""
+        return [(symbol, [str(o["orderId"]) for o in orders]) for symbol, orders in zip(symbols, open_orders)
+                if isinstance(orders, list) and orders]
+
+    def place_orders(self, orders):
+        """
+        Много поръчки [(символ, страна, цена, к-во)] през /order/limit/batch
+        (пакетите тръгват паралелно). Отговорите са подред, във формата на place_order.
+        """
+        groups = self._order_batch_requests(orders)
+        return scatter(len(orders), groups, fan_out(self._request, [req for _, req in groups]),
+                       self._parse_order_batch)
+
+    def cancel_orders(self, symbol, order_ids):
+        """Отмяна на списък поръчки (паралелно); връща отменените ID."""
+        groups = self._cancel_requests(symbol, order_ids)
+        return collect(groups, fan_out(self._request, [req for _, req in groups]), self._parse_cancelled)
+
+    def cancel_all_orders(self, symbols):
+        """
+        Всички отворени поръчки по символите: DELETE /order/pending без id отменя
+        целия пазар. Отговорът няма ID-тата, затова преди това се четат отворените
+        поръчки — по две заявки на пазар, независимо колко поръчки има в него.
+        """
+        pending = self._pending_ids(symbols, fan_out(self.get_open_orders, [(symbol,) for symbol in symbols]))
+        responses = fan_out(self._request, self._cancel_all_requests([symbol for symbol, _ in pending]))
+        return [order_id for (_, ids), resp in zip(pending, responses) if succeeded(resp) for order_id in ids]
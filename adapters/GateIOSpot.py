@@ -0,0 +1,282 @@
+# adapters/GateIOSpot.py
+import time
+import hmac
+import hashlib
+import json
+from urllib.parse import urlencode
+
+from batch import batches, collect, failed, fan_out, scatter
+from config import EXCHANGE_KEYS, REST_URLS
+from health import HEALTH
+from http_pool import get_session
+from market_stream import MARKET_DATA
+from symbol_cache import SYMBOL_CACHE, make_info, step_from_precision
+
+class GateIOSpot:
+    name = "Gate.io"
+    maker_fee = 0.001
+    order_endpoint = "/spot/orders"
+    symbol_cache = SYMBOL_CACHE
+    batch_size = 10               # /spot/batch_orders: до 10 поръчки (и различни двойки)
+    cancel_batch_size = 20        # /spot/cancel_batch_orders: до 20 поръчки
+
+    def __init__(self):
+        self.api_key = EXCHANGE_KEYS["gateio"]["api_key"]
+        self.secret = EXCHANGE_KEYS["gateio"]["api_secret"]
+        self.base_url = REST_URLS.get("gateio", "https://api.gateio.ws/api/v4")
+        self.session = get_session("gateio")
+        HEALTH.register(self.session.name, self.ping)
+        # Ключът е зареден веднъж — подписът е copy() + update()
+        self._mac = hmac.new(self.secret.encode("utf-8"), digestmod=hashlib.sha512)
+        self._headers = {"Accept": "application/json", "Content-Type": "application/json", "KEY": self.api_key}
+        self._order_url = self.base_url + self.order_endpoint
+        self._order_timeout = self.session.timeout_for(self.order_endpoint)
+        self._order_templates = {}
+
+    def _sign(self, method, url, body=""):
+        t = str(int(time.time()))
+        s = self._mac.copy()
+        s.update(f"{method}\n{url}\n{body}\n{t}".encode("utf-8"))
+        signature = s.hexdigest()
+        return t, signature
+
+    def _prepare(self, method, endpoint, params=None, signed=False, body=None):
+        """URL, заглавки и тяло на заявката (общо за sync и async адаптера)."""
+        url = self.base_url + endpoint
+        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        if params:
+            query = urlencode(params)
+            url += "?" + query
+        else:
+            query = ""
+        if signed:
+            t, sig = self._sign(method, endpoint + "?" + query if params else endpoint, body or "")
+            headers.update({
+                "KEY": self.api_key,
+                "Timestamp": t,
+                "SIGN": sig
+            })
+        return url, headers, body
+
+    def _request(self, method, endpoint, params=None, signed=False, body=None):
+        url, headers, body = self._prepare(method, endpoint, params, signed, body)
+        timeout = self.session.timeout_for(endpoint)
+        try:
+            resp = self.session.request(method, url, headers=headers, json=body, timeout=timeout,
+                                        resign=lambda: self._prepare(method, endpoint, params, signed, body))
+            return resp.json()
+        except Exception as e:
+            raise Exception(f"Gate.io error: {e}")
+
+    def ping(self):
+        """Директна проверка на връзката (ползва се от фоновия HEALTH монитор)."""
+        try:
+            self._request("GET", "/spot/ping")
+            return True
+        except:
+            return False
+
+    def is_active(self):
+        return HEALTH.is_active(self.session.name)
+
+    # Разбор на отговорите — общ за sync и async адаптера (различен е само транспортът)
+    @staticmethod
+    def _parse_balance(data, asset):
+        for acc in data:
+            if acc["currency"] == asset:
+                return float(acc["available"])
+        return 0.0
+
+    @staticmethod
+    def _parse_balances(data):
+        return {acc["currency"]: float(acc["available"]) for acc in data}
+
+    @staticmethod
+    def _parse_ticker(data):
+        ticker = data[0]
+        return {"bidPrice": ticker["highest_bid"], "askPrice": ticker["lowest_ask"]}
+
+    @staticmethod
+    def _parse_klines(data):
+        # Gate.io връща: [timestamp, volume, close, high, low, open]
+        return [[float(c[0]), float(c[5]), float(c[3]), float(c[4]), float(c[2]), float(c[1])] for c in data]
+
+    @staticmethod
+    def _parse_order_status(data):
+        # Gate.io: open / closed (= изпълнена) / cancelled
+        status = data.get("status", "")
+        return {"closed": "filled", "cancelled": "canceled"}.get(status, status)
+
+    @staticmethod
+    def _parse_trades(data):
+        # Сделките на Gate.io нямат сума в USDT — смятаме я от amount × price
+        return [{"qty": t["amount"], "quoteQty": str(float(t["amount"]) * float(t["price"]))} for t in data]
+
+    @staticmethod
+    def _parse_open_orders(data):
+        # Отговорът е групиран по двойки: [{"currency_pair", "total", "orders": [...]}]
+        return [{"orderId": t["id"]} for pair in data for t in pair.get("orders", [])]
+
+    def get_balance(self, asset):
+        return self._parse_balance(self._request("GET", "/spot/accounts", signed=True), asset)
+
+    def get_balances(self):
+        """Свободните наличности по всички активи с една заявка: {актив: количество}."""
+        return self._parse_balances(self._request("GET", "/spot/accounts", signed=True))
+
+    def get_ticker(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return cached
+        return self._parse_ticker(self._request("GET", "/spot/tickers", {"currency_pair": symbol.replace("/", "_")}))
+
+    def get_price(self, symbol):
+        return float(self.get_ticker(symbol)["bidPrice"])
+
+    def get_klines(self, symbol, interval="1h", limit=50):
+        symbol = symbol.replace("/", "_")
+        interval_map = {"1h": "1h", "4h": "4h", "1d": "1d"}
+        data = self._request("GET", "/spot/candlesticks", {
+            "currency_pair": symbol,
+            "interval": interval_map[interval],
+            "limit": str(limit)
+        })
+        return self._parse_klines(data)
+
+    def load_symbols_info(self):
+        """Всички двойки от /spot/currency_pairs наведнъж (за SYMBOL_CACHE)."""
+        data = self._request("GET", "/spot/currency_pairs")
+        result = {}
+        for pair in data:
+            step_size = step_from_precision(pair["amount_precision"])
+            result[pair["id"]] = make_info(
+                pair.get("min_base_amount") or step_size,
+                step_size,
+                step_from_precision(pair["precision"]),
+                pair.get("min_quote_amount")
+            )
+        return result
+
+    def get_symbol_info(self, symbol):
+        return self.symbol_cache.get(self, symbol.replace("/", "_"))
+
+    def _prepare_order(self, symbol, side, price, qty):
+        """
+        Бърз път за лимитна поръчка: същата заявка като _prepare(), но от
+        готови шаблони за (символ, страна) — за подписа и за JSON тялото.
+        """
+        templates = self._order_templates.get((symbol, side))
+        if templates is None:
+            body = {
+                "currency_pair": symbol.replace("/", "_"),
+                "type": "limit",
+                "account": "spot",
+                "side": side.lower(),
+                "price": "@@",
+                "amount": "@@"
+            }
+            templates = self._order_templates[(symbol, side)] = (str(body).split("@@"), json.dumps(body).split("@@"))
+        (s0, s1, s2), (j0, j1, j2) = templates
+        price, qty = str(price), str(qty)
+        t = str(int(time.time()))
+        mac = self._mac.copy()
+        mac.update(f"POST\n{self.order_endpoint}\n{s0}{price}{s1}{qty}{s2}\n{t}".encode("utf-8"))
+        headers = {**self._headers, "Timestamp": t, "SIGN": mac.hexdigest()}
+        return self._order_url, headers, f"{j0}{price}{j1}{qty}{j2}".encode("utf-8")
+
+    def place_order(self, symbol, side, price, qty):
+        url, headers, data = self._prepare_order(symbol, side, price, qty)
+        try:
+            resp = self.session.request("POST", url, headers=headers, data=data, timeout=self._order_timeout,
+                                        resign=lambda: self._prepare_order(symbol, side, price, qty))
+            return resp.json()
+        except Exception as e:
+            raise Exception(f"Gate.io error: {e}")
+
+    def get_order_status(self, symbol, order_id):
+        symbol = symbol.replace("/", "_")
+        data = self._request("GET", f"/spot/orders/{order_id}", {"currency_pair": symbol}, signed=True)
+        return self._parse_order_status(data)
+
+    def ws_auth(self, channel, event, t):
+        """auth блок за частни WebSocket канали."""
+        payload = f"channel={channel}&event={event}&time={t}"
+        sign = hmac.new(self.secret.encode("utf-8"), payload.encode("utf-8"), hashlib.sha512).hexdigest()
+        return {"method": "api_key", "KEY": self.api_key, "SIGN": sign}
+
+    def get_my_trades(self, symbol, order_id):
+        symbol = symbol.replace("/", "_")
+        data = self._request("GET", "/spot/my_trades", {"currency_pair": symbol, "order_id": str(order_id)}, signed=True)
+        return self._parse_trades(data)
+
+    def get_open_orders(self, symbol=None):
+        params = {}
+        if symbol:
+            params["currency_pair"] = symbol.replace("/", "_")
+        return self._parse_open_orders(self._request("GET", "/spot/open_orders", params, signed=True))
+
+    def cancel_order(self, symbol, order_id):
+        symbol = symbol.replace("/", "_")
+        return self._request("DELETE", f"/spot/orders/{order_id}", {"currency_pair": symbol}, signed=True)
+
+    # Пакетните заявки — общи за sync и async адаптера: [(индекси/ID-та, заявка)],
+    # където заявката са аргументите на _request(), и разбор на отговора на всяка
+    def _order_batch_requests(self, orders):
+        requests = []
+        for _, idx in batches(orders, self.batch_size, per_symbol=False):
+            body = [{
+                "currency_pair": orders[i][0].replace("/", "_"),
+                "type": "limit",
+                "account": "spot",
+                "side": orders[i][1].lower(),
+                "price": str(orders[i][2]),
+                "amount": str(orders[i][3])
+            } for i in idx]
+            requests.append((idx, ("POST", "/spot/batch_orders", None, True, body)))
+        return requests
+
+    @staticmethod
+    def _parse_order_batch(resp, count):
+        if not isinstance(resp, list) or len(resp) != count:
+            return [failed(resp)] * count
+        # Отказаната поръчка идва с label/message вместо id
+        return [item if item.get("succeeded", True) else {"code": item.get("label", -1), "msg": item.get("message", "")}
+                for item in resp]
+
+    def _cancel_requests(self, symbol, order_ids):
+        pair = symbol.replace("/", "_")
+        ids = [str(order_id) for order_id in order_ids]
+        chunks = [ids[k:k + self.cancel_batch_size] for k in range(0, len(ids), self.cancel_batch_size)]
+        return [(chunk, ("POST", "/spot/cancel_batch_orders", None, True,
+                         [{"currency_pair": pair, "id": order_id} for order_id in chunk]))
+                for chunk in chunks]
+
+    @staticmethod
+    def _parse_cancelled(resp, ids):
+        return [str(r["id"]) for r in resp if r.get("succeeded", True)] if isinstance(resp, list) else []
+
+    def _cancel_all_requests(self, symbols):
+        return [("DELETE", "/spot/orders", {"currency_pair": symbol.replace("/", "_")}, True) for symbol in symbols]
+
+    @staticmethod
+    def _parse_cancel_all(resp):
+        return [str(o["id"]) for o in resp] if isinstance(resp, list) else []
+
+    def place_orders(self, orders):
+        """
+        Много поръчки [(символ, страна, цена, к-во)] през /spot/batch_orders
+        (пакетите тръгват паралелно). Отговорите са подред, във формата на place_order.
+        """
+        groups = self._order_batch_requests(orders)
+        return scatter(len(orders), groups, fan_out(self._request, [req for _, req in groups]),
+                       self._parse_order_batch)
+
+    def cancel_orders(self, symbol, order_ids):
+        """Отмяна на списък поръчки през /spot/cancel_batch_orders (по 20); връща отменените ID."""
+        groups = self._cancel_requests(symbol, order_ids)
+        return collect(groups, fan_out(self._request, [req for _, req in groups]), self._parse_cancelled)
+
+    def cancel_all_orders(self, symbols):
+        """Всички отворени поръчки по символите — по една DELETE /spot/orders на двойка, паралелно."""
+        responses = fan_out(self._request, self._cancel_all_requests(symbols))
+        return [order_id for resp in responses for order_id in self._parse_cancel_all(resp)]
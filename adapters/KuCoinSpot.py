@@ -0,0 +1,274 @@
+# adapters/KuCoinSpot.py
+import time
+import hmac
+import hashlib
+import json
+from urllib.parse import urlencode, quote_plus
+
+from batch import batches, collect, failed, fan_out, scatter, succeeded
+from config import EXCHANGE_KEYS, REST_URLS
+from health import HEALTH
+from http_pool import get_session
+from market_stream import MARKET_DATA
+from symbol_cache import SYMBOL_CACHE, make_info
+
+class KuCoinSpot:
+    name = "KuCoin"
+    maker_fee = 0.0008
+    order_endpoint = "/api/v1/orders"
+    symbol_cache = SYMBOL_CACHE
+    batch_size = 5                # /api/v1/orders/multi: до 5 лимитни поръчки за един символ
+
+    def __init__(self):
+        self.api_key = EXCHANGE_KEYS["kucoin"]["api_key"]
+        self.secret = EXCHANGE_KEYS["kucoin"]["api_secret"]
+        self.passphrase = EXCHANGE_KEYS["kucoin"]["api_passphrase"]
+        self.base_url = REST_URLS.get("kucoin", "https://api.kucoin.com")
+        self.session = get_session("kucoin")
+        HEALTH.register(self.session.name, self.ping)
+        # Ключът е зареден веднъж — подписът е copy() + update()
+        self._mac = hmac.new(self.secret.encode("utf-8"), digestmod=hashlib.sha256)
+        self._order_url = self.base_url + self.order_endpoint
+        self._order_timeout = self.session.timeout_for(self.order_endpoint)
+        self._order_templates = {}
+
+    def _sign(self, method, endpoint, params=None):
+        now = int(time.time() * 1000)
+        str_to_sign = str(now) + method + endpoint
+        if params:
+            query = urlencode(params)
+            str_to_sign += "?" + query
+        mac = self._mac.copy()
+        mac.update(str_to_sign.encode("utf-8"))
+        signature = mac.hexdigest()
+        return {
+            "KC-API-KEY": self.api_key,
+            "KC-API-SIGN": signature,
+            "KC-API-TIMESTAMP": str(now),
+            "KC-API-PASSPHRASE": self.passphrase,
+            "Content-Type": "application/json"
+        }
+
+    def _prepare(self, method, endpoint, params=None, signed=False):
+        """URL, заглавки и тяло на заявката (общо за sync и async адаптера)."""
+        url = self.base_url + endpoint
+        headers = {}
+        if signed:
+            headers = self._sign(method, endpoint, params)
+        if method == "GET":
+            if params:
+                url += "?" + urlencode(params)
+            return url, headers, None
+        return url, headers, params
+
+    def _request(self, method, endpoint, params=None, signed=False):
+        url, headers, body = self._prepare(method, endpoint, params, signed)
+        timeout = self.session.timeout_for(endpoint)
+        try:
+            resp = self.session.request(method, url, json=body, headers=headers, timeout=timeout,
+                                        resign=lambda: self._prepare(method, endpoint, params, signed))
+            data = resp.json()
+            return data["data"]
+        except Exception as e:
+            raise Exception(f"KuCoin error: {e}")
+
+    def ping(self):
+        """Директна проверка на връзката (ползва се от фоновия HEALTH монитор)."""
+        try:
+            self._request("GET", "/api/v1/timestamp")
+            return True
+        except:
+            return False
+
+    def is_active(self):
+        return HEALTH.is_active(self.session.name)
+
+    # Разбор на отговорите (вече без обвивката "data") — общ за sync и async адаптера
+    @staticmethod
+    def _parse_balance(data, asset):
+        if data:
+            return float(data[0]["available"])
+        return 0.0
+
+    @staticmethod
+    def _parse_balances(data):
+        return {acc["currency"]: float(acc["available"]) for acc in data}
+
+    @staticmethod
+    def _parse_ticker(data):
+        return {"bidPrice": data["bestBid"], "askPrice": data["bestAsk"]}
+
+    @staticmethod
+    def _parse_klines(data):
+        # KuCoin: [time, open, close, high, low, volume, turnover]
+        return [[float(c[0]), float(c[1]), float(c[3]), float(c[4]), float(c[2]), float(c[5])] for c in data]
+
+    @staticmethod
+    def _parse_order_status(data):
+        # KuCoin няма поле status: активна → open, отменена → canceled, иначе изпълнена
+        if data.get("isActive"):
+            return "partially_filled" if float(data.get("dealSize", 0)) > 0 else "open"
+        return "canceled" if data.get("cancelExist") else "filled"
+
+    @staticmethod
+    def _parse_trades(data):
+        return [{"qty": t["size"], "quoteQty": str(float(t["size"]) * float(t["price"]))} for t in data["items"]]
+
+    @staticmethod
+    def _parse_open_orders(data):
+        return [{"orderId": t["id"]} for t in data["items"]]
+
+    def get_balance(self, asset):
+        data = self._request("GET", "/api/v1/accounts", {"currency": asset, "type": "trade"}, signed=True)
+        return self._parse_balance(data, asset)
+
+    def get_balances(self):
+        """Свободните наличности по всички активи с една заявка: {актив: количество}."""
+        return self._parse_balances(self._request("GET", "/api/v1/accounts", {"type": "trade"}, signed=True))
+
+    def get_ticker(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return cached
+        data = self._request("GET", "/api/v1/market/orderbook/level1", {"symbol": symbol.replace("/", "-")})
+        return self._parse_ticker(data)
+
+    def get_price(self, symbol):
+        return float(self.get_ticker(symbol)["bidPrice"])
+
+    def get_klines(self, symbol, interval="1h", limit=50):
+        symbol = symbol.replace("/", "-")
+        interval_map = {"1h": "1hour", "4h": "4hour", "1d": "1day"}
+        data = self._request("GET", "/api/v1/market/candles", {
+            "symbol": symbol,
+            "type": interval_map[interval],
+            "startAt": int(time.time()) - limit * 3600,
+            "endAt": int(time.time())
+        })
+        return self._parse_klines(data)
+
+    def load_symbols_info(self):
+        """Всички символи от /api/v1/symbols наведнъж (за SYMBOL_CACHE)."""
+        data = self._request("GET", "/api/v1/symbols")
+        return {
+            s["symbol"]: make_info(s["baseMinSize"], s["baseIncrement"], s["priceIncrement"], s.get("minFunds"))
+            for s in data
+        }
+
+    def get_symbol_info(self, symbol):
+        return self.symbol_cache.get(self, symbol.replace("/", "-"))
+
+    def _prepare_order(self, symbol, side, price, qty):
+        """
+        Бърз път за лимитна поръчка: същата заявка като _prepare(), но от
+        готови шаблони за (символ, страна) — за подписа и за JSON тялото.
+        """
+        templates = self._order_templates.get((symbol, side))
+        if templates is None:
+            fixed = urlencode({"side": side.lower(), "symbol": symbol.replace("/", "-"), "type": "limit"})
+            body = {"clientOid": "@@", "side": side.lower(), "symbol": symbol.replace("/", "-"), "type": "limit",
+                    "price": "@@", "size": "@@"}
+            templates = self._order_templates[(symbol, side)] = (f"&{fixed}&price=", json.dumps(body).split("@@"))
+        fixed, (j0, j1, j2, j3) = templates
+        now = str(int(time.time() * 1000))
+        price, qty = str(price), str(qty)
+        query = f"clientOid={now}{fixed}{quote_plus(price)}&size={quote_plus(qty)}"
+        mac = self._mac.copy()
+        mac.update(f"{now}POST{self.order_endpoint}?{query}".encode("utf-8"))
+        headers = {
+            "KC-API-KEY": self.api_key,
+            "KC-API-SIGN": mac.hexdigest(),
+            "KC-API-TIMESTAMP": now,
+            "KC-API-PASSPHRASE": self.passphrase,
+            "Content-Type": "application/json"
+        }
+        return self._order_url, headers, f"{j0}{now}{j1}{price}{j2}{qty}{j3}".encode("utf-8")
+
+    def place_order(self, symbol, side, price, qty):
+        url, headers, data = self._prepare_order(symbol, side, price, qty)
+        try:
+            resp = self.session.request("POST", url, headers=headers, data=data, timeout=self._order_timeout,
+                                        resign=lambda: self._prepare_order(symbol, side, price, qty))
+            return resp.json()["data"]
+        except Exception as e:
+            raise Exception(f"KuCoin error: {e}")
+
+    def get_order_status(self, symbol, order_id):
+        return self._parse_order_status(self._request("GET", f"/api/v1/orders/{order_id}", signed=True))
+
+    def get_private_ws_token(self):
+        """Токен и сървъри за частния WebSocket поток."""
+        return self._request("POST", "/api/v1/bullet-private", signed=True)
+
+    def get_my_trades(self, symbol, order_id):
+        return self._parse_trades(self._request("GET", "/api/v1/fills", {"orderId": str(order_id)}, signed=True))
+
+    def get_open_orders(self, symbol=None):
+        params = {"status": "active"}  # без него KuCoin връща приключените поръчки
+        if symbol:
+            params["symbol"] = symbol.replace("/", "-")
+        return self._parse_open_orders(self._request("GET", "/api/v1/orders", params, signed=True))
+
+    def cancel_order(self, symbol, order_id):
+        return self._request("DELETE", f"/api/v1/orders/{order_id}", signed=True)
+
+    # Пакетните заявки — общи за sync и async адаптера: [(индекси/ID-та, заявка)],
+    # където заявката са аргументите на _request(), и разбор на отговора на всяка
+    def _order_batch_requests(self, orders):
+        now = int(time.time() * 1000)
+        requests = []
+        for symbol, idx in batches(orders, self.batch_size):
+            order_list = [{
+                "clientOid": f"{now}-{i}",
+                "side": orders[i][1].lower(),
+                "type": "limit",
+                "price": str(orders[i][2]),
+                "size": str(orders[i][3])
+            } for i in idx]
+            requests.append((idx, ("POST", "/api/v1/orders/multi",
+                                   {"symbol": symbol.replace("/", "-"), "orderList": order_list}, True)))
+        return requests
+
+    @staticmethod
+    def _parse_order_batch(resp, count):
+        items = resp.get("data") if isinstance(resp, dict) else resp
+        if not isinstance(items, list) or len(items) != count:
+            return [failed(resp)] * count
+        return [{"orderId": item["id"]} if item.get("status") == "success"
+                else {"code": "fail", "msg": item.get("failMsg", "")} for item in items]
+
+    def _cancel_requests(self, symbol, order_ids):
+        # KuCoin няма отмяна по списък — по една заявка на поръчка
+        return [([str(order_id)], ("DELETE", f"/api/v1/orders/{order_id}", None, True)) for order_id in order_ids]
+
+    @staticmethod
+    def _parse_cancelled(resp, ids):
+        return [str(order_id) for order_id in resp["cancelledOrderIds"]] if succeeded(resp) else []
+
+    def _cancel_all_requests(self, symbols):
+        # Параметърът е в пътя, за да влезе в подписа и при DELETE
+        return [("DELETE", "/api/v1/orders?" + urlencode({"symbol": symbol.replace("/", "-")}), None, True)
+                for symbol in symbols]
+
+    @staticmethod
+    def _parse_cancel_all(resp):
+        return [str(order_id) for order_id in resp["cancelledOrderIds"]] if succeeded(resp) else []
+
+    def place_orders(self, orders):
+        """
+        Много поръчки [(символ, страна, цена, к-во)] през /api/v1/orders/multi
+        (пакетите тръгват паралелно). Отговорите са подред, във формата на place_order.
+        """
+        groups = self._order_batch_requests(orders)
+        return scatter(len(orders), groups, fan_out(self._request, [req for _, req in groups]),
+                       self._parse_order_batch)
+
+    def cancel_orders(self, symbol, order_ids):
+        """Отмяна на списък поръчки (паралелно — KuCoin няма отмяна по списък); връща отменените ID."""
+        groups = self._cancel_requests(symbol, order_ids)
+        return collect(groups, fan_out(self._request, [req for _, req in groups]), self._parse_cancelled)
+
+    def cancel_all_orders(self, symbols):
+        """Всички отворени поръчки по символите — по една DELETE /api/v1/orders на символ, паралелно."""
+        responses = fan_out(self._request, self._cancel_all_requests(symbols))
+        return [order_id for resp in responses for order_id in self._parse_cancel_all(resp)]
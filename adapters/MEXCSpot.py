@@ -2,64 +2,124 @@
 import time
 import hmac
 import hashlib
-import requests
-from urllib.parse import urlencode
+import json
+from urllib.parse import urlencode, quote_plus
 
-from config import EXCHANGE_KEYS
+from batch import batches, collect, failed, fan_out, scatter, succeeded
+from config import EXCHANGE_KEYS, REST_URLS
+from health import HEALTH
+from http_pool import get_session
+from market_stream import MARKET_DATA
+from symbol_cache import SYMBOL_CACHE, make_info, step_from_precision
 
 class MEXCSpot:
     name = "MEXC"
     maker_fee = 0.001
+    order_endpoint = "/api/v3/order"
+    symbol_cache = SYMBOL_CACHE
+    batch_size = 20               # /api/v3/batchOrders: до 20 поръчки за един символ
 
     def __init__(self):
         self.api_key = EXCHANGE_KEYS["mexc"]["api_key"]
         self.secret = EXCHANGE_KEYS["mexc"]["api_secret"]
-        self.base_url = "https://api.mexc.com"
+        self.base_url = REST_URLS.get("mexc", "https://api.mexc.com")
+        self.session = get_session("mexc")
+        HEALTH.register(self.session.name, self.ping)
+        # Ключът е зареден веднъж — подписът е copy() + update()
+        self._mac = hmac.new(self.secret.encode("utf-8"), digestmod=hashlib.sha256)
+        self._headers = {"X-MEXC-APIKEY": self.api_key}
+        self._order_url = self.base_url + self.order_endpoint
+        self._order_timeout = self.session.timeout_for(self.order_endpoint)
+        self._order_templates = {}
 
     def _sign(self, params):
         ts = str(int(time.time() * 1000))
         params["timestamp"] = ts
         query = urlencode(sorted(params.items()))
-        signature = hmac.new(self.secret.encode("utf-8"), query.encode("utf-8"), hashlib.sha256).hexdigest()
-        return query + "&signature=" + signature
+        mac = self._mac.copy()
+        mac.update(query.encode("utf-8"))
+        return query + "&signature=" + mac.hexdigest()
 
-    def _request(self, method, endpoint, params=None, signed=False):
+    def _prepare(self, method, endpoint, params=None, signed=False):
+        """URL, заглавки и тяло на заявката (общо за sync и async адаптера)."""
         url = self.base_url + endpoint
         headers = {"X-MEXC-APIKEY": self.api_key}
         if signed:
-            query = self._sign(params or {})
-            url += "?" + query
+            url += "?" + self._sign(params or {})
+        elif params:
+            url += "?" + urlencode(params)
+        return url, headers, None
+
+    def _request(self, method, endpoint, params=None, signed=False):
+        url, headers, body = self._prepare(method, endpoint, params, signed)
         try:
-            if method == "GET":
-                resp = requests.get(url, headers=headers, timeout=10)
-            else:
-                resp = requests.post(url, headers=headers, timeout=10)
+            resp = self.session.request(method, url, headers=headers, timeout=self.session.timeout_for(endpoint),
+                                        resign=lambda: self._prepare(method, endpoint, params, signed))
             return resp.json()
         except Exception as e:
             raise Exception(f"MEXC error: {e}")
 
-    def is_active(self):
+    def ping(self):
+        """Директна проверка на връзката (ползва се от фоновия HEALTH монитор)."""
         try:
             self._request("GET", "/api/v3/ping")
             return True
         except:
             return False
 
-    def get_balance(self, asset):
-        data = self._request("GET", "/api/v3/account", signed=True)
+    def is_active(self):
+        return HEALTH.is_active(self.session.name)
+
+    # Разбор на отговорите — общ за sync и async адаптера (различен е само транспортът)
+    @staticmethod
+    def _parse_balance(data, asset):
         for bal in data.get("balances", []):
             if bal["asset"] == asset:
                 return float(bal["free"])
         return 0.0
 
-    def get_ticker(self, symbol):
-        symbol = symbol.replace("/", "")
-        data = self._request("GET", "/api/v3/ticker/bookTicker", {"symbol": symbol})
+    @staticmethod
+    def _parse_balances(data):
+        return {bal["asset"]: float(bal["free"]) for bal in data.get("balances", [])}
+
+    @staticmethod
+    def _parse_ticker(data):
         return {
             "bidPrice": data["bidPrice"],
             "askPrice": data["askPrice"]
         }
 
+    @staticmethod
+    def _parse_klines(data):
+        # Връща: [open_time, open, high, low, close, volume, ...]
+        return [[float(x) for x in candle[:6]] for candle in data]
+
+    @staticmethod
+    def _parse_order_status(data):
+        return data.get("status", "").lower()
+
+    @staticmethod
+    def _parse_trades(data):
+        return [{"qty": t["qty"], "quoteQty": t["quoteQty"]} for t in data]
+
+    @staticmethod
+    def _parse_open_orders(data):
+        return [{"orderId": t["orderId"]} for t in data]
+
+    def get_balance(self, asset):
+        return self._parse_balance(self._request("GET", "/api/v3/account", signed=True), asset)
+
+    def get_balances(self):
+        """Свободните наличности по всички активи с една заявка: {актив: количество}."""
+        return self._parse_balances(self._request("GET", "/api/v3/account", signed=True))
+
+    def get_ticker(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return cached
+        symbol = symbol.replace("/", "")
+        return self._parse_ticker(self._request("GET", "/api/v3/ticker/bookTicker", {"symbol": symbol}))
+
     def get_price(self, symbol):
         return float(self.get_ticker(symbol)["bidPrice"])
 
@@ -71,57 +131,137 @@ class MEXCSpot:
             "interval": interval_map.get(interval, "60m"),
             "limit": str(limit)
         })
-        # Връща: [open_time, open, high, low, close, volume, ...]
-        return [[float(x) for x in candle[:6]] for candle in data]
+        return self._parse_klines(data)
 
-    def get_symbol_info(self, symbol):
-        symbol = symbol.replace("/", "")
+    def load_symbols_info(self):
+        """Всички символи от /api/v3/exchangeInfo наведнъж (за SYMBOL_CACHE)."""
         data = self._request("GET", "/api/v3/exchangeInfo")
+        result = {}
         for s in data["symbols"]:
-            if s["symbol"] == symbol:
-                filters = {f["filterType"]: f for f in s["filters"]}
-                min_qty = float(filters["LOT_SIZE"]["minQty"])
+            filters = {f["filterType"]: f for f in s.get("filters", [])}
+            if "LOT_SIZE" in filters:
                 step_size = filters["LOT_SIZE"]["stepSize"]
-                qty_prec = len(step_size.rstrip('0').split('.')[-1]) if '.' in step_size else 0
-
+                min_qty = filters["LOT_SIZE"]["minQty"]
+            else:
+                step_size = s.get("baseSizePrecision") or "0.01"
+                min_qty = step_size
+            if "PRICE_FILTER" in filters:
                 tick_size = filters["PRICE_FILTER"]["tickSize"]
-                price_prec = len(tick_size.rstrip('0').split('.')[-1]) if '.' in tick_size else 0
+            else:
+                tick_size = step_from_precision(s.get("quotePrecision", 4))
+            min_notional = filters.get("MIN_NOTIONAL", {}).get("minNotional") or s.get("quoteAmountPrecision")
+            result[s["symbol"]] = make_info(min_qty, step_size, tick_size, min_notional)
+        return result
+
+    def get_symbol_info(self, symbol):
+        return self.symbol_cache.get(self, symbol.replace("/", ""))
 
-                return {
-                    "min_qty": min_qty,
-                    "quantity_precision": qty_prec,
-                    "price_precision": price_prec
-                }
-        return {"min_qty": 0.01, "quantity_precision": 2, "price_precision": 4}
+    def _prepare_order(self, symbol, side, price, qty):
+        """
+        Бърз път за лимитна поръчка: същата заявка като _prepare(), но от
+        готов шаблон за (символ, страна) — менят се само цена, количество и време.
+        """
+        tail = self._order_templates.get((symbol, side))
+        if tail is None:
+            # Параметрите са подредени по име, както в _sign()
+            fixed = urlencode({"side": side.upper(), "symbol": symbol.replace("/", ""), "timeInForce": "GTC"})
+            tail = self._order_templates[(symbol, side)] = f"&{fixed}&timestamp="
+        query = (f"price={quote_plus(str(price))}&quantity={quote_plus(str(qty))}"
+                 f"{tail}{int(time.time() * 1000)}&type=LIMIT")
+        mac = self._mac.copy()
+        mac.update(query.encode("utf-8"))
+        return f"{self._order_url}?{query}&signature={mac.hexdigest()}", self._headers, None
 
     def place_order(self, symbol, side, price, qty):
-        symbol = symbol.replace("/", "")
-        return self._request("POST", "/api/v3/order", {
-            "symbol": symbol,
-            "side": side.upper(),
-            "type": "LIMIT",
-            "timeInForce": "GTC",
-            "quantity": str(qty),
-            "price": str(price)
-        }, signed=True)
+        url, headers, data = self._prepare_order(symbol, side, price, qty)
+        try:
+            resp = self.session.request("POST", url, headers=headers, data=data, timeout=self._order_timeout,
+                                        resign=lambda: self._prepare_order(symbol, side, price, qty))
+            return resp.json()
+        except Exception as e:
+            raise Exception(f"MEXC error: {e}")
 
     def get_order_status(self, symbol, order_id):
         symbol = symbol.replace("/", "")
         data = self._request("GET", "/api/v3/order", {"symbol": symbol, "orderId": str(order_id)}, signed=True)
-        return data.get("status", "").lower()
+        return self._parse_order_status(data)
+
+    def get_listen_key(self):
+        """listenKey за частния WebSocket поток (поръчки)."""
+        return self._request("POST", "/api/v3/userDataStream", signed=True)["listenKey"]
+
+    def keepalive_listen_key(self, listen_key):
+        return self._request("PUT", "/api/v3/userDataStream", {"listenKey": listen_key}, signed=True)
 
     def get_my_trades(self, symbol, order_id):
         symbol = symbol.replace("/", "")
         data = self._request("GET", "/api/v3/myTrades", {"symbol": symbol, "orderId": str(order_id)}, signed=True)
-        return [{"qty": t["qty"], "quoteQty": t["quoteQty"]} for t in data]
+        return self._parse_trades(data)
 
     def get_open_orders(self, symbol=None):
         params = {}
         if symbol:
             params["symbol"] = symbol.replace("/", "")
-        data = self._request("GET", "/api/v3/openOrders", params, signed=True)
-        return [{"orderId": t["orderId"]} for t in data]
+        return self._parse_open_orders(self._request("GET", "/api/v3/openOrders", params, signed=True))
 
     def cancel_order(self, symbol, order_id):
         symbol = symbol.replace("/", "")
         return self._request("DELETE", "/api/v3/order", {"symbol": symbol, "orderId": str(order_id)}, signed=True)
+
+    # Пакетните заявки — общи за sync и async адаптера: [(индекси/ID-та, заявка)],
+    # където заявката са аргументите на _request(), и разбор на отговора на всяка
+    def _order_batch_requests(self, orders):
+        requests = []
+        for symbol, idx in batches(orders, self.batch_size):
+            batch = [{
+                "symbol": symbol.replace("/", ""),
+                "side": orders[i][1].upper(),
+                "type": "LIMIT",
+                "quantity": str(orders[i][3]),
+                "price": str(orders[i][2])
+            } for i in idx]
+            requests.append((idx, ("POST", "/api/v3/batchOrders",
+                                   {"batchOrders": json.dumps(batch, separators=(",", ":"))}, True)))
+        return requests
+
+    @staticmethod
+    def _parse_order_batch(resp, count):
+        if isinstance(resp, list) and len(resp) == count:
+            return resp
+        return [failed(resp)] * count
+
+    def _cancel_requests(self, symbol, order_ids):
+        # MEXC няма отмяна по списък — по една заявка на поръчка
+        symbol = symbol.replace("/", "")
+        return [([str(order_id)], ("DELETE", "/api/v3/order", {"symbol": symbol, "orderId": str(order_id)}, True))
+                for order_id in order_ids]
+
+    @staticmethod
+    def _parse_cancelled(resp, ids):
+        return ids if succeeded(resp) else []
+
+    def _cancel_all_requests(self, symbols):
+        return [("DELETE", "/api/v3/openOrders", {"symbol": symbol.replace("/", "")}, True) for symbol in symbols]
+
+    @staticmethod
+    def _parse_cancel_all(resp):
+        return [str(o["orderId"]) for o in resp] if isinstance(resp, list) else []
+
+    def place_orders(self, orders):
+        """
+        Много поръчки [(символ, страна, цена, к-во)] през /api/v3/batchOrders
+        (пакетите тръгват паралелно). Отговорите са подред, във формата на place_order.
+        """
+        groups = self._order_batch_requests(orders)
+        return scatter(len(orders), groups, fan_out(self._request, [req for _, req in groups]),
+                       self._parse_order_batch)
+
+    def cancel_orders(self, symbol, order_ids):
+        """Отмяна на списък поръчки (паралелно — MEXC няма отмяна по списък); връща отменените ID."""
+        groups = self._cancel_requests(symbol, order_ids)
+        return collect(groups, fan_out(self._request, [req for _, req in groups]), self._parse_cancelled)
+
+    def cancel_all_orders(self, symbols):
+        """Всички отворени поръчки по символите — по една DELETE /api/v3/openOrders на символ, паралелно."""
+        responses = fan_out(self._request, self._cancel_all_requests(symbols))
+        return [order_id for resp in responses for order_id in self._parse_cancel_all(resp)]
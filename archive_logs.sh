@@ -8,6 +8,8 @@ mkdir -p "$ARCHIVE_DIR"
 # Архивираме текущия лог с дата
 DATE=$(date +%Y-%m-%d)
 cp "$LOG_DIR/bot.log" "$ARCHIVE_DIR/bot_$DATE.log"
+# Компресираме архива (logreader.py чете и .gz)
+gzip -f "$ARCHIVE_DIR/bot_$DATE.log"
 
 # Изчистваме текущия лог (запазваме последните 100 реда за контекст)
 tail -n 100 "$LOG_DIR/bot.log" > "$LOG_DIR/bot.log.tmp" && mv "$LOG_DIR/bot.log.tmp" "$LOG_DIR/bot.log"
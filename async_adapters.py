@@ -0,0 +1,407 @@
+# async_adapters.py
+"""
+Асинхронни адаптери (asyncio + aiohttp) със същите методи като синхронните:
+get_balance, get_balances, get_klines, get_ticker, get_price, place_order, get_order_status,
+get_my_trades, get_open_orders, cancel_order — всички са корутини.
+Подписът и URL-ът идват от _prepare() на синхронния адаптер, тук е само
+транспортът; лимитите на заявките са общите от http_pool (ratelimit.py).
+
+    async def main():
+        ex = AsyncGateIOSpot()
+        tickers = await asyncio.gather(*(ex.get_ticker(s) for s in TRADE_SYMBOLS))
+
+SyncAdapter е тънка синхронна обвивка (фонов event loop) за main.py.
+Нужен е пакетът aiohttp; без него се ползват синхронните адаптери.
+"""
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from adapters import MEXCSpot, GateIOSpot, KuCoinSpot, CoinExSpot
+from batch import collect, scatter, succeeded
+from config import HTTP_POOL_SIZE, RATE_LIMIT_MAX_RETRIES
+from health import HEALTH
+from http_pool import get_session
+from metrics import METRICS, endpoint as metrics_endpoint
+from market_stream import MARKET_DATA
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+class AsyncHTTP:
+    """aiohttp сесия към една борса с таймаутите и лимитите на sync сесията ѝ."""
+
+    def __init__(self, name, pool_size=HTTP_POOL_SIZE):
+        self.name = name
+        self.pool_size = pool_size
+        self.sync_session = get_session(name)
+        self._session = None
+
+    def _client(self):
+        # ClientSession се създава в event loop-а, в който ще работи
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        return self._session
+
+    async def request(self, method, url, endpoint, headers=None, body=None, data=None, resign=None):
+        """
+        Връща декодирания JSON; при 429/418 изчаква и повтаря като PooledSession.
+        body се сериализира като JSON, data са готови байтове (бързия път за поръчки);
+        resign() дава нови (url, заглавки, тяло) — всеки повторен опит е подписан наново.
+        """
+        limiter = self.sync_session.limiter
+        connect, read = self.sync_session.timeout_for(endpoint)
+        timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        path = urlsplit(url).path
+        labels = {"session": self.name, "method": method.upper(), "endpoint": metrics_endpoint(path)}
+        result = None
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            if attempt and resign is not None:
+                if data is not None:
+                    url, headers, data = resign()
+                else:
+                    url, headers, body = resign()
+            if limiter is not None:
+                wait = limiter.reserve(method, path)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            start = time.monotonic()
+            try:
+                async with self._client().request(method, url, headers=headers, json=body, data=data,
+                                                 timeout=timeout) as resp:
+                    result = await resp.json(content_type=None)
+            except Exception:
+                elapsed = time.monotonic() - start
+                HEALTH.record(self.name, elapsed, False)
+                METRICS.observe("request_seconds", elapsed, **labels)
+                METRICS.inc("requests_total", code="error", **labels)
+                raise
+            elapsed = time.monotonic() - start
+            HEALTH.record(self.name, elapsed, resp.status < 500)
+            METRICS.observe("request_seconds", elapsed, **labels)
+            METRICS.inc("requests_total", code=resp.status, **labels)
+            if limiter is None:
+                break
+            limiter.feedback(method, path, resp.status, resp.headers)
+            if resp.status not in (418, 429):
+                break
+            METRICS.inc("rate_limit_retries_total", session=self.name)
+        return result
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncExchange:
+    """Общ async транспорт за адаптер, който има _prepare() (виж адаптерите)."""
+    session_name = None
+
+    def _init_async(self):
+        self.http = AsyncHTTP(self.session_name)
+
+    async def _arequest(self, method, endpoint, *args, **kwargs):
+        url, headers, body = self._prepare(method, endpoint, *args, **kwargs)
+        try:
+            data = await self.http.request(method, url, endpoint, headers, body,
+                                           resign=lambda: self._prepare(method, endpoint, *args, **kwargs))
+        except Exception as e:
+            raise Exception(f"{self.name} error: {e}")
+        return self._unwrap(data)
+
+    async def place_order(self, symbol, side, price, qty):
+        """Готовата заявка от _prepare_order() на синхронния адаптер (шаблони + ключ)."""
+        url, headers, data = self._prepare_order(symbol, side, price, qty)
+        try:
+            resp = await self.http.request("POST", url, self.order_endpoint, headers, data=data,
+                                           resign=lambda: self._prepare_order(symbol, side, price, qty))
+        except Exception as e:
+            raise Exception(f"{self.name} error: {e}")
+        return self._unwrap(resp)
+
+    async def _agather(self, requests):
+        """Готовите заявки [(метод, ендпойнт, ...)] едновременно; изключението е на мястото на отговора."""
+        return await asyncio.gather(*(self._arequest(*req) for req in requests), return_exceptions=True)
+
+    async def place_orders(self, orders):
+        """Пакетните заявки от _order_batch_requests() на синхронния адаптер — едновременно, отговорите подред."""
+        groups = self._order_batch_requests(orders)
+        return scatter(len(orders), groups, await self._agather([req for _, req in groups]), self._parse_order_batch)
+
+    async def cancel_orders(self, symbol, order_ids):
+        """Отмяна на списък поръчки със заявките от _cancel_requests(); връща отменените ID."""
+        groups = self._cancel_requests(symbol, order_ids)
+        return collect(groups, await self._agather([req for _, req in groups]), self._parse_cancelled)
+
+    async def cancel_all_orders(self, symbols):
+        """Всички отворени поръчки по символите — заявките от _cancel_all_requests(), едновременно."""
+        responses = await self._agather(self._cancel_all_requests(symbols))
+        return [order_id for resp in responses for order_id in self._parse_cancel_all(resp)]
+
+    def _unwrap(self, data):
+        return data
+
+    async def close(self):
+        await self.http.close()
+
+
+class AsyncMEXCSpot(AsyncExchange, MEXCSpot):
+    session_name = "mexc"
+
+    def __init__(self):
+        MEXCSpot.__init__(self)
+        self._init_async()
+
+    async def get_balance(self, asset):
+        return self._parse_balance(await self._arequest("GET", "/api/v3/account", signed=True), asset)
+
+    async def get_balances(self):
+        return self._parse_balances(await self._arequest("GET", "/api/v3/account", signed=True))
+
+    async def get_ticker(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return cached
+        data = await self._arequest("GET", "/api/v3/ticker/bookTicker", {"symbol": symbol.replace("/", "")})
+        return self._parse_ticker(data)
+
+    async def get_price(self, symbol):
+        return float((await self.get_ticker(symbol))["bidPrice"])
+
+    async def get_klines(self, symbol, interval="1h", limit=50):
+        interval_map = {"1h": "60m", "4h": "4h", "1d": "1d"}
+        data = await self._arequest("GET", "/api/v3/klines", {
+            "symbol": symbol.replace("/", ""),
+            "interval": interval_map.get(interval, "60m"),
+            "limit": str(limit)
+        })
+        return self._parse_klines(data)
+
+    async def get_order_status(self, symbol, order_id):
+        data = await self._arequest("GET", "/api/v3/order",
+                                    {"symbol": symbol.replace("/", ""), "orderId": str(order_id)}, signed=True)
+        return self._parse_order_status(data)
+
+    async def get_my_trades(self, symbol, order_id):
+        data = await self._arequest("GET", "/api/v3/myTrades",
+                                    {"symbol": symbol.replace("/", ""), "orderId": str(order_id)}, signed=True)
+        return self._parse_trades(data)
+
+    async def get_open_orders(self, symbol=None):
+        params = {"symbol": symbol.replace("/", "")} if symbol else {}
+        return self._parse_open_orders(await self._arequest("GET", "/api/v3/openOrders", params, signed=True))
+
+    async def cancel_order(self, symbol, order_id):
+        return await self._arequest("DELETE", "/api/v3/order",
+                                    {"symbol": symbol.replace("/", ""), "orderId": str(order_id)}, signed=True)
+
+
+class AsyncGateIOSpot(AsyncExchange, GateIOSpot):
+    session_name = "gateio"
+
+    def __init__(self):
+        GateIOSpot.__init__(self)
+        self._init_async()
+
+    async def get_balance(self, asset):
+        return self._parse_balance(await self._arequest("GET", "/spot/accounts", signed=True), asset)
+
+    async def get_balances(self):
+        return self._parse_balances(await self._arequest("GET", "/spot/accounts", signed=True))
+
+    async def get_ticker(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return cached
+        data = await self._arequest("GET", "/spot/tickers", {"currency_pair": symbol.replace("/", "_")})
+        return self._parse_ticker(data)
+
+    async def get_price(self, symbol):
+        return float((await self.get_ticker(symbol))["bidPrice"])
+
+    async def get_klines(self, symbol, interval="1h", limit=50):
+        data = await self._arequest("GET", "/spot/candlesticks", {
+            "currency_pair": symbol.replace("/", "_"),
+            "interval": interval,
+            "limit": str(limit)
+        })
+        return self._parse_klines(data)
+
+    async def get_order_status(self, symbol, order_id):
+        data = await self._arequest("GET", f"/spot/orders/{order_id}",
+                                    {"currency_pair": symbol.replace("/", "_")}, signed=True)
+        return self._parse_order_status(data)
+
+    async def get_my_trades(self, symbol, order_id):
+        data = await self._arequest("GET", "/spot/my_trades",
+                                    {"currency_pair": symbol.replace("/", "_"), "order_id": str(order_id)}, signed=True)
+        return self._parse_trades(data)
+
+    async def get_open_orders(self, symbol=None):
+        params = {"currency_pair": symbol.replace("/", "_")} if symbol else {}
+        return self._parse_open_orders(await self._arequest("GET", "/spot/open_orders", params, signed=True))
+
+    async def cancel_order(self, symbol, order_id):
+        return await self._arequest("DELETE", f"/spot/orders/{order_id}",
+                                    {"currency_pair": symbol.replace("/", "_")}, signed=True)
+
+
+class AsyncKuCoinSpot(AsyncExchange, KuCoinSpot):
+    session_name = "kucoin"
+
+    def __init__(self):
+        KuCoinSpot.__init__(self)
+        self._init_async()
+
+    def _unwrap(self, data):
+        return data["data"]
+
+    async def get_balance(self, asset):
+        data = await self._arequest("GET", "/api/v1/accounts", {"currency": asset, "type": "trade"}, signed=True)
+        return self._parse_balance(data, asset)
+
+    async def get_balances(self):
+        return self._parse_balances(await self._arequest("GET", "/api/v1/accounts", {"type": "trade"}, signed=True))
+
+    async def get_ticker(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return cached
+        data = await self._arequest("GET", "/api/v1/market/orderbook/level1", {"symbol": symbol.replace("/", "-")})
+        return self._parse_ticker(data)
+
+    async def get_price(self, symbol):
+        return float((await self.get_ticker(symbol))["bidPrice"])
+
+    async def get_klines(self, symbol, interval="1h", limit=50):
+        interval_map = {"1h": "1hour", "4h": "4hour", "1d": "1day"}
+        now = int(time.time())
+        data = await self._arequest("GET", "/api/v1/market/candles", {
+            "symbol": symbol.replace("/", "-"),
+            "type": interval_map[interval],
+            "startAt": now - limit * 3600,
+            "endAt": now
+        })
+        return self._parse_klines(data)
+
+    async def get_order_status(self, symbol, order_id):
+        return self._parse_order_status(await self._arequest("GET", f"/api/v1/orders/{order_id}", signed=True))
+
+    async def get_my_trades(self, symbol, order_id):
+        return self._parse_trades(await self._arequest("GET", "/api/v1/fills", {"orderId": str(order_id)}, signed=True))
+
+    async def get_open_orders(self, symbol=None):
+        params = {"status": "active"}
+        if symbol:
+            params["symbol"] = symbol.replace("/", "-")
+        return self._parse_open_orders(await self._arequest("GET", "/api/v1/orders", params, signed=True))
+
+    async def cancel_order(self, symbol, order_id):
+        return await self._arequest("DELETE", f"/api/v1/orders/{order_id}", signed=True)
+
+
+class AsyncCoinExSpot(AsyncExchange, CoinExSpot):
+    session_name = "coinex"
+
+    def __init__(self):
+        CoinExSpot.__init__(self)
+        self._init_async()
+
+    async def get_balance(self, asset):
+        return self._parse_balance(await self._arequest("GET", "/balance", signed=True), asset)
+
+    async def get_balances(self):
+        return self._parse_balances(await self._arequest("GET", "/balance", signed=True))
+
+    async def get_ticker(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return cached
+        return self._parse_ticker(await self._arequest("GET", "/market/ticker", {"market": symbol.replace("/", "")}))
+
+    async def get_price(self, symbol):
+        cached = MARKET_DATA.ticker(self.name, symbol)
+        if cached:
+            return float(cached["bidPrice"])
+        return self._parse_price(await self._arequest("GET", "/market/ticker", {"market": symbol.replace("/", "")}))
+
+    async def get_klines(self, symbol, interval="1h", limit=50):
+        interval_map = {"1h": "60", "4h": "240", "1d": "86400"}
+        data = await self._arequest("GET", "/market/kline", {
+            "market": symbol.replace("/", ""),
+            "type": interval_map.get(interval, "60"),
+            "limit": str(limit)
+        })
+        return self._parse_klines(data)
+
+    async def get_order_status(self, symbol, order_id):
+        data = await self._arequest("GET", "/order/status",
+                                    {"market": symbol.replace("/", ""), "id": str(order_id)}, signed=True)
+        return self._parse_order_status(data)
+
+    async def get_my_trades(self, symbol, order_id):
+        data = await self._arequest("GET", "/order/deals",
+                                    {"market": symbol.replace("/", ""), "order_id": str(order_id)}, signed=True)
+        return self._parse_trades(data)
+
+    async def get_open_orders(self, symbol=None):
+        market = symbol.replace("/", "") if symbol else "BTCUSDT"
+        return self._parse_open_orders(await self._arequest("GET", "/order/pending", {"market": market}, signed=True))
+
+    async def cancel_order(self, symbol, order_id):
+        return await self._arequest("DELETE", "/order/pending",
+                                    {"market": symbol.replace("/", ""), "id": str(order_id)}, signed=True)
+
+    async def cancel_all_orders(self, symbols):
+        """Като CoinExSpot.cancel_all_orders: отворените поръчки, после по една отмяна на пазар."""
+        open_orders = await asyncio.gather(*(self.get_open_orders(symbol) for symbol in symbols),
+                                           return_exceptions=True)
+        pending = self._pending_ids(symbols, open_orders)
+        responses = await self._agather(self._cancel_all_requests([symbol for symbol, _ in pending]))
+        return [order_id for (_, ids), resp in zip(pending, responses) if succeeded(resp) for order_id in ids]
+
+
+ASYNC_EXCHANGES = [AsyncMEXCSpot, AsyncGateIOSpot, AsyncKuCoinSpot, AsyncCoinExSpot]
+
+
+def event_loop():
+    """Общ фонов event loop за SyncAdapter (стартира се при първо извикване)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-adapters", daemon=True).start()
+        return _loop
+
+
+def run(coro, timeout=None):
+    """Изпълнява корутина във фоновия loop и блокира до резултата."""
+    return asyncio.run_coroutine_threadsafe(coro, event_loop()).result(timeout)
+
+
+class SyncAdapter:
+    """
+    Синхронна обвивка на async адаптер: корутините се изпълняват във
+    фоновия loop, останалите атрибути (name, maker_fee, get_symbol_info...)
+    минават направо. Така main.py, scheduler и ORDER_TRACKER работят без промени.
+    """
+
+    def __init__(self, adapter):
+        self._adapter = adapter
+
+    def __getattr__(self, attr):
+        value = getattr(self._adapter, attr)
+        if not asyncio.iscoroutinefunction(value):
+            return value
+
+        def call(*args, **kwargs):
+            return run(value(*args, **kwargs))
+        return call
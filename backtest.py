@@ -0,0 +1,518 @@
+# backtest.py
+"""
+Бектест на стратегията покупка → продажба (run_round_trip в main.py)
+върху записани 1m свещи, без реални пари.
+
+- Изборът на символ минава през същата оценка като скенера
+  (indicators.evaluate_arrays върху последните KLINE_LIMIT часови свещи),
+  а размерът и цените — през utils.trade_size/order_prices.
+- Оценките за всички часове и символи се смятат наведнъж: плъзгащите се
+  прозорци са един NumPy пакет (B, 50, 6), без цикъл по свещи.
+- Поръчките се изпълняват от SimExchange — симулирана борса с интерфейса
+  на адаптерите: maker такса, закъснение до влизане в книгата и частични
+  изпълнения (най-много BACKTEST_FILL_RATIO от обема на всяка свещ).
+
+Историята се пази в data/klines/<борса>_<символ>_1m.npy; --download
+допълва файловете от борсата (може периодично, напр. от cron).
+
+    python backtest.py --exchange MEXC --days 90
+    python backtest.py --download --exchange MEXC
+"""
+import argparse
+import heapq
+import math
+import os
+
+import numpy as np
+
+from config import (
+    TRADE_SYMBOLS, PROFIT_TARGET, RISK_PERCENT, ORDER_TRACK_TIMEOUT, SCHEDULER_MAX_WORKERS_PER_EXCHANGE,
+    BACKTEST_DATA_DIR, BACKTEST_BALANCE, BACKTEST_MAKER_FEE, BACKTEST_LATENCY, BACKTEST_FILL_RATIO, BACKTEST_SPREAD
+)
+from indicators import klines_to_array, evaluate_arrays, OPEN, HIGH, LOW, CLOSE, VOLUME
+from kline_store import INTERVAL_SECONDS
+from scanner import KLINE_INTERVAL, KLINE_LIMIT
+from utils import trade_size, order_prices
+
+CANDLE = 60                                   # секунди в 1m свещ
+SCORE_INTERVAL = INTERVAL_SECONDS[KLINE_INTERVAL]
+FILL_CHUNK = 1440                             # свещи (ден) в първата стъпка на търсене на изпълнение
+
+DEFAULT_PARAMS = {
+    "profit_target": PROFIT_TARGET,
+    "risk_percent": RISK_PERCENT,
+    "adx_threshold": 20,
+    "rsi_neutral_range": (35, 65),
+    "min_avg_volume_usdt": 5000,
+}
+
+
+# --- ДАННИ ---
+
+def candles_path(exchange_name, symbol, interval="1m", data_dir=BACKTEST_DATA_DIR):
+    return os.path.join(data_dir, f"{exchange_name}_{symbol.replace('/', '')}_{interval}.npy")
+
+
+def _normalize(arr):
+    """Време в секунди, сортирани редове, при повторение печели последният."""
+    arr = np.array(arr, dtype=float)
+    if len(arr) and arr[:, 0].max() > 1e11:
+        arr[:, 0] /= 1000
+    rev = arr[::-1]
+    _, idx = np.unique(rev[:, 0], return_index=True)
+    return rev[idx]
+
+
+def save_candles(klines, path):
+    """Добавя свещи към файла (по-новата версия на една свещ печели). Връща броя редове."""
+    new = klines_to_array(klines)
+    if new is None or not len(new):
+        return 0
+    if os.path.exists(path):
+        new = np.concatenate([np.load(path), _normalize(new)])
+    merged = _normalize(new)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp.npy"
+    np.save(tmp, merged)
+    os.replace(tmp, path)
+    return len(merged)
+
+
+def load_candles(path, mmap=True):
+    """1m свещи (N, 6) от .npy (memory-map, без копиране) или .csv."""
+    if path.endswith(".csv"):
+        return _normalize(np.loadtxt(path, delimiter=",", ndmin=2)[:, :6])
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def load_history(exchange_name, symbols=TRADE_SYMBOLS, days=None, data_dir=BACKTEST_DATA_DIR):
+    """{символ: 1m свещи} за наличните файлове; days = само последните N дни."""
+    candles = {}
+    for symbol in symbols:
+        path = candles_path(exchange_name, symbol, data_dir=data_dir)
+        if not os.path.exists(path):
+            continue
+        arr = load_candles(path)
+        if days and len(arr):
+            arr = arr[np.searchsorted(arr[:, 0], arr[-1, 0] - days * 86400):]
+        candles[symbol] = arr
+    return candles
+
+
+def download(exchange, symbols=TRADE_SYMBOLS, limit=1000, data_dir=BACKTEST_DATA_DIR):
+    """Допълва записаната история с последните limit 1m свещи от борсата."""
+    for symbol in symbols:
+        rows = save_candles(exchange.get_klines(symbol, "1m", limit), candles_path(exchange.name, symbol, data_dir=data_dir))
+        print(f"💾 {exchange.name} | {symbol}: {rows} свещи")
+
+
+def resample(candles, seconds):
+    """1m свещи → свещи от seconds секунди (векторно, с reduceat)."""
+    bucket = (np.asarray(candles[:, 0]) // seconds).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(candles)] - 1
+    out = np.empty((len(starts), 6))
+    out[:, 0] = bucket[starts] * seconds
+    out[:, OPEN] = candles[starts, OPEN]
+    out[:, HIGH] = np.maximum.reduceat(candles[:, HIGH], starts)
+    out[:, LOW] = np.minimum.reduceat(candles[:, LOW], starts)
+    out[:, CLOSE] = candles[ends, CLOSE]
+    out[:, VOLUME] = np.add.reduceat(candles[:, VOLUME], starts)
+    return out
+
+
+# --- ОЦЕНКА ---
+
+def score_series(hourly, params=DEFAULT_PARAMS):
+    """
+    Оценката на скенера (scanner.score_symbols) след всяка затворена часова
+    свещ: (моменти на решение, оценки), NaN = символът не е подходящ.
+    """
+    if len(hourly) < KLINE_LIMIT:
+        return np.empty(0), np.empty(0)
+    windows = np.lib.stride_tricks.sliding_window_view(hourly, (KLINE_LIMIT, 6))[:, 0]
+    values = evaluate_arrays(windows, params["adx_threshold"], params["rsi_neutral_range"],
+                             params["min_avg_volume_usdt"])
+    scores = np.where(values["safe"] & values["trending"], values["volatility"], np.nan)
+    return hourly[KLINE_LIMIT - 1:, 0] + SCORE_INTERVAL, scores
+
+
+def score_matrix(candles, params=DEFAULT_PARAMS):
+    """Общ времеви ред за всички символи: (моменти (T,), оценки (T, символи))."""
+    series = [score_series(resample(arr, SCORE_INTERVAL), params) for arr in candles.values()]
+    times = np.unique(np.concatenate([t for t, _ in series])) if series else np.empty(0)
+    scores = np.full((len(times), len(series)), np.nan)
+    for j, (t, s) in enumerate(series):
+        scores[np.searchsorted(times, t), j] = s
+    return times, scores
+
+
+# --- СИМУЛИРАНА БОРСА ---
+
+def fill_limit(candles, start, end, side, price, qty, fill_ratio):
+    """
+    Изпълнение на лимитна поръчка в свещите [start, end): всяка свещ, която
+    достига цената, дава до fill_ratio от обема си. → (количество, индекс на
+    свещта, в която поръчката е изпълнена изцяло, или None).
+    """
+    seg = candles[start:end]
+    if not len(seg) or qty <= 0:
+        return 0.0, None
+    touched = seg[:, LOW] <= price if side == "BUY" else seg[:, HIGH] >= price
+    cum = np.cumsum(np.where(touched, seg[:, VOLUME] * fill_ratio, 0.0))
+    k = int(np.searchsorted(cum, qty))
+    if k < len(cum):
+        return qty, start + k
+    return float(cum[-1]), None
+
+
+class SimExchange:
+    """
+    Симулирана борса върху 1m свещи с интерфейса на адаптерите (цени, свещи,
+    поръчки, сделки, баланси). Часовникът се движи от бектеста (set_time).
+    Лимитна поръчка влиза в книгата latency секунди след подаването и се
+    изпълнява по своята цена; таксата (maker) се плаща в USDT.
+    """
+
+    def __init__(self, candles, name="SIM", balance=BACKTEST_BALANCE, maker_fee=BACKTEST_MAKER_FEE,
+                 latency=BACKTEST_LATENCY, fill_ratio=BACKTEST_FILL_RATIO, spread=BACKTEST_SPREAD):
+        self.name = name
+        self.maker_fee = maker_fee
+        self.latency = latency
+        self.fill_ratio = fill_ratio
+        self.spread = spread
+        self.candles = {symbol: np.asarray(arr) for symbol, arr in candles.items()}
+        self._ts = {symbol: np.ascontiguousarray(arr[:, 0]) for symbol, arr in candles.items()}
+        self.balances = {"USDT": float(balance)}
+        self.orders = {}
+        self._open = set()
+        self.fees = 0.0
+        self.now = 0.0
+        self._next_id = 1
+
+    def set_time(self, ts):
+        """
+        Мести часовника и отчита поръчките, изпълнени изцяло до ts.
+        Частичните изпълнения се отчитат при проверка или отмяна на поръчката.
+        """
+        self.now = ts
+        for order_id in list(self._open):
+            order = self.orders[order_id]
+            if order["due"] is not None and order["due"] <= ts:
+                self._match(order, ts)
+
+    def _closed(self, symbol, until):
+        """Брой свещи, затворени до момента until."""
+        return int(np.searchsorted(self._ts[symbol], until - CANDLE, side="right"))
+
+    def _last(self, symbol):
+        idx = self._closed(symbol, self.now) - 1
+        return self.candles[symbol][idx] if idx >= 0 else None
+
+    # пазарни данни
+    def is_active(self):
+        return True
+
+    def get_price(self, symbol):
+        row = self._last(symbol)
+        return float(row[CLOSE]) if row is not None else 0.0
+
+    def get_ticker(self, symbol):
+        price = self.get_price(symbol)
+        return {"bidPrice": price * (1 - self.spread / 2), "askPrice": price * (1 + self.spread / 2)}
+
+    def get_klines(self, symbol, interval="1h", limit=50):
+        step = INTERVAL_SECONDS.get(interval, CANDLE) if interval != "1m" else CANDLE
+        end = self._closed(symbol, self.now)
+        rows = self.candles[symbol][max(end - limit * step // CANDLE, 0):end]
+        if step != CANDLE and len(rows):
+            rows = resample(rows, step)
+        return rows[-limit:].tolist()
+
+    def get_symbol_info(self, symbol):
+        """Точност според големината на цената (BTC: 1 знак за цена, 6 за количество)."""
+        magnitude = int(math.floor(math.log10(max(self.get_price(symbol), 1e-12))))
+        quantity_precision = max(magnitude + 2, 0)
+        return {
+            "price_precision": max(5 - magnitude, 0),
+            "quantity_precision": quantity_precision,
+            "min_qty": 10 ** -quantity_precision
+        }
+
+    def get_balance(self, asset="USDT"):
+        return self.balances.get(asset, 0.0)
+
+    def get_balances(self):
+        return dict(self.balances)
+
+    # поръчки
+    def place_order(self, symbol, side, price, qty):
+        asset = symbol.split("/")[0]
+        if side == "BUY":
+            locked = qty * price * (1 + self.maker_fee)
+            if locked > self.balances["USDT"] + 1e-9:
+                return {"code": -1, "msg": "insufficient USDT"}
+            self.balances["USDT"] -= locked
+        else:
+            if qty > self.balances.get(asset, 0.0) + 1e-12:
+                return {"code": -1, "msg": f"insufficient {asset}"}
+            self.balances[asset] -= qty
+        order_id = str(self._next_id)
+        self._next_id += 1
+        start = int(np.searchsorted(self._ts[symbol], self.now + self.latency))
+        self.orders[order_id] = {
+            "id": order_id, "symbol": symbol, "side": side, "price": price, "qty": qty, "filled": 0.0,
+            "status": "NEW", "next": start, "filled_at": None, "placed": self.now
+        }
+        self._open.add(order_id)
+        self.orders[order_id]["due"] = self._due(self.orders[order_id])
+        return {"orderId": order_id, "code": 0}
+
+    def _match(self, order, until):
+        """Изпълнява поръчката по свещите, затворени до until."""
+        if order["status"] not in ("NEW", "PARTIALLY_FILLED"):
+            return
+        end = self._closed(order["symbol"], until)
+        if end <= order["next"]:
+            return
+        filled, k = fill_limit(self.candles[order["symbol"]], order["next"], end, order["side"],
+                               order["price"], order["qty"] - order["filled"], self.fill_ratio)
+        order["next"] = end if k is None else k + 1
+        if filled <= 0:
+            return
+        self._settle(order, filled)
+        if k is not None:
+            order["status"] = "FILLED"
+            self._open.discard(order["id"])
+            order["filled_at"] = float(self._ts[order["symbol"]][k]) + CANDLE
+        else:
+            order["status"] = "PARTIALLY_FILLED"
+
+    def _settle(self, order, qty):
+        asset = order["symbol"].split("/")[0]
+        quote = qty * order["price"]
+        fee = quote * self.maker_fee
+        order["filled"] += qty
+        self.fees += fee
+        if order["side"] == "BUY":
+            self.balances[asset] = self.balances.get(asset, 0.0) + qty
+        else:
+            self.balances["USDT"] += quote - fee
+
+    def _due(self, order):
+        """Кога поръчката ще е изпълнена изцяло или None (смята се веднъж, при подаване)."""
+        candles, ts = self.candles[order["symbol"]], self._ts[order["symbol"]]
+        start, end, remaining, chunk = order["next"], len(ts), order["qty"], FILL_CHUNK
+        # Търсим на растящи парчета — обикновено изпълнението е близо
+        while start < end:
+            stop = min(start + chunk, end)
+            filled, k = fill_limit(candles, start, stop, order["side"], order["price"], remaining, self.fill_ratio)
+            if k is not None:
+                return float(ts[k]) + CANDLE
+            remaining -= filled
+            start, chunk = stop, chunk * 4
+        return None
+
+    def fill_time(self, order_id, deadline):
+        """Моментът на пълното изпълнение, ако е до deadline, иначе None."""
+        order = self.orders[order_id]
+        due = order["due"] if order["status"] != "CANCELED" else None
+        return due if due is not None and due <= deadline else None
+
+    def get_order_status(self, symbol, order_id):
+        order = self.orders[order_id]
+        self._match(order, self.now)
+        return {
+            "orderId": order_id, "symbol": symbol, "side": order["side"], "status": order["status"],
+            "price": order["price"], "origQty": order["qty"], "executedQty": order["filled"]
+        }
+
+    def cancel_order(self, symbol, order_id):
+        order = self.orders[order_id]
+        self._match(order, self.now)
+        if order["status"] in ("NEW", "PARTIALLY_FILLED"):
+            rest = order["qty"] - order["filled"]
+            if order["side"] == "BUY":
+                self.balances["USDT"] += rest * order["price"] * (1 + self.maker_fee)
+            else:
+                asset = symbol.split("/")[0]
+                self.balances[asset] = self.balances.get(asset, 0.0) + rest
+            order["status"] = "CANCELED"
+            self._open.discard(order_id)
+        return {"orderId": order_id, "status": order["status"]}
+
+    def get_open_orders(self, symbol=None):
+        return [dict(self.orders[oid], orderId=oid) for oid in self._open
+                if symbol in (None, self.orders[oid]["symbol"])]
+
+    def get_my_trades(self, symbol, order_id):
+        order = self.orders[order_id]
+        self._match(order, self.now)
+        if order["filled"] <= 0:
+            return []
+        quote = order["filled"] * order["price"]
+        return [{"qty": order["filled"], "quoteQty": quote, "price": order["price"],
+                 "commission": quote * self.maker_fee}]
+
+    def equity(self):
+        """USDT + блокираното в отворени поръчки + монетите по последната цена."""
+        total = self.balances["USDT"]
+        for order in map(self.orders.get, self._open):
+            rest = order["qty"] - order["filled"]
+            if order["side"] == "BUY":
+                total += rest * order["price"] * (1 + self.maker_fee)
+            else:
+                total += rest * self.get_price(order["symbol"])
+        for symbol in self.candles:
+            total += self.balances.get(symbol.split("/")[0], 0.0) * self.get_price(symbol)
+        return total
+
+
+# --- СТРАТЕГИЯ ---
+
+def backtest(candles, params=None, balance=BACKTEST_BALANCE, max_workers=SCHEDULER_MAX_WORKERS_PER_EXCHANGE,
+             order_timeout=ORDER_TRACK_TIMEOUT, score_table=None, **sim_options):
+    """
+    Пуска run_round_trip логиката върху {символ: 1m свещи} за една борса.
+    Всеки от max_workers работници (както в scheduler.Scheduler) взима най-добре
+    оценения свободен символ, купува малко под bid, чака до order_timeout,
+    продава с марж и започва отначало след час (след 10 минути при неуспех).
+    Частично изпълнена покупка се отменя, без да се продаде (както в main).
+    score_table = готов резултат от score_matrix (зависи само от индикаторните параметри).
+    Връща dict с резултата (виж summarize).
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    symbols = list(candles)
+    ex = SimExchange(candles, balance=balance, **sim_options)
+    times, scores = score_table if score_table is not None else score_matrix(candles, params)
+    if not len(times):
+        return summarize(ex, balance, [], 0.0)
+    end_time = max(float(arr[-1, 0]) for arr in candles.values() if len(arr)) + CANDLE
+
+    trades = []
+    held = {}
+    events = [(float(times[0]), slot, "start", None) for slot in range(max_workers)]
+    heapq.heapify(events)
+
+    def schedule(at, slot, stage, data=None):
+        if at < end_time:
+            heapq.heappush(events, (at, slot, stage, data))
+
+    while events:
+        now, slot, stage, data = heapq.heappop(events)
+        ex.set_time(now)
+
+        if stage == "start":
+            held.pop(slot, None)
+            row = int(np.searchsorted(times, now, side="right")) - 1
+            taken = set(held.values())
+            order = [j for j in np.argsort(-np.nan_to_num(scores[row], nan=-np.inf))
+                     if not np.isnan(scores[row, j]) and symbols[j] not in taken]
+            if not order:
+                if row + 1 < len(times):
+                    schedule(float(times[row + 1]), slot, "start")
+                continue
+            symbol = symbols[order[0]]
+            held[slot] = symbol
+            info = ex.get_symbol_info(symbol)
+            allocation = ex.get_balance("USDT") / max_workers
+            trade_usdt, qty = trade_size(allocation, ex.get_price(symbol), info["quantity_precision"],
+                                         params["risk_percent"])
+            ticker = ex.get_ticker(symbol)
+            buy_price, sell_price = order_prices(ticker["bidPrice"], ticker["askPrice"], trade_usdt,
+                                                 info["price_precision"], ex.maker_fee, params["profit_target"])
+            resp = ex.place_order(symbol, "BUY", buy_price, qty) if qty >= info["min_qty"] and 0 < buy_price < sell_price else None
+            if not resp or resp.get("code", 0) != 0:
+                schedule(now + 600, slot, "start")
+                continue
+            done = ex.fill_time(resp["orderId"], now + order_timeout)
+            schedule(done if done is not None else now + order_timeout, slot, "bought",
+                     (symbol, resp["orderId"], sell_price, info))
+
+        elif stage == "bought":
+            symbol, buy_id, sell_price, info = data
+            status = ex.get_order_status(symbol, buy_id)
+            if status["status"] != "FILLED":
+                ex.cancel_order(symbol, buy_id)
+                schedule(now + 600, slot, "start")
+                continue
+            sell_qty = round(status["executedQty"], info["quantity_precision"])
+            sell_qty = min(sell_qty, ex.get_balance(symbol.split("/")[0]))
+            resp = ex.place_order(symbol, "SELL", sell_price, sell_qty)
+            if resp.get("code", 0) != 0:
+                schedule(now + 600, slot, "start")
+                continue
+            sell_id = resp["orderId"]
+            # Продажбата остава в книгата и след изтичане на изчакването (както в main)
+            done = ex.fill_time(sell_id, end_time)
+            buy = ex.orders[buy_id]
+            if done is not None:
+                cost = buy["filled"] * buy["price"] * (1 + ex.maker_fee)
+                revenue = sell_qty * sell_price * (1 - ex.maker_fee)
+                trades.append({"symbol": symbol, "buy_time": now, "sell_time": done, "qty": sell_qty,
+                               "buy_price": buy["price"], "sell_price": sell_price, "profit": revenue - cost})
+            wait_end = done if done is not None and done < now + order_timeout else now + order_timeout
+            schedule(wait_end + 3600, slot, "start")
+
+    ex.set_time(end_time)
+    return summarize(ex, balance, trades, end_time - float(times[0]))
+
+
+def summarize(ex, balance, trades, duration):
+    """Крайна стойност, печалба, сделки, дял печеливши, макс. просадка (по реализираната печалба)."""
+    trades.sort(key=lambda t: t["sell_time"])
+    profits = np.array([t["profit"] for t in trades])
+    curve = balance + np.cumsum(profits) if len(profits) else np.array([balance])
+    peak = np.maximum.accumulate(np.r_[balance, curve])
+    drawdown = float(((peak[1:] - curve) / peak[1:]).max()) if len(profits) else 0.0
+    equity = ex.equity()
+    return {
+        "equity": equity,
+        "profit": equity - balance,
+        "return_pct": (equity - balance) / balance * 100,
+        "realized": float(profits.sum()) if len(profits) else 0.0,
+        "trades": len(trades),
+        "win_rate": float((profits > 0).mean()) if len(profits) else 0.0,
+        "max_drawdown": drawdown,
+        "fees": ex.fees,
+        "open_orders": len(ex.get_open_orders()),
+        "days": duration / 86400,
+        "trade_log": trades,
+    }
+
+
+def _exchange(name):
+    from adapters import MEXCSpot, GateIOSpot, KuCoinSpot, CoinExSpot
+    for cls in (MEXCSpot, GateIOSpot, KuCoinSpot, CoinExSpot):
+        exchange = cls()
+        if exchange.name == name:
+            return exchange
+    raise SystemExit(f"❌ Непозната борса: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бектест на стратегията покупка → продажба")
+    parser.add_argument("--exchange", default="MEXC")
+    parser.add_argument("--symbols", nargs="*", default=TRADE_SYMBOLS)
+    parser.add_argument("--days", type=float, default=None, help="само последните N дни")
+    parser.add_argument("--balance", type=float, default=BACKTEST_BALANCE)
+    parser.add_argument("--data-dir", default=BACKTEST_DATA_DIR)
+    parser.add_argument("--download", action="store_true", help="допълни историята от борсата и излез")
+    args = parser.parse_args()
+
+    if args.download:
+        download(_exchange(args.exchange), args.symbols, data_dir=args.data_dir)
+        return
+
+    candles = load_history(args.exchange, args.symbols, args.days, args.data_dir)
+    if not candles:
+        raise SystemExit(f"❌ Няма свещи в {args.data_dir} за {args.exchange} (пусни с --download)")
+    result = backtest(candles, balance=args.balance)
+    print(f"📊 {args.exchange} | {', '.join(candles)} | {result['days']:.1f} дни")
+    print(f"💰 Печалба: {result['profit']:.4f} USDT ({result['return_pct']:.2f}%), реализирана {result['realized']:.4f}")
+    print(f"🔁 Сделки: {result['trades']} | печеливши {result['win_rate']:.0%} | "
+          f"просадка {result['max_drawdown']:.2%} | такси {result['fees']:.4f} | отворени поръчки {result['open_orders']}")
+
+
+if __name__ == "__main__":
+    main()
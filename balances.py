@@ -0,0 +1,66 @@
+# balances.py
+"""
+Общ моментен снимък на балансите: една подписана заявка на борса връща
+всички активи, резултатът се пази BALANCE_TTL секунди и се ползва от
+отчетите, P&L и избора на борса. Изпълнение на наша поръчка (или нова
+поръчка, която блокира средства) прави снимката на борсата невалидна.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import BALANCE_TTL, SCAN_MAX_WORKERS
+
+
+class BalanceSnapshot:
+    def __init__(self, ttl=BALANCE_TTL):
+        self.ttl = ttl
+        self._balances = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _exchange_lock(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, exchange, force=False):
+        """{актив: свободно количество} за борсата (от кеша, ако е пресен)."""
+        name = exchange.name
+        # Паралелните извиквания за една борса чакат една обща заявка
+        with self._exchange_lock(name):
+            entry = self._balances.get(name)
+            if not force and entry is not None and time.time() - entry[1] < self.ttl:
+                return entry[0]
+            balances = exchange.get_balances()
+            self._balances[name] = (balances, time.time())
+            return balances
+
+    def balance(self, exchange, asset="USDT"):
+        return self.get(exchange).get(asset, 0.0)
+
+    def invalidate(self, exchange_name=None):
+        """Следващото четене за борсата (или за всички) тегли наново."""
+        with self._lock:
+            if exchange_name is None:
+                self._balances.clear()
+            else:
+                self._balances.pop(exchange_name, None)
+
+    def snapshot(self, exchanges, max_workers=SCAN_MAX_WORKERS, on_error=None):
+        """
+        Балансите на всички борси паралелно: {име на борса: {актив: количество}}.
+        Борса с грешка липсва в резултата (on_error(борса, грешка) при нужда).
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {ex: pool.submit(self.get, ex) for ex in exchanges}
+        result = {}
+        for ex, future in futures.items():
+            try:
+                result[ex.name] = future.result()
+            except Exception as e:
+                if on_error:
+                    on_error(ex, e)
+        return result
+
+
+BALANCES = BalanceSnapshot()
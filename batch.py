@@ -0,0 +1,69 @@
+# batch.py
+"""
+Общи помощници за пакетните методи на адаптерите (place_orders,
+cancel_orders, cancel_all_orders): разделяне на пакети според лимита на
+борсата и паралелно изпращане там, където борсата няма пакетен ендпойнт.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from config import HTTP_POOL_SIZE
+
+
+def fan_out(func, items, max_workers=HTTP_POOL_SIZE):
+    """
+    func(*item) паралелно за всеки елемент (до толкова едновременно, колкото
+    връзки има пулът на борсата). Резултатът — или изключението — е на
+    мястото на елемента.
+    """
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(items), max_workers)) as pool:
+        futures = [pool.submit(func, *item) for item in items]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def batches(orders, size, per_symbol=True):
+    """[(символ, [индекси в orders])] — пакети до size поръчки; per_symbol=False смесва символите."""
+    groups = {}
+    for i, order in enumerate(orders):
+        groups.setdefault(order[0] if per_symbol else None, []).append(i)
+    return [(key, idx[k:k + size]) for key, idx in groups.items() for k in range(0, len(idx), size)]
+
+
+def scatter(count, groups, responses, parse):
+    """
+    Резултатите на count поръчки подред от пакетите [(индекси, заявка)] и
+    отговорите им; parse(отговор, брой) дава резултат за всяка поръчка в пакета.
+    """
+    results = [None] * count
+    for (idx, _), resp in zip(groups, responses):
+        for i, result in zip(idx, parse(resp, len(idx))):
+            results[i] = result
+    return results
+
+
+def collect(groups, responses, parse):
+    """Отменените ID от пакетите [(ID-та, заявка)]; parse(отговор, ID-та) връща успешните."""
+    return [order_id for (ids, _), resp in zip(groups, responses) for order_id in parse(resp, ids)]
+
+
+def failed(error):
+    """Отговор за неуспешна поръчка във формата, който main и grid разпознават (code ≠ 0)."""
+    if isinstance(error, dict):
+        return error
+    return {"code": -1, "msg": str(error)}
+
+
+def succeeded(resp):
+    """Дали отговорът на единична заявка е успех (без изключение и без код за грешка)."""
+    if isinstance(resp, Exception):
+        return False
+    if isinstance(resp, dict):
+        return resp.get("code", 0) in (0, "200000") and "label" not in resp
+    return resp is not None
@@ -0,0 +1,273 @@
+# bench.py
+"""
+Бенчмаркове на решаващата верига и адаптерите: ops/s, p50/p99 латентност
+и пикова памет (tracemalloc) за всеки тест.
+
+- klines_to_dataframe, is_safe_market, is_market_trending — върху 50 свещи;
+- sign/<борса> — поръчка по общия път (_prepare + JSON), sign_fast/<борса> —
+  същата заявка от _prepare_order (готов ключ и шаблони);
+- request/<борса> — place_order до записан отговор (подпис, сериализация, JSON);
+- select_best_symbol — класиране на символите на една борса (rank_symbols);
+- loop — една итерация на main(): сканиране на всички борси, избор,
+  размер и цени на сделката, подготвена поръчка.
+
+Мрежа няма: отговорите се записват веднъж от mock_exchange.py (фиксиран
+seed) и после се връщат от паметта, така че се мери само нашият код.
+С --save резултатите стават база; без него всеки тест се сравнява с
+базата и при влошаване на p50 или паметта над BENCH_TOLERANCE изходът е 1.
+
+    python bench.py                 # сравнение с logs/bench_baseline.json
+    python bench.py --save          # нова база
+    python bench.py --only sign request     # цена на една поръчка
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+
+import config
+from config import TRADE_SYMBOLS, BENCH_BASELINE, BENCH_SECONDS, BENCH_TOLERANCE
+
+# Параметри, които се менят при всяка заявка — не участват в ключа на записа
+VOLATILE_PARAMS = {"timestamp", "signature", "tonce", "access_id", "startAt", "endAt", "clientOid", "limit"}
+
+
+def _key(method, url):
+    parts = urlsplit(url)
+    query = tuple(sorted((k, v) for k, v in parse_qsl(parts.query) if k not in VOLATILE_PARAMS))
+    return method.upper(), parts.path, query
+
+
+class RecordingSession:
+    """Пропуска заявките към истинската сесия и пази отговорите им."""
+
+    def __init__(self, session, records):
+        self.session = session
+        self.name = session.name
+        self.records = records
+
+    def request(self, method, url, *args, **kwargs):
+        resp = self.session.request(method, url, *args, **kwargs)
+        self.records[_key(method, url)] = (resp.status_code, resp.content)
+        return resp
+
+    def timeout_for(self, endpoint):
+        return self.session.timeout_for(endpoint)
+
+
+class ReplaySession:
+    """Връща записаните отговори (по метод, път и стабилните параметри)."""
+
+    def __init__(self, name, records, timeouts):
+        self.name = name
+        self.records = records
+        self.timeouts = timeouts
+        self.by_path = {(method, path): value for (method, path, _), value in records.items()}
+
+    def request(self, method, url, *args, **kwargs):
+        key = _key(method, url)
+        status, content = self.records.get(key) or self.by_path[key[:2]]
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = content
+        resp.url = url
+        return resp
+
+    def timeout_for(self, endpoint):
+        return self.timeouts.get(endpoint, self.timeouts["default"])
+
+
+def replay_exchanges(seed=0):
+    """
+    Четирите адаптера върху записани отговори. Записът е от mock борсите:
+    всичко, което ползва една итерация на цикъла + поръчка, статус и сделки.
+    """
+    from mock_exchange import start_mock_exchanges, rest_urls
+    servers = start_mock_exchanges(seed=seed, tick_interval=3600)
+    config.REST_URLS.update(rest_urls(servers))
+    from adapters import MEXCSpot, GateIOSpot, KuCoinSpot, CoinExSpot
+    from symbol_cache import SymbolInfoCache
+    exchanges = [MEXCSpot(), GateIOSpot(), KuCoinSpot(), CoinExSpot()]
+    # Символите на mock борсите не бива да влизат в logs/symbol_cache.json на бота
+    symbol_cache = SymbolInfoCache(path=None)
+    try:
+        for ex in exchanges:
+            ex.symbol_cache = symbol_cache
+            records = {}
+            ex.session = RecordingSession(ex.session, records)
+            ex.get_balances()
+            ex.load_symbols_info()
+            ex.place_order(TRADE_SYMBOLS[0], "BUY", 60000.1, 0.001)
+            for symbol in TRADE_SYMBOLS:
+                ex.get_klines(symbol, "1h", 50)
+                ticker = ex.get_ticker(symbol)
+            resp = ex.place_order(TRADE_SYMBOLS[-1], "BUY", float(ticker["bidPrice"]), 10)
+            order_id = resp.get("orderId") or resp.get("id") or (resp.get("data") or {}).get("id")
+            ex.get_order_status(TRADE_SYMBOLS[-1], order_id)
+            ex.get_my_trades(TRADE_SYMBOLS[-1], order_id)
+            ex.get_open_orders(TRADE_SYMBOLS[-1])
+            ex.session = ReplaySession(ex.session.name, records, ex.session.session.timeouts)
+    finally:
+        for server in servers.values():
+            server.stop()
+    return exchanges
+
+
+def measure(func, seconds=BENCH_SECONDS, min_runs=5):
+    """ops/s, p50/p99 (мс) от поредни извиквания + пикова памет (KB) от едно отделно."""
+    func()  # загряване (кешове, импорти)
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while len(samples) < min_runs or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    # tracemalloc забавя всяко заделяне — паметта се мери отделно от времето
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    samples.sort()
+    return {
+        "ops": len(samples) / sum(samples),
+        "p50": samples[len(samples) // 2] * 1000,
+        "p99": samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000,
+        "peak_kb": peak / 1024,
+        "runs": len(samples),
+    }
+
+
+def generic_order(ex, symbol, side, price, qty):
+    """
+    Поръчката по общия път (dict → сортиране/urlencode → _prepare → JSON),
+    както беше place_order преди _prepare_order — за сравнение с бързия път.
+    """
+    if ex.name == "Gate.io":
+        body = {"currency_pair": symbol.replace("/", "_"), "type": "limit", "account": "spot",
+                "side": side.lower(), "price": str(price), "amount": str(qty)}
+        url, headers, _ = ex._prepare("POST", ex.order_endpoint, None, True, body)
+    elif ex.name == "KuCoin":
+        body = {"clientOid": str(int(time.time() * 1000)), "side": side.lower(), "symbol": symbol.replace("/", "-"),
+                "type": "limit", "price": str(price), "size": str(qty)}
+        url, headers, body = ex._prepare("POST", ex.order_endpoint, body, True)
+    elif ex.name == "CoinEx":
+        body = {"market": symbol.replace("/", ""), "type": "limit", "side": side.lower(),
+                "amount": str(qty), "price": str(price)}
+        url, headers, body = ex._prepare("POST", ex.order_endpoint, body, True)
+    else:
+        params = {"symbol": symbol.replace("/", ""), "side": side.upper(), "type": "LIMIT", "timeInForce": "GTC",
+                  "quantity": str(qty), "price": str(price)}
+        url, headers, body = ex._prepare("POST", ex.order_endpoint, params, True)
+    # requests сериализира json= тялото при изпращане — част от цената на общия път
+    return url, headers, json.dumps(body).encode("utf-8") if body is not None else None
+
+
+def benchmarks(exchanges):
+    """{име: функция без аргументи} — всички тестове."""
+    from utils import klines_to_dataframe, is_safe_market, is_market_trending, trade_size, order_prices
+    from balances import BALANCES
+    from scanner import scan_markets, rank_symbols
+
+    klines = exchanges[0].get_klines(TRADE_SYMBOLS[0], "1h", 50)
+    suite = {
+        "is_safe_market": lambda: is_safe_market(klines),
+        "is_market_trending": lambda: is_market_trending(klines),
+    }
+    try:
+        import pandas  # noqa: F401 — незадължителна зависимост
+        suite["klines_to_dataframe"] = lambda: klines_to_dataframe(klines)
+    except ImportError:
+        print("ℹ️ pandas не е инсталиран — klines_to_dataframe се пропуска.")
+
+    symbol = TRADE_SYMBOLS[0]
+    for ex in exchanges:
+        suite[f"sign/{ex.name}"] = lambda ex=ex: generic_order(ex, symbol, "BUY", 60000.1, 0.001)
+        suite[f"sign_fast/{ex.name}"] = lambda ex=ex: ex._prepare_order(symbol, "BUY", 60000.1, 0.001)
+        suite[f"request/{ex.name}"] = lambda ex=ex: ex.place_order(symbol, "BUY", 60000.1, 0.001)
+
+    exchange = exchanges[0]
+    suite["select_best_symbol"] = lambda: rank_symbols(exchange, TRADE_SYMBOLS)[:1]
+
+    def loop():
+        BALANCES.invalidate()
+        funded, candidates = scan_markets(exchanges, TRADE_SYMBOLS)
+        if not candidates:
+            return
+        best = candidates[0]
+        ex, symbol = best["exchange"], best["symbol"]
+        info = ex.get_symbol_info(symbol)
+        trade_usdt, qty = trade_size(best["balance"], best["bid"], info["quantity_precision"])
+        buy_price, _ = order_prices(best["bid"], best["ask"], trade_usdt, info["price_precision"], ex.maker_fee)
+        ex._prepare_order(symbol, "BUY", buy_price, qty)
+    suite["loop"] = loop
+    return suite
+
+
+def compare(results, baseline, tolerance=BENCH_TOLERANCE):
+    """Списък с влошаванията: (тест, метрика, база, сега)."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("p50", "peak_kb"):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append((name, metric, base[metric], result[metric]))
+    return regressions
+
+
+def print_table(results, baseline):
+    print(f"{'тест':<22}{'ops/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'памет KB':>11}{'Δ p50':>9}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        delta = f"{(r['p50'] / base['p50'] - 1) * 100:+.0f}%" if base and base["p50"] else ""
+        print(f"{name:<22}{r['ops']:>11.1f}{r['p50']:>10.3f}{r['p99']:>10.3f}{r['peak_kb']:>11.1f}{delta:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмаркове на решаващата верига и адаптерите")
+    parser.add_argument("--only", nargs="*", default=None, help="само тестове, започващи с тези имена")
+    parser.add_argument("--seconds", type=float, default=BENCH_SECONDS)
+    parser.add_argument("--baseline", default=BENCH_BASELINE)
+    parser.add_argument("--save", action="store_true", help="запиши резултатите като нова база")
+    parser.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE)
+    args = parser.parse_args()
+
+    suite = benchmarks(replay_exchanges())
+    if args.only:
+        suite = {name: f for name, f in suite.items() if name.startswith(tuple(args.only))}
+
+    results = {}
+    for name, func in suite.items():
+        results[name] = measure(func, args.seconds)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({**baseline, **results}, f, indent=2)
+        print(f"💾 Базата е записана в {args.baseline}")
+        return
+    if not baseline:
+        print(f"ℹ️ Няма база ({args.baseline}) — пусни с --save.")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, base, now in regressions:
+        print(f"❌ {name}: {metric} {base:.3f} → {now:.3f} (+{(now / base - 1) * 100:.0f}%)")
+    if regressions:
+        sys.exit(1)
+    print("✅ Без влошаване спрямо базата.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,89 @@
 MIN_TRADE_USDT = 5.0          # Минимален USDT за сделка
 RISK_PERCENT = 0.10           # 10% от баланса на сделка (макс. 20% в кода)
 PROFIT_TARGET = 0.003         # 0.3% цел за печалба (минимум)
+MIN_ABS_PROFIT_USD = 0.02     # Мин. печалба в USD на сделка (вдига целта при малки суми)
+MAX_RISK_PERCENT = 0.2        # Таван на RISK_PERCENT
 CHECK_INTERVAL = 300          # 5 минути между проверки (след успешна сделка)
+SCAN_MAX_WORKERS = 8          # Макс. паралелни заявки при сканиране на пазарите
+SYMBOL_CACHE_TTL = 6 * 3600   # 6 часа валидност на кеша с параметри на символите
+KLINE_HISTORY = 1000          # Макс. свещи в паметта за всяка борса/символ/интервал
+BALANCE_TTL = 30              # секунди валидност на общия снимък на балансите
+
+# WebSocket пазарни данни (пакет websocket-client; без него всичко е през REST)
+WS_ENABLED = True
+WS_STALE_AFTER = 5            # секунди; по-стари котировки от потока → REST
+WS_URLS = {}                  # подмяна на адреси, напр. {"gateio": "ws://127.0.0.1:8765/"} за локален тест сървър
+REST_URLS = {}                # подмяна на REST адреси, напр. {"mexc": "http://127.0.0.1:8801"} (mock_exchange.py)
+
+# Следене на поръчки (частни потоци + резервно REST допитване)
+ORDER_POLL_MIN = 0.5          # секунди до първата REST проверка
+ORDER_POLL_MAX = 30           # таван на експоненциалното забавяне между проверки
+ORDER_TRACK_TIMEOUT = 1200    # 20 минути за изпълнение на поръчка
+ORDER_EARLY_EVENT_TTL = 30    # секунди пазене на събитие от потока, дошло преди track() (бързо изпълнение)
+
+# Grid търговия (при GRID_ENABLED = False: една покупка → продажба на час)
+GRID_ENABLED = False          # True = grid вместо покупка → продажба (включва се ръчно)
+GRID_LEVELS = 3               # Брой нива покупки под и продажби над цената
+GRID_SPACING = 0.005          # 0.5% между нивата (мин. PROFIT_TARGET и 2 × такса)
+GRID_ORDER_USDT = 5.0         # USDT на ниво
+GRID_ORDER_TIMEOUT = 24 * 3600  # след толкова секунди следенето се подновява
+
+# Планировчик: отделен работник за всяка борса/символ
+SCHEDULER_MAX_WORKERS_PER_EXCHANGE = 2  # Символи, търгувани едновременно на една борса
+EXCHANGE_REQUEST_BUDGET = {   # Заявки в минута за стратегиите (под публичните лимити на борсите)
+    "MEXC": 600,
+    "Gate.io": 600,
+    "KuCoin": 300,
+    "CoinEx": 300,
+}
+MAX_TOTAL_EXPOSURE_USDT = 200.0  # Общо заделени USDT във всички борси
+MAX_EXPOSURE_PER_EXCHANGE = 0.5  # Макс. дял от капитала на една борса в позиции
+MAX_OPEN_POSITIONS = 8           # Макс. едновременни позиции (grid = една позиция)
+DAILY_LOSS_LIMIT_USDT = 5.0      # При толкова дневна загуба нови сделки спират до полунощ
+
+# HTTP връзки към борсите (общ keep-alive пул за всяка борса)
+HTTP_POOL_SIZE = 10           # Макс. едновременни връзки към една борса
+HTTP_CONNECT_RETRIES = 2      # Повторни опити само при неуспешно свързване
+HTTP_TIMEOUTS = {             # (connect, read) секунди; ключ = префикс на ендпойнт
+    "default": (5, 10),
+    "/api/v3/exchangeInfo": (5, 30),
+    "/api/v1/symbols": (5, 30),
+    "/spot/currency_pairs": (5, 30),
+}
+
+ASYNC_ADAPTERS = False        # aiohttp адаптери (async_adapters.py) зад синхронна обвивка
+
+# Здраве на борсите (health.py): прекъсвач по грешки и латентност
+HEALTH_WINDOW = 50            # Последни заявки за статистиката на борса
+HEALTH_MIN_SAMPLES = 10       # Мин. заявки преди оценка на дял грешки/латентност
+HEALTH_MAX_ERROR_RATE = 0.5   # Над този дял грешки борсата се изключва
+HEALTH_FAILURE_THRESHOLD = 3  # Поредни грешки, които изключват борсата
+HEALTH_MAX_P95 = 5.0          # секунди; по-бавна p95 латентност = влошена борса
+HEALTH_PROBE_INTERVAL = 60    # Проверка на борса без трафик през толкова секунди
+HEALTH_BACKOFF_MIN = 5        # Първа повторна проверка на изключена борса (после ×2)
+HEALTH_BACKOFF_MAX = 300      # Таван на паузата между повторните проверки
+
+# Лимити на заявките (token bucket по тегла на ендпойнтите, виж ratelimit.py)
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_SAFETY = 0.8       # Ползваме до 80% от публикувания лимит
+RATE_LIMIT_MAX_RETRIES = 3    # Повторения след 429/418 (след изчакване на Retry-After)
+
+# Бектест (backtest.py)
+BACKTEST_DATA_DIR = "data/klines"  # 1m свещи по борса/символ (.npy)
+BACKTEST_BALANCE = 100.0      # Начален USDT баланс
+BACKTEST_MAKER_FEE = 0.001    # maker такса на симулираната борса
+BACKTEST_LATENCY = 0.5        # секунди от решението до поръчката в книгата
+BACKTEST_FILL_RATIO = 0.1     # Дял от обема на свещ, достъпен за наша поръчка
+BACKTEST_SPREAD = 0.0005      # bid/ask спред спрямо close
+
+# Метрики (metrics.py)
+METRICS_PORT = 9108           # локален /metrics за Prometheus (0 = изключен)
+METRICS_DUMP_FILE = "logs/metrics.json"  # компактен отчет, обновяван всяка итерация
+
+# Бенчмаркове (bench.py)
+BENCH_BASELINE = "logs/bench_baseline.json"  # база за сравнение (своя за всяко устройство)
+BENCH_SECONDS = 1.0           # секунди измерване на всеки тест
+BENCH_TOLERANCE = 0.25        # допустимо влошаване на p50 и паметта спрямо базата
 
 # Търговски двойки — трябва да са налични на ВСИЧКИ 4 борси
 TRADE_SYMBOLS = [
@@ -40,4 +122,10 @@ EXCHANGE_KEYS = {
 TELEGRAM_BOT_TOKEN = "YOUR_TELEGRAM_BOT_TOKEN"
 TELEGRAM_CHAT_ID = "YOUR_TELEGRAM_CHAT_ID"
 
+# Нотификации (notifier.py — фонова опашка)
+NOTIFY_BATCH_WINDOW = 2.0     # секунди за събиране на поредица съобщения в едно
+NOTIFY_PER_MINUTE = 20        # Най-много Telegram съобщения в минута
+NOTIFY_MAX_CHARS = 4000       # Telegram приема до 4096 знака
+NOTIFY_RETRY_MAX = 300        # Таван на паузата при недостъпен Telegram
+
 # Забележка: Никога не споделяйте този файл публично!
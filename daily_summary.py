@@ -1,49 +1,51 @@
 # daily_summary.py
-import os
 import re
+import time
 from datetime import datetime, timedelta
+from events import EVENTS
+from logreader import read_window
 from telegram_bot import send_telegram_message
 
 def read_last_24h_logs():
-    log_path = "logs/bot.log"
-    if not os.path.exists(log_path):
-        return []
-    with open(log_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    now = datetime.now()
-    twenty_four_hours_ago = now - timedelta(hours=24)
-    recent = []
-    for line in lines:
-        try:
-            # Извличаме времето от реда: "2025-04-05 14:30:22 | ..."
-            timestamp_str = " ".join(line.split(" | ")[:1])
-            log_time = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-            if log_time >= twenty_four_hours_ago:
-                recent.append(line)
-        except:
-            continue
-    return recent
+    """Редовете от последните 24 часа (bot.log и архивите) — поточно, без зареждане на файла."""
+    return read_window(datetime.now() - timedelta(hours=24))
 
-def generate_summary():
-    logs = read_last_24h_logs()
-    trades = [l for l in logs if "✅ Успех!" in l]
-    errors = [l for l in logs if "❌" in l or "💥" in l]
-    
+def summarize_logs():
+    """Старият път: регулярни изрази върху bot.log → (сделки, грешки, печалба)."""
+    trades = errors = 0
     total_profit = 0.0
-    for t in trades:
-        try:
+    for line in read_last_24h_logs():
+        if "❌" in line or "💥" in line:
+            errors += 1
+        if "✅ Успех!" in line:
+            trades += 1
             # Извличаме печалбата: "Печалба: 0.1234 USDT"
-            match = re.search(r"Печалба: ([\d.]+) USDT", t)
+            match = re.search(r"Печалба: ([\d.]+) USDT", line)
             if match:
                 total_profit += float(match.group(1))
-        except:
-            pass
+    return trades, errors, total_profit
+
+def summarize_events(since):
+    """Почасовите броячи от events.db → (сделки, грешки, печалба)."""
+    totals = EVENTS.totals(since)
+    trades, total_profit = totals.get("trade", (0, 0.0))
+    errors, _ = totals.get("error", (0, 0.0))
+    return trades, errors, total_profit
+
+def generate_summary():
+    since = time.time() - 24 * 3600
+    first = EVENTS.first_ts()
+    # Докато събитията не покриват цялото денонощие, четем и стария лог
+    if first is not None and first <= since:
+        trades, errors, total_profit = summarize_events(since)
+    else:
+        trades, errors, total_profit = summarize_logs()
 
     msg = (
         "📊 **Ежедневно резюме**\n"
         f"🗓️ {datetime.now().strftime('%Y-%m-%d')}\n"
-        f"✅ Успешни сделки: {len(trades)}\n"
-        f"⚠️ Грешки: {len(errors)}\n"
+        f"✅ Успешни сделки: {trades}\n"
+        f"⚠️ Грешки: {errors}\n"
         f"💰 Обща печалба: {total_profit:.4f} USDT"
     )
     return msg
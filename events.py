@@ -0,0 +1,119 @@
+# events.py
+"""
+Структурирани събития на бота (сделки, грешки) в SQLite с индекс по време
+и почасови броячи. daily_summary чете броячите за последните 24 часа
+(най-много 25 реда) вместо да обхожда bot.log с регулярни изрази.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+EVENTS_FILE = "logs/events.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    value REAL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events(ts);
+CREATE TABLE IF NOT EXISTS counters (
+    hour INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, kind)
+);
+"""
+
+
+class EventLog:
+    def __init__(self, path=EVENTS_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def emit(self, kind, value=None, **fields):
+        """Записва събитие и обновява брояча на текущия час."""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO events(ts, kind, value, data) VALUES (?, ?, ?, ?)",
+                             (now, kind, value, json.dumps(fields, ensure_ascii=False) if fields else None))
+            self._db.execute(
+                "INSERT INTO counters(hour, kind, count, total) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(hour, kind) DO UPDATE SET count = count + 1, total = total + excluded.total",
+                (int(now // 3600), kind, value or 0.0))
+
+    def first_ts(self):
+        """Време на най-старото събитие (None при празна база)."""
+        with self._lock:
+            return self._db.execute("SELECT MIN(ts) FROM events").fetchone()[0]
+
+    def totals(self, since, until=None):
+        """
+        {вид: (брой, сума)} за [since, until): цели часове от броячите,
+        а непълните часове в краищата — от индекса по време.
+        """
+        until = time.time() if until is None else until
+        first_hour = int(-(-since // 3600))   # първият цял час след since
+        last_hour = int(until // 3600)        # часът на until (непълен)
+        result = {}
+
+        def add(kind, count, total):
+            c, t = result.get(kind, (0, 0.0))
+            result[kind] = (c + count, t + (total or 0.0))
+
+        with self._lock:
+            if first_hour < last_hour:
+                for kind, count, total in self._db.execute(
+                        "SELECT kind, SUM(count), SUM(total) FROM counters WHERE hour >= ? AND hour < ? GROUP BY kind",
+                        (first_hour, last_hour)):
+                    add(kind, count, total)
+                edges = [(since, first_hour * 3600), (last_hour * 3600, until)]
+            else:
+                edges = [(since, until)]
+            for start, end in edges:
+                for kind, count, total in self._db.execute(
+                        "SELECT kind, COUNT(*), SUM(value) FROM events WHERE ts >= ? AND ts < ? GROUP BY kind",
+                        (start, end)):
+                    add(kind, count, total)
+        return result
+
+    def events(self, since, kind=None):
+        """[(ts, вид, стойност, полета)] от since насам."""
+        query = "SELECT ts, kind, value, data FROM events WHERE ts >= ?"
+        args = [since]
+        if kind is not None:
+            query += " AND kind = ?"
+            args.append(kind)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY ts", args).fetchall()
+        return [(ts, k, value, json.loads(data) if data else {}) for ts, k, value, data in rows]
+
+
+class EventLogHandler(logging.Handler):
+    """Записва като събитие "error" всеки лог ред с ❌/💥 или ниво ERROR и нагоре."""
+
+    def __init__(self, events=None):
+        super().__init__(level=logging.WARNING)
+        self.events = events
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+            if record.levelno >= logging.ERROR or "❌" in message or "💥" in message:
+                (self.events or EVENTS).emit("error", message=message[:300], level=record.levelname)
+        except Exception:
+            self.handleError(record)
+
+
+EVENTS = EventLog()
@@ -0,0 +1,148 @@
+# fake_ws_server.py
+"""
+Минимален локален WebSocket сървър (само stdlib) за тестове на потоците.
+Пример:
+    srv = FakeWebSocketServer(on_message=lambda client, msg: client.send({...}))
+    srv.start()
+    # в config.py: WS_URLS = {"gateio": srv.url}
+    srv.broadcast({"channel": "spot.book_ticker", "event": "update", "result": {...}})
+"""
+import base64
+import hashlib
+import json
+import socket
+import socketserver
+import struct
+import threading
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class FakeClient:
+    def __init__(self, sock):
+        self.sock = sock
+        self._lock = threading.Lock()
+
+    def send(self, msg):
+        """Изпраща dict (като JSON) или str в текстов фрейм."""
+        payload = (msg if isinstance(msg, str) else json.dumps(msg)).encode("utf-8")
+        self._send_frame(0x1, payload)
+
+    def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        n = len(payload)
+        if n < 126:
+            header += bytes([n])
+        elif n < 65536:
+            header += bytes([126]) + struct.pack("!H", n)
+        else:
+            header += bytes([127]) + struct.pack("!Q", n)
+        with self._lock:
+            self.sock.sendall(header + payload)
+
+    def _recv_exact(self, n):
+        data = b""
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("closed")
+            data += chunk
+        return data
+
+    def recv_frame(self):
+        b1, b2 = self._recv_exact(2)
+        opcode = b1 & 0x0F
+        n = b2 & 0x7F
+        if n == 126:
+            n = struct.unpack("!H", self._recv_exact(2))[0]
+        elif n == 127:
+            n = struct.unpack("!Q", self._recv_exact(8))[0]
+        mask = self._recv_exact(4) if b2 & 0x80 else b"\0\0\0\0"
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self._recv_exact(n)))
+        return opcode, payload
+
+
+class FakeWebSocketServer:
+    """
+    Приема клиенти, записва получените съобщения в self.received
+    и вика on_message(client, msg) за всяко от тях.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, on_message=None):
+        self.on_message = on_message
+        self.received = []
+        self.clients = []
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server._handle(self.request)
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"ws://{host}:{port}/"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def broadcast(self, msg):
+        for client in list(self.clients):
+            try:
+                client.send(msg)
+            except OSError:
+                self.clients.remove(client)
+
+    def _handle(self, sock):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            request += chunk
+        headers = {}
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + _GUID).encode()).digest()).decode()
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+
+        client = FakeClient(sock)
+        self.clients.append(client)
+        try:
+            while True:
+                opcode, payload = client.recv_frame()
+                if opcode == 0x8:
+                    client._send_frame(0x8, payload[:2])
+                    break
+                if opcode == 0x9:
+                    client._send_frame(0xA, payload)
+                    continue
+                if opcode != 0x1:
+                    continue
+                msg = json.loads(payload.decode("utf-8"))
+                self.received.append(msg)
+                if self.on_message:
+                    self.on_message(client, msg)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            if client in self.clients:
+                self.clients.remove(client)
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
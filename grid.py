@@ -0,0 +1,212 @@
+# grid.py
+"""
+Grid двигател: N покупки под и N продажби над текущата цена върху
+фиксирана стълба от цени (стъпка GRID_SPACING). Изпълнена покупка пуска
+продажба едно стъпало по-горе, изпълнена продажба — покупка едно стъпало
+по-долу, така капиталът винаги работи.
+"""
+import bisect
+import logging
+import threading
+
+from balances import BALANCES
+from config import GRID_LEVELS, GRID_SPACING, GRID_ORDER_USDT, GRID_ORDER_TIMEOUT, PROFIT_TARGET
+from order_tracker import ORDER_TRACKER, FINAL_STATUSES
+from stats import record_trade
+
+logger = logging.getLogger(__name__)
+
+
+def extract_order_id(resp):
+    """ID на поръчка от отговора на place_order (различен за всяка борса)."""
+    if not isinstance(resp, dict):
+        return None
+    data = resp.get("data") if isinstance(resp.get("data"), dict) else resp
+    for key in ("orderId", "id", "order_id"):
+        if data.get(key) is not None:
+            return str(data[key])
+    return None
+
+
+class GridLevel:
+    def __init__(self, price, side, qty, order_id, entry_price=None):
+        self.price = price
+        self.side = side
+        self.qty = qty
+        self.order_id = order_id
+        self.entry_price = entry_price  # цена на покупката, от която е тази продажба
+
+
+class GridEngine:
+    def __init__(self, exchange, symbol, levels=GRID_LEVELS, spacing=GRID_SPACING,
+                 order_usdt=GRID_ORDER_USDT, tracker=ORDER_TRACKER, notify=None, risk=None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.levels = levels
+        self.maker_fee = getattr(exchange, "maker_fee", 0.001)
+        # Стъпката трябва да покрива двете такси + минималната цел
+        self.spacing = max(spacing, PROFIT_TARGET, 2 * self.maker_fee + 0.001)
+        self.order_usdt = order_usdt
+        self.tracker = tracker
+        self.notify = notify
+        self.risk = risk          # RiskLimits: всяка завършена двойка влиза в дневния резултат веднага
+        self.ladder = []
+        self.by_price = {}        # цена → [GridLevel]: след изпълнение на стъпалото може да има две поръчки
+        self.by_order = {}
+        self.realized_profit = 0.0
+        self.stopped = False
+        self._lock = threading.RLock()
+        self._info = None
+
+    def required_usdt(self):
+        return self.levels * self.order_usdt
+
+    def start(self, balance=None):
+        """Изгражда стълбата около средата на bid/ask и пуска началните поръчки."""
+        if balance is not None and balance < self.required_usdt():
+            raise ValueError(f"Недостатъчен баланс за grid: {balance:.2f} < {self.required_usdt():.2f} USDT")
+        self._info = self.exchange.get_symbol_info(self.symbol)
+        ticker = self.exchange.get_ticker(self.symbol)
+        center = (float(ticker["bidPrice"]) + float(ticker["askPrice"])) / 2
+        qty = self._round_qty(self.order_usdt / center)
+        if qty < self._info["min_qty"]:
+            raise ValueError(f"Количеството {qty} е под минимума {self._info['min_qty']}")
+
+        self.ladder = sorted({self._round_price(center * (1 + self.spacing * i))
+                              for i in range(-self.levels, self.levels + 1)})
+        base = self.symbol.split("/")[0]
+        try:
+            base_free = BALANCES.balance(self.exchange, base)
+        except Exception:
+            base_free = 0.0
+
+        orders = []
+        for price in self.ladder:
+            if price < center:
+                orders.append((self.symbol, "BUY", price, qty))
+            elif price > center and base_free >= qty:
+                # Начални продажби само от наличната базова валута
+                orders.append((self.symbol, "SELL", price, qty))
+                base_free -= qty
+        # Всички начални нива с една пакетна заявка (или паралелно, ако борсата няма такава)
+        try:
+            responses = self.exchange.place_orders(orders)
+        except Exception as e:
+            responses = [e] * len(orders)
+        for (_, side, price, qty), resp in zip(orders, responses):
+            if isinstance(resp, Exception):
+                logger.error(f"❌ Grid {side} @ {price}: {resp}")
+            else:
+                self._register(side, price, qty, resp)
+        if not self.by_order:
+            # Без нито една поръчка grid-ът няма да получи изпълнения — работникът трябва да опита пак
+            raise ValueError(f"Нито една от {len(orders)} начални поръчки не е приета")
+        logger.info(f"🧱 Grid {self.exchange.name} | {self.symbol}: {len(self.by_order)} поръчки, стъпка {self.spacing:.2%}")
+
+    def stop(self):
+        """Спира реакциите на изпълнения и отменя всички чакащи поръчки."""
+        with self._lock:
+            self.stopped = True
+            orders = list(self.by_order.values())
+            self.by_order.clear()
+            self.by_price.clear()
+        if not orders:
+            return
+        try:
+            cancelled = set(self.exchange.cancel_orders(self.symbol, [level.order_id for level in orders]))
+        except Exception as e:
+            logger.warning(f"⚠️ Grid: отмяната на {len(orders)} поръчки неуспешна: {e}")
+            return
+        for level in orders:
+            if level.order_id not in cancelled:
+                logger.warning(f"⚠️ Grid: отмяна на {level.order_id} неуспешна")
+
+    def resting(self):
+        """Чакащите нива, подредени по цена: [(цена, страна, к-во, order_id)]."""
+        with self._lock:
+            return sorted((lvl.price, lvl.side, lvl.qty, lvl.order_id) for lvl in self.by_order.values())
+
+    def _round_price(self, price):
+        return round(price, self._info["price_precision"])
+
+    def _round_qty(self, qty):
+        return round(qty, self._info["quantity_precision"])
+
+    def _neighbor(self, price, step):
+        """Съседното стъпало на стълбата (step = +1 нагоре, -1 надолу)."""
+        idx = bisect.bisect_left(self.ladder, price) + step
+        if 0 <= idx < len(self.ladder) and self.ladder[idx] != price:
+            return self.ladder[idx]
+        return self._round_price(price * (1 + self.spacing * step))
+
+    def _place(self, side, price, qty, entry_price=None):
+        try:
+            resp = self.exchange.place_order(self.symbol, side, price, qty)
+        except Exception as e:
+            logger.error(f"❌ Grid {side} @ {price}: {e}")
+            return None
+        return self._register(side, price, qty, resp, entry_price)
+
+    def _register(self, side, price, qty, resp, entry_price=None):
+        """Записва приетата поръчка в стълбата и я предава на ORDER_TRACKER."""
+        order_id = extract_order_id(resp)
+        if order_id is None:
+            logger.error(f"❌ Grid {side} @ {price}: {resp}")
+            return None
+        level = GridLevel(price, side, qty, order_id, entry_price)
+        with self._lock:
+            same_price = self.by_price.setdefault(price, [])
+            if same_price:
+                logger.warning(f"⚠️ Grid: на стъпало {price} вече има {len(same_price)} поръчка(и), "
+                               f"{side} {order_id} се пази до тях")
+            same_price.append(level)
+            self.by_order[order_id] = level
+        self.tracker.track(self.exchange, self.symbol, order_id, on_fill=self._on_fill, on_done=self._on_done,
+                           timeout=GRID_ORDER_TIMEOUT, side=side)
+        return level
+
+    def _remove(self, order_id):
+        with self._lock:
+            level = self.by_order.pop(order_id, None)
+            same_price = self.by_price.get(level.price, []) if level is not None else []
+            if level in same_price:
+                same_price.remove(level)
+                if not same_price:
+                    del self.by_price[level.price]
+            return level
+
+    def _on_fill(self, order):
+        level = self._remove(order.order_id)
+        if level is None or self.stopped:
+            return
+        qty = self._round_qty(order.filled_qty or level.qty)
+        fill_price = order.avg_price or level.price
+        if level.side == "BUY":
+            self._place("SELL", self._neighbor(level.price, +1), qty, entry_price=fill_price)
+            return
+
+        if level.entry_price:
+            profit = qty * (fill_price - level.entry_price) - qty * (fill_price + level.entry_price) * self.maker_fee
+            self.realized_profit += profit
+            if self.risk is not None:
+                self.risk.record_pnl(profit)
+            record_trade(profit, success=True, exchange=self.exchange.name, symbol=self.symbol)
+            msg = f"✅ Успех!\n{self.exchange.name} | {self.symbol}\nПечалба: {profit:.4f} USDT"
+            logger.info(msg)
+            if self.notify:
+                self.notify(msg)
+        self._place("BUY", self._neighbor(level.price, -1), qty)
+
+    def _on_done(self, order):
+        if self.stopped or order.status == "filled":
+            return
+        if order.status in FINAL_STATUSES:
+            self._remove(order.order_id)
+            logger.warning(f"⚠️ Grid поръчка {order.order_id} е {order.status}")
+            return
+        # Изтекъл срок на следене — поръчката още стои на борсата, продължаваме
+        with self._lock:
+            still_resting = order.order_id in self.by_order
+        if still_resting:
+            self.tracker.track(self.exchange, self.symbol, order.order_id, on_fill=self._on_fill,
+                               on_done=self._on_done, timeout=GRID_ORDER_TIMEOUT, side=order.side)
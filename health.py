@@ -0,0 +1,195 @@
+# health.py
+"""
+Здраве на борсите: всяка HTTP заявка (http_pool) записва латентност и
+резултат, а прекъсвач (circuit breaker) изключва борса с много грешки,
+поредни откази или висока p95 латентност. is_active() на адаптерите е
+само поглед в паметта (O(1)); изключените борси се проверяват отново
+във фонова нишка със забавяне HEALTH_BACKOFF_MIN ×2 … HEALTH_BACKOFF_MAX.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    HEALTH_WINDOW, HEALTH_MIN_SAMPLES, HEALTH_MAX_ERROR_RATE, HEALTH_FAILURE_THRESHOLD,
+    HEALTH_MAX_P95, HEALTH_PROBE_INTERVAL, HEALTH_BACKOFF_MIN, HEALTH_BACKOFF_MAX
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"        # нормална работа
+OPEN = "open"            # борсата се пропуска до следващата проверка
+HALF_OPEN = "half_open"  # тече проверка; успех → closed, грешка → open с по-дълга пауза
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+class ExchangeHealth:
+    def __init__(self, name, probe=None, window=HEALTH_WINDOW):
+        self.name = name
+        self.probe = probe
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.failures = 0           # поредни грешки
+        self.backoff = HEALTH_BACKOFF_MIN
+        self.next_probe = 0.0
+        self.last_seen = 0.0
+        self.reason = ""
+        self.lock = threading.Lock()
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def stats(self):
+        with self.lock:
+            latencies = list(self.latencies)
+            return {
+                "state": self.state,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "error_rate": self.error_rate(),
+                "requests": len(self.outcomes),
+                "reason": self.reason,
+            }
+
+
+class HealthMonitor:
+    def __init__(self):
+        self._health = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        self._thread = None
+
+    def register(self, name, probe):
+        """Записва борсата (ключ = името на HTTP сесията) и пуска фоновите проверки."""
+        with self._lock:
+            health = self._health.get(name)
+            if health is None:
+                health = ExchangeHealth(name, probe)
+                self._health[name] = health
+            elif health.probe is None:
+                health.probe = probe
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+                self._thread.start()
+        return health
+
+    def _get(self, name):
+        health = self._health.get(name)
+        if health is None:
+            with self._lock:
+                health = self._health.setdefault(name, ExchangeHealth(name))
+        return health
+
+    def is_active(self, name):
+        """O(1): False само докато прекъсвачът за борсата е отворен."""
+        health = self._health.get(name)
+        return health is None or health.state != OPEN
+
+    def record(self, name, latency, ok):
+        """Резултат от една заявка (вика се от http_pool за всяка заявка)."""
+        health = self._get(name)
+        with health.lock:
+            health.last_seen = time.time()
+            health.outcomes.append(1 if ok else 0)
+            if ok:
+                health.latencies.append(latency)
+                health.failures = 0
+            else:
+                health.failures += 1
+            if health.state == HALF_OPEN:
+                if ok:
+                    self._close(health)
+                else:
+                    self._open(health, "неуспешна проверка", escalate=True)
+                return
+            if health.state == CLOSED:
+                reason = self._trip_reason(health)
+                if reason:
+                    self._open(health, reason)
+
+    @staticmethod
+    def _trip_reason(health):
+        if health.failures >= HEALTH_FAILURE_THRESHOLD:
+            return f"{health.failures} поредни грешки"
+        if len(health.outcomes) >= HEALTH_MIN_SAMPLES:
+            rate = health.error_rate()
+            if rate >= HEALTH_MAX_ERROR_RATE:
+                return f"грешки {rate:.0%}"
+            p95 = percentile(health.latencies, 95)
+            if p95 is not None and len(health.latencies) >= HEALTH_MIN_SAMPLES and p95 > HEALTH_MAX_P95:
+                return f"p95 латентност {p95:.1f}s"
+        return None
+
+    def _open(self, health, reason, escalate=False):
+        if escalate:
+            health.backoff = min(health.backoff * 2, HEALTH_BACKOFF_MAX)
+        health.state = OPEN
+        health.reason = reason
+        health.next_probe = time.time() + health.backoff
+        logger.warning(f"🔴 {health.name}: борсата е изключена ({reason}), нова проверка след {health.backoff:.0f}s")
+
+    def _close(self, health):
+        was_open = health.reason
+        health.state = CLOSED
+        health.reason = ""
+        health.failures = 0
+        health.backoff = HEALTH_BACKOFF_MIN
+        # Старите грешки и бавни заявки не трябва веднага да изключат борсата отново
+        health.outcomes.clear()
+        health.latencies.clear()
+        if was_open:
+            logger.info(f"🟢 {health.name}: борсата отново е активна")
+
+    def _loop(self):
+        while True:
+            now = time.time()
+            with self._lock:
+                entries = list(self._health.values())
+            for health in entries:
+                if health.probe is None:
+                    continue
+                with health.lock:
+                    due = ((health.state == OPEN and now >= health.next_probe)
+                           or (health.state == CLOSED and now - health.last_seen >= HEALTH_PROBE_INTERVAL))
+                    if not due:
+                        continue
+                    if health.state == OPEN:
+                        health.state = HALF_OPEN
+                    health.last_seen = now
+                self._pool.submit(self._probe, health)
+            time.sleep(1)
+
+    def _probe(self, health):
+        try:
+            ok = health.probe()
+        except Exception:
+            ok = False
+        with health.lock:
+            # HTTP заявката на проверката обикновено вече е решила чрез record()
+            if health.state == HALF_OPEN:
+                if ok:
+                    self._close(health)
+                else:
+                    self._open(health, "неуспешна проверка", escalate=True)
+
+    def stats(self):
+        """{сесия: {state, p50, p95, p99, error_rate, requests, reason}}."""
+        with self._lock:
+            entries = list(self._health.items())
+        return {name: health.stats() for name, health in entries}
+
+
+HEALTH = HealthMonitor()
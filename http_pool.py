@@ -0,0 +1,122 @@
+# http_pool.py
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import HTTP_POOL_SIZE, HTTP_CONNECT_RETRIES, HTTP_TIMEOUTS, RATE_LIMIT_ENABLED, RATE_LIMIT_MAX_RETRIES
+from health import HEALTH
+from metrics import METRICS, endpoint
+from ratelimit import limiter_for
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session с общ пул от keep-alive връзки към една борса.
+    Повтаря само неуспешно свързване (заявката още не е изпратена),
+    така че POST поръчки никога не се дублират.
+    """
+
+    def __init__(self, name, pool_size=HTTP_POOL_SIZE, connect_retries=HTTP_CONNECT_RETRIES, timeouts=None):
+        super().__init__()
+        self.name = name
+        self.timeouts = dict(HTTP_TIMEOUTS if timeouts is None else timeouts)
+        retries = Retry(total=None, connect=connect_retries, read=0, status=0, backoff_factor=0.2)
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+        self.mount("https://", self.adapter)
+        self.mount("http://", self.adapter)
+        self.headers["Connection"] = "keep-alive"
+        self.limiter = limiter_for(name) if RATE_LIMIT_ENABLED else None
+
+    def request(self, method, url, *args, resign=None, **kwargs):
+        """
+        Заявка през лимитите на борсата: изчаква свободни токени, а при
+        429/418 изчаква Retry-After и я изпраща отново (борсата я е отхвърлила,
+        така че повторението е безопасно и за поръчки).
+        Подписаната заявка е валидна само няколко секунди (recvWindow на MEXC,
+        timestamp на KuCoin и Gate.io) — за нея адаптерът подава resign(), който
+        връща нови (url, заглавки, тяло), и всеки следващ опит е подписан наново.
+        """
+        if self.limiter is None:
+            return self._timed(method, url, *args, **kwargs)
+        method = method.upper()
+        path = urlsplit(url).path
+        body_key = "data" if kwargs.get("data") is not None else "json"
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            if attempt and resign is not None:
+                url, kwargs["headers"], kwargs[body_key] = resign()
+            self.limiter.acquire(method, path)
+            resp = self._timed(method, url, *args, **kwargs)
+            self.limiter.feedback(method, path, resp.status_code, resp.headers)
+            if resp.status_code not in (418, 429):
+                break
+            METRICS.inc("rate_limit_retries_total", session=self.name)
+        return resp
+
+    def _timed(self, method, url, *args, **kwargs):
+        """Изпраща заявката и записва латентността и резултата в HEALTH и METRICS."""
+        labels = {"session": self.name, "method": method.upper(), "endpoint": endpoint(urlsplit(url).path)}
+        start = time.monotonic()
+        try:
+            resp = super().request(method, url, *args, **kwargs)
+        except Exception:
+            elapsed = time.monotonic() - start
+            HEALTH.record(self.name, elapsed, False)
+            METRICS.observe("request_seconds", elapsed, **labels)
+            METRICS.inc("requests_total", code="error", **labels)
+            raise
+        elapsed = time.monotonic() - start
+        HEALTH.record(self.name, elapsed, resp.status_code < 500)
+        METRICS.observe("request_seconds", elapsed, **labels)
+        METRICS.inc("requests_total", code=resp.status_code, **labels)
+        return resp
+
+    def timeout_for(self, endpoint):
+        """Таймаут за ендпойнт: най-дългият съвпадащ префикс или "default"."""
+        best = None
+        for prefix in self.timeouts:
+            if prefix != "default" and endpoint.startswith(prefix):
+                if best is None or len(prefix) > len(best):
+                    best = prefix
+        return self.timeouts[best] if best else self.timeouts["default"]
+
+    def stats(self):
+        """Брой заявки, нови връзки и дял на преизползваните връзки."""
+        requests_sent = 0
+        new_connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            new_connections += pool.num_connections
+        reused = max(requests_sent - new_connections, 0)
+        return {
+            "requests": requests_sent,
+            "connections": new_connections,
+            "reuse_rate": reused / requests_sent if requests_sent else 0.0
+        }
+
+
+def get_session(name):
+    """Връща споделената сесия за борсата (създава я при първо извикване)."""
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = PooledSession(name)
+            _sessions[name] = session
+        return session
+
+
+def pool_stats():
+    """Статистика за всички отворени пулове: {борса: stats}."""
+    with _lock:
+        sessions = list(_sessions.items())
+    return {name: s.stats() for name, s in sessions}
@@ -0,0 +1,387 @@
+# indicators.py
+"""
+Индикатори директно върху NumPy масиви (без pandas/ta).
+Всички функции работят по последната ос, така че приемат както един ред
+(N,), така и пакет от символи (B, N) с еднаква дължина.
+Формулите повтарят тези на библиотеката ta, за да съвпадат резултатите.
+"""
+import numpy as np
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = 1, 2, 3, 4, 5
+
+
+def klines_to_array(klines):
+    """
+    [[ts, open, high, low, close, volume], ...] → float масив (N, 6).
+    Невалидните стойности стават NaN и редовете с тях се изпускат.
+    """
+    if not klines or len(klines[0]) < 6:
+        return None
+    try:
+        arr = np.asarray([row[:6] for row in klines], dtype=float)
+    except (TypeError, ValueError):
+        arr = np.array([[_to_float(x) for x in row[:6]] for row in klines], dtype=float)
+    return arr[~np.isnan(arr).any(axis=1)]
+
+
+def _to_float(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _wilder_ewm(x, alpha):
+    """ewm(alpha, adjust=False).mean() по последната ос."""
+    out = np.empty_like(x)
+    out[..., 0] = x[..., 0]
+    for i in range(1, x.shape[-1]):
+        out[..., i] = (1 - alpha) * out[..., i - 1] + alpha * x[..., i]
+    return out
+
+
+def sma(close, window):
+    """Плъзгаща средна; първите window-1 стойности са NaN."""
+    close = np.asarray(close, dtype=float)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(close, window, axis=-1)
+        out[..., window - 1:] = windows.mean(axis=-1)
+    return out
+
+
+def rsi(close, window=14):
+    """RSI (Wilder); първите window-1 стойности са NaN."""
+    close = np.asarray(close, dtype=float)
+    diff = np.zeros(close.shape)
+    diff[..., 1:] = np.diff(close, axis=-1)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    ema_up = _wilder_ewm(up, 1 / window)
+    ema_down = _wilder_ewm(down, 1 / window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(ema_down == 0, 100.0, 100 - (100 / (1 + ema_up / ema_down)))
+    out[..., :window - 1] = np.nan
+    return out
+
+
+def true_range(high, low, close):
+    """True range; първата стойност е high - low."""
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    tr = high - low
+    prev_close = close[..., :-1]
+    tr[..., 1:] = np.maximum(high[..., 1:], prev_close) - np.minimum(low[..., 1:], prev_close)
+    return tr
+
+
+def atr(high, low, close, window=14):
+    """Average True Range (Wilder); като в ta първите window-1 стойности са 0."""
+    tr = true_range(high, low, close)
+    out = np.zeros(tr.shape)
+    n = tr.shape[-1]
+    if n < window:
+        return out
+    out[..., window - 1] = tr[..., :window].mean(axis=-1)
+    for i in range(window, n):
+        out[..., i] = (out[..., i - 1] * (window - 1) + tr[..., i]) / float(window)
+    return out
+
+
+def _wilder_sum(x, window):
+    """Изгладена сума на Wilder от индекс window нататък (x[0] се пропуска)."""
+    out = np.zeros(x.shape)
+    n = x.shape[-1]
+    out[..., window] = x[..., 1:window + 1].sum(axis=-1)
+    for i in range(window + 1, n):
+        out[..., i] = out[..., i - 1] - (out[..., i - 1] / float(window)) + x[..., i]
+    return out
+
+
+def adx(high, low, close, window=14):
+    """
+    Average Directional Index. Нужни са поне 2 * window свещи, иначе всичко е NaN.
+    Като в ta стойностите преди индекс 2 * window - 1 са 0.
+    """
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    n = close.shape[-1]
+    if n < 2 * window:
+        return np.full(close.shape, np.nan)
+
+    tr = true_range(high, low, close)
+    diff_up = np.zeros(high.shape)
+    diff_down = np.zeros(low.shape)
+    diff_up[..., 1:] = high[..., 1:] - high[..., :-1]
+    diff_down[..., 1:] = low[..., :-1] - low[..., 1:]
+    pos = np.abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up)
+    neg = np.abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down)
+
+    trs = _wilder_sum(tr, window)
+    dip_s = _wilder_sum(pos, window)
+    din_s = _wilder_sum(neg, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dip = np.where(trs != 0, 100 * (dip_s / trs), 0.0)
+        din = np.where(trs != 0, 100 * (din_s / trs), 0.0)
+        dx = 100 * np.abs((dip - din) / (dip + din))
+
+    out = np.zeros(close.shape)
+    first = 2 * window - 1
+    out[..., first] = dx[..., window:first + 1].mean(axis=-1)
+    for i in range(first + 1, n):
+        out[..., i] = ((out[..., i - 1] * (window - 1)) + dx[..., i]) / float(window)
+    return out
+
+
+def log_return_volatility(close):
+    """Стандартно отклонение на логаритмичните доходности на close."""
+    close = np.asarray(close, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.std(np.diff(np.log(close), axis=-1), axis=-1)
+
+
+def market_rule(avg_volume, latest_adx, latest_rsi, adx_threshold=20, rsi_neutral_range=(35, 65),
+                min_avg_volume_usdt=5000):
+    """Правилото на скенера → (safe, trending); работи за числа и за масиви."""
+    safe = avg_volume >= min_avg_volume_usdt
+    trending = (latest_adx > adx_threshold) & (latest_rsi < rsi_neutral_range[1]) & (latest_rsi > rsi_neutral_range[0])
+    return safe, trending
+
+
+def evaluate_arrays(batch, adx_threshold=20, rsi_neutral_range=(35, 65), min_avg_volume_usdt=5000):
+    """
+    Оценка на пакет свещи с еднаква дължина: batch е масив (B, N, 6).
+    Връща dict от масиви с дължина B: safe, trending, adx, rsi, volatility.
+    """
+    n = batch.shape[1]
+    high, low, close, volume = batch[..., HIGH], batch[..., LOW], batch[..., CLOSE], batch[..., VOLUME]
+    avg_volume = volume[:, -10:].mean(axis=-1)
+    if n >= 20:
+        latest_adx = adx(high, low, close)[:, -1]
+        latest_rsi = rsi(close)[:, -1]
+        safe, trending = market_rule(avg_volume, latest_adx, latest_rsi, adx_threshold, rsi_neutral_range,
+                                     min_avg_volume_usdt)
+    else:
+        latest_adx = latest_rsi = np.full(len(batch), np.nan)
+        safe = avg_volume >= min_avg_volume_usdt
+        trending = np.zeros(len(batch), dtype=bool)
+    return {
+        "safe": safe,
+        "trending": trending,
+        "adx": latest_adx,
+        "rsi": latest_rsi,
+        "volatility": log_return_volatility(close)
+    }
+
+
+def evaluate_batch(klines_list, adx_threshold=20, rsi_neutral_range=(35, 65), min_avg_volume_usdt=5000):
+    """
+    Оценява много символи наведнъж. Редовете с еднаква дължина се подреждат
+    в 2-D масив (символ × време) и индикаторите се смятат за целия пакет.
+    Връща list от dict (safe, trending, adx, rsi, volatility) в реда на входа.
+    """
+    arrays = [klines_to_array(k) for k in klines_list]
+    results = [None] * len(arrays)
+    groups = {}
+    for idx, arr in enumerate(arrays):
+        n = 0 if arr is None else len(arr)
+        groups.setdefault(n, []).append(idx)
+
+    for n, idxs in groups.items():
+        if n < 10:
+            for idx in idxs:
+                results[idx] = {"safe": False, "trending": False, "adx": np.nan, "rsi": np.nan, "volatility": np.nan}
+            continue
+        values = evaluate_arrays(np.stack([arrays[idx] for idx in idxs]),
+                                 adx_threshold, rsi_neutral_range, min_avg_volume_usdt)
+        for j, idx in enumerate(idxs):
+            results[idx] = {
+                "safe": bool(values["safe"][j]),
+                "trending": bool(values["trending"][j]),
+                "adx": float(values["adx"][j]),
+                "rsi": float(values["rsi"][j]),
+                "volatility": float(values["volatility"][j])
+            }
+    return results
+
+
+class _Streaming:
+    """
+    Базов клас за поточни индикатори: update() е O(1) по време и памет.
+    Състоянието е само числа, така че snapshot() е JSON-съвместим dict.
+    """
+
+    def snapshot(self):
+        return dict(vars(self))
+
+    @classmethod
+    def restore(cls, state):
+        obj = cls.__new__(cls)
+        obj.__dict__.update(state)
+        return obj
+
+    def preview(self, *candle):
+        """Стойност, ако свещта бъде добавена, без да се променя състоянието."""
+        return self.restore(self.snapshot()).update(*candle)
+
+
+class StreamingRSI(_Streaming):
+    """RSI (Wilder) свещ по свещ; съвпада с rsi() върху същата история."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.count = 0
+        self.prev_close = None
+        self.avg_up = 0.0
+        self.avg_down = 0.0
+
+    def update(self, close):
+        alpha = 1 / self.window
+        if self.prev_close is not None:
+            diff = close - self.prev_close
+            up = diff if diff > 0 else 0.0
+            down = -diff if diff < 0 else 0.0
+            self.avg_up = (1 - alpha) * self.avg_up + alpha * up
+            self.avg_down = (1 - alpha) * self.avg_down + alpha * down
+        self.prev_close = close
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.window:
+            return np.nan
+        if self.avg_down == 0:
+            return 100.0
+        return 100 - (100 / (1 + self.avg_up / self.avg_down))
+
+
+class StreamingATR(_Streaming):
+    """ATR (Wilder) свещ по свещ; NaN докато няма window свещи."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.count = 0
+        self.prev_close = None
+        self.atr = 0.0
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high, self.prev_close) - min(low, self.prev_close)
+        self.count += 1
+        if self.count <= self.window:
+            self.atr += tr
+            if self.count == self.window:
+                self.atr /= self.window
+        else:
+            self.atr = (self.atr * (self.window - 1) + tr) / float(self.window)
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self):
+        return self.atr if self.count >= self.window else np.nan
+
+
+class StreamingADX(_Streaming):
+    """ADX свещ по свещ; NaN докато няма 2 * window свещи (както adx())."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.count = 0
+        self.prev = None
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.adx = 0.0
+
+    def update(self, high, low, close):
+        w = self.window
+        k = self.count
+        self.count += 1
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return self.value
+        prev_high, prev_low, prev_close = self.prev
+        self.prev = (high, low, close)
+
+        tr = max(high, prev_close) - min(low, prev_close)
+        diff_up = high - prev_high
+        diff_down = prev_low - low
+        pos = diff_up if diff_up > diff_down and diff_up > 0 else 0.0
+        neg = diff_down if diff_down > diff_up and diff_down > 0 else 0.0
+        if k <= w:
+            self.trs += tr
+            self.dip += pos
+            self.din += neg
+        else:
+            self.trs = self.trs - (self.trs / float(w)) + tr
+            self.dip = self.dip - (self.dip / float(w)) + pos
+            self.din = self.din - (self.din / float(w)) + neg
+        if k < w:
+            return self.value
+
+        dip = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+        din = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+        dx = 100 * abs((dip - din) / (dip + din)) if dip + din != 0 else np.nan
+        if k < 2 * w - 1:
+            self.adx += dx
+        elif k == 2 * w - 1:
+            self.adx = (self.adx + dx) / w
+        else:
+            self.adx = ((self.adx * (w - 1)) + dx) / float(w)
+        return self.value
+
+    @property
+    def value(self):
+        return self.adx if self.count >= 2 * self.window else np.nan
+
+
+class MarketIndicators:
+    """
+    RSI + ADX + ATR за един пазар, подавани само със затворени свещи.
+    Пропуска свещи, които вече е видял (по timestamp).
+    """
+
+    def __init__(self, window=14):
+        self.last_ts = None
+        self.rsi = StreamingRSI(window)
+        self.adx = StreamingADX(window)
+        self.atr = StreamingATR(window)
+
+    def update(self, candle):
+        ts, _, high, low, close = candle[:5]
+        if self.last_ts is not None and ts <= self.last_ts:
+            return
+        self.last_ts = ts
+        self.rsi.update(close)
+        self.adx.update(high, low, close)
+        self.atr.update(high, low, close)
+
+    def values(self, open_candle=None):
+        """Текущите стойности; с open_candle — включително незатворената свещ."""
+        if open_candle is None or (self.last_ts is not None and open_candle[0] <= self.last_ts):
+            return {"rsi": self.rsi.value, "adx": self.adx.value, "atr": self.atr.value}
+        _, _, high, low, close = open_candle[:5]
+        return {
+            "rsi": self.rsi.preview(close),
+            "adx": self.adx.preview(high, low, close),
+            "atr": self.atr.preview(high, low, close)
+        }
+
+    def snapshot(self):
+        return {
+            "last_ts": self.last_ts,
+            "rsi": self.rsi.snapshot(),
+            "adx": self.adx.snapshot(),
+            "atr": self.atr.snapshot()
+        }
+
+    @classmethod
+    def restore(cls, state):
+        obj = cls.__new__(cls)
+        obj.last_ts = state["last_ts"]
+        obj.rsi = StreamingRSI.restore(state["rsi"])
+        obj.adx = StreamingADX.restore(state["adx"])
+        obj.atr = StreamingATR.restore(state["atr"])
+        return obj
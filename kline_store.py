@@ -0,0 +1,164 @@
+# kline_store.py
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from config import KLINE_HISTORY
+from indicators import MarketIndicators
+
+INTERVAL_SECONDS = {"1h": 3600, "4h": 4 * 3600, "1d": 86400}
+INDICATOR_STATE_FILE = "logs/indicator_state.json"
+LIVE_WINDOW = 60  # секунди: буфер, обновен от WebSocket в този прозорец, не се тегли по REST
+
+
+class KlineStore:
+    """
+    Локален кеш на свещи: кръгов буфер за всяка (борса, символ, интервал).
+    При всяко извикване тегли само свещите след последната запазена
+    (+ последната, която още не е затворена), историята се пази между циклите.
+    Формат на ред: [ts, open, high, low, close, volume] (ts в единиците на борсата).
+    Затворените свещи се подават и към поточни индикатори (MarketIndicators).
+    """
+
+    def __init__(self, maxlen=KLINE_HISTORY):
+        self.maxlen = maxlen
+        self._buffers = {}
+        self._locks = {}
+        self._indicators = {}
+        self._pushed = {}
+        self._lock = threading.Lock()
+
+    def _buffer(self, key):
+        with self._lock:
+            if key not in self._buffers:
+                self._buffers[key] = deque(maxlen=self.maxlen)
+                self._locks[key] = threading.Lock()
+            return self._buffers[key], self._locks[key]
+
+    @staticmethod
+    def _missing(buf, interval):
+        """Колко свещи да изтеглим, за да допълним буфера до момента."""
+        last_ts = buf[-1][0]
+        step = buf[-1][0] - buf[-2][0] if len(buf) > 1 else INTERVAL_SECONDS.get(interval, 3600)
+        now = time.time()
+        if last_ts > 1e11:  # милисекунди
+            now *= 1000
+            if len(buf) == 1:
+                step *= 1000
+        if step <= 0:
+            return None
+        # +1 за да обновим и последната (незатворена) свещ от буфера
+        return int((now - last_ts) // step) + 2
+
+    @staticmethod
+    def _merge(buf, rows):
+        rows = sorted(rows, key=lambda r: r[0])
+        if not rows:
+            return
+        first_ts = rows[0][0]
+        while buf and buf[-1][0] >= first_ts:
+            buf.pop()
+        buf.extend(rows)
+
+    def get_klines(self, exchange, symbol, interval="1h", limit=50):
+        """Последните limit свещи, като от борсата се тегли само липсващото."""
+        key = (exchange.name, symbol, interval)
+        buf, lock = self._buffer(key)
+        with lock:
+            if len(buf) >= limit and time.time() - self._pushed.get(key, 0) < LIVE_WINDOW:
+                return list(buf)[-limit:]
+            fetch = limit
+            if len(buf) >= limit:
+                missing = self._missing(buf, interval)
+                if missing is not None and missing < limit:
+                    fetch = missing
+            if fetch >= limit:
+                buf.clear()
+            self._merge(buf, exchange.get_klines(symbol, interval, fetch))
+            self._feed(key, buf)
+            return list(buf)[-limit:]
+
+    def push(self, exchange_name, symbol, interval, row):
+        """
+        Свещ от WebSocket поток. Приема се само ако продължава наличната
+        история без дупка; иначе следващото get_klines() ще я допълни по REST.
+        """
+        key = (exchange_name, symbol, interval)
+        buf, lock = self._buffer(key)
+        with lock:
+            if len(buf) < 2 or row[0] < buf[-1][0]:
+                return
+            if row[0] - buf[-1][0] > buf[-1][0] - buf[-2][0]:
+                return
+            self._merge(buf, [row])
+            self._pushed[key] = time.time()
+            self._feed(key, buf)
+
+    def _feed(self, key, buf):
+        """
+        Подава новите затворени свещи (всички без последната) към индикаторите.
+        Обхожда буфера отзад само до последната подадена свещ — O(нови), не O(история).
+        """
+        if len(buf) < 2:
+            return
+        ind = self._indicators.get(key)
+        # Дупка в историята (напр. дълъг престой) → индикаторите започват отначало
+        if ind is None or (ind.last_ts is not None and buf[0][0] > ind.last_ts):
+            ind = MarketIndicators()
+            self._indicators[key] = ind
+        new = []
+        for i in range(len(buf) - 2, -1, -1):
+            if ind.last_ts is not None and buf[i][0] <= ind.last_ts:
+                break
+            new.append(buf[i])
+        for row in reversed(new):
+            ind.update(row)
+
+    def indicators(self, exchange, symbol, interval="1h"):
+        """
+        RSI/ADX/ATR за пазара без преизчисляване на историята (O(1)),
+        включително последната незатворена свещ. None ако няма данни.
+        """
+        buf, lock = self._buffer((exchange.name, symbol, interval))
+        with lock:
+            ind = self._indicators.get((exchange.name, symbol, interval))
+            if ind is None or not buf:
+                return None
+            return ind.values(buf[-1])
+
+    def save_indicators(self, path=INDICATOR_STATE_FILE):
+        """Записва състоянието на поточните индикатори (за рестарт)."""
+        with self._lock:
+            keys = list(self._indicators)
+        state = {}
+        for key in keys:
+            _, lock = self._buffer(key)
+            with lock:
+                state["|".join(key)] = self._indicators[key].snapshot()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def load_indicators(self, path=INDICATOR_STATE_FILE):
+        """Възстановява записаното състояние; липсващ или повреден файл се игнорира."""
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+        except Exception:
+            return
+        with self._lock:
+            for key, snap in state.items():
+                self._indicators[tuple(key.split("|"))] = MarketIndicators.restore(snap)
+
+    def history(self, exchange, symbol, interval="1h"):
+        """Цялата натрупана история без заявка към борсата."""
+        buf, lock = self._buffer((exchange.name, symbol, interval))
+        with lock:
+            return list(buf)
+
+
+KLINE_STORE = KlineStore()
@@ -0,0 +1,139 @@
+# ledger.py
+"""
+Дневник на сделките и изпълненията в SQLite (WAL режим): само добавяне,
+без презапис на цял файл. Дневните суми се поддържат в таблица daily в
+същата транзакция, така че трендът и P&L са индексни заявки.
+С synchronous=NORMAL всяко записване е атомарно, а fsync се прави
+групово при checkpoint на WAL — срив не поврежда базата.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+LEDGER_FILE = "logs/ledger.db"
+LEGACY_STATS_FILE = "logs/trade_stats.json"
+LEGACY_PNL_FILE = "logs/pnl.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    exchange TEXT,
+    symbol TEXT,
+    profit REAL NOT NULL,
+    success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_day ON trades(day);
+CREATE TABLE IF NOT EXISTS fills (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    exchange TEXT NOT NULL,
+    symbol TEXT,
+    order_id TEXT NOT NULL,
+    side TEXT,
+    qty REAL,
+    quote REAL
+);
+CREATE INDEX IF NOT EXISTS fills_ts ON fills(ts);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    trades INTEGER NOT NULL DEFAULT 0,
+    successful INTEGER NOT NULL DEFAULT 0,
+    profit REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value REAL
+);
+"""
+
+
+class Ledger:
+    def __init__(self, path=LEDGER_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Еднократно прехвърля старите trade_stats.json и pnl.json."""
+        with self._lock, self._db:
+            if self._db.execute("SELECT COUNT(*) FROM daily").fetchone()[0] == 0:
+                try:
+                    with open(LEGACY_STATS_FILE, "r") as f:
+                        legacy = json.load(f)
+                    for day, d in legacy.get("daily", {}).items():
+                        self._db.execute(
+                            "INSERT INTO daily(day, trades, successful, profit) VALUES (?, ?, ?, ?)",
+                            (day, d.get("trades", 0), d.get("trades", 0), d.get("profit", 0.0)))
+                except Exception:
+                    pass
+            if self._db.execute("SELECT COUNT(*) FROM state").fetchone()[0] == 0:
+                try:
+                    with open(LEGACY_PNL_FILE, "r") as f:
+                        self._put_state(json.load(f))
+                except Exception:
+                    pass
+
+    def _put_state(self, values):
+        self._db.executemany(
+            "INSERT INTO state(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [(k, float(v)) for k, v in values.items()])
+
+    def record_trade(self, profit_usd, success=True, exchange=None, symbol=None):
+        now = time.time()
+        day = str(date.today())
+        profit = profit_usd if success else 0.0
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO trades(ts, day, exchange, symbol, profit, success) VALUES (?, ?, ?, ?, ?, ?)",
+                (now, day, exchange, symbol, profit_usd, int(success)))
+            self._db.execute(
+                "INSERT INTO daily(day, trades, successful, profit) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET trades = trades + 1, "
+                "successful = successful + excluded.successful, profit = profit + excluded.profit",
+                (day, int(success), profit))
+
+    def record_fill(self, exchange, symbol, order_id, side, qty, quote):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO fills(ts, exchange, symbol, order_id, side, qty, quote) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), exchange, symbol, str(order_id), side, qty, quote))
+
+    def totals(self):
+        """(брой сделки, успешни, обща печалба) от дневните суми."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COALESCE(SUM(trades), 0), COALESCE(SUM(successful), 0), COALESCE(SUM(profit), 0) FROM daily"
+            ).fetchone()
+        return row[0], row[1], row[2]
+
+    def daily(self, days=None):
+        """[(ден, сделки, печалба)] по възходящ ден; days = само последните N."""
+        with self._lock:
+            if days is None:
+                rows = self._db.execute("SELECT day, trades, profit FROM daily ORDER BY day").fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT day, trades, profit FROM daily ORDER BY day DESC LIMIT ?", (days,)).fetchall()
+                rows.reverse()
+        return rows
+
+    def state(self):
+        with self._lock:
+            return dict(self._db.execute("SELECT key, value FROM state").fetchall())
+
+    def set_state(self, **values):
+        with self._lock, self._db:
+            self._put_state(values)
+
+
+LEDGER = Ledger()
@@ -0,0 +1,170 @@
+# logreader.py
+"""
+Четене на bot.log и архивите му за времеви прозорец, без зареждане на
+файловете в паметта. Обикновените файлове се отварят с mmap и началото на
+прозореца се намира с двоично търсене по префикса "YYYY-MM-DD HH:MM:SS"
+(сравнява се като байтове — форматът се сортира лексикографски).
+Компресираните архиви (.gz) се четат поточно ред по ред.
+Редовете без време (traceback и др.) вървят със записа преди тях.
+
+    for line in read_window(datetime.now() - timedelta(hours=24)):
+        ...
+"""
+import glob
+import gzip
+import mmap
+import os
+
+LOG_FILE = "logs/bot.log"
+ARCHIVE_DIR = "logs/archive"
+TS_LEN = 19
+SCAN_WINDOW = 64 * 1024  # под толкова байта двоичното търсене минава в линейно
+
+
+def _ts(line):
+    """Префиксът с времето (bytes) или None за ред без време."""
+    if len(line) >= TS_LEN and line[4:5] == b"-" and line[10:11] == b" " and line[13:14] == b":" \
+            and line[:4].isdigit():
+        return line[:TS_LEN]
+    return None
+
+
+def _key(moment):
+    if moment is None:
+        return None
+    if isinstance(moment, bytes):
+        return moment
+    return moment.strftime("%Y-%m-%d %H:%M:%S").encode()
+
+
+def _next_stamped(mm, pos):
+    """(начало, време) на първия ред с време от pos нататък или (None, None)."""
+    size = len(mm)
+    while pos < size:
+        end = mm.find(b"\n", pos)
+        end = size if end < 0 else end
+        ts = _ts(mm[pos:min(end, pos + TS_LEN)])
+        if ts is not None:
+            return pos, ts
+        pos = end + 1
+    return None, None
+
+
+def seek(mm, key):
+    """Отместване на първия ред с време >= key (len(mm) ако няма такъв)."""
+    lo, hi = 0, len(mm)
+    while hi - lo > SCAN_WINDOW:
+        mid = (lo + hi) // 2
+        nl = mm.find(b"\n", mid, hi)
+        if nl < 0:
+            break
+        pos, ts = _next_stamped(mm, nl + 1)
+        if pos is not None and pos < hi and ts < key:
+            lo = pos
+        else:
+            hi = nl + 1
+    pos = lo
+    while True:
+        pos, ts = _next_stamped(mm, pos)
+        if pos is None:
+            return len(mm)
+        if ts >= key:
+            return pos
+        nl = mm.find(b"\n", pos)
+        if nl < 0:
+            return len(mm)
+        pos = nl + 1
+
+
+def _first_ts(path):
+    """Времето на първия ред на файла (за подреждане на архивите)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    try:
+        with opener(path, "rb") as f:
+            for _ in range(1000):
+                line = f.readline()
+                if not line:
+                    break
+                ts = _ts(line)
+                if ts is not None:
+                    return ts
+    except (OSError, EOFError):
+        pass
+    return None
+
+
+def log_files(log_path=LOG_FILE, archive_dir=ARCHIVE_DIR):
+    """bot.log, ротираните bot.log.N и архивите в logs/archive, подредени по време."""
+    base = os.path.basename(log_path)
+    stem = os.path.splitext(base)[0]
+    paths = set(glob.glob(os.path.join(archive_dir, f"{stem}*.log")))
+    paths |= set(glob.glob(os.path.join(archive_dir, f"{stem}*.log.gz")))
+    paths |= set(glob.glob(log_path + ".*"))
+    paths = [p for p in paths if not p.endswith(".tmp")]
+    dated = [(_first_ts(p), p) for p in paths]
+    ordered = [p for ts, p in sorted((d for d in dated if d[0] is not None))]
+    if os.path.exists(log_path):
+        ordered.append(log_path)
+    return ordered
+
+
+def _lines_mmap(path, start_key):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = seek(mm, start_key) if start_key else 0
+            size = len(mm)
+            while pos < size:
+                nl = mm.find(b"\n", pos)
+                end = size if nl < 0 else nl + 1
+                yield mm[pos:end]
+                pos = end
+
+
+def _lines_gzip(path, start_key):
+    with gzip.open(path, "rb") as f:
+        started = start_key is None
+        for line in f:
+            if not started:
+                ts = _ts(line)
+                if ts is None or ts < start_key:
+                    continue
+                started = True
+            yield line
+
+
+def read_window(start=None, end=None, log_path=LOG_FILE, archive_dir=ARCHIVE_DIR):
+    """
+    Редовете (str) от [start, end) от всички файлове по ред на времето.
+    start/end са datetime (или None = без граница). Припокриването между
+    архив и текущия лог (archive_logs.sh оставя последните редове) се пропуска.
+    """
+    start_key, end_key = _key(start), _key(end)
+    files = log_files(log_path, archive_dir)
+    firsts = [_first_ts(p) for p in files]
+    last_ts = None
+    last_lines = set()
+    for i, path in enumerate(files):
+        following = next((ts for ts in firsts[i + 1:] if ts is not None), None)
+        if start_key and following is not None and following < start_key:
+            continue  # целият файл е преди прозореца
+        reader = _lines_gzip if path.endswith(".gz") else _lines_mmap
+        prev_ts, prev_lines = last_ts, last_lines
+        in_record = False
+        try:
+            for raw in reader(path, start_key):
+                ts = _ts(raw)
+                if ts is not None:
+                    if end_key and ts >= end_key:
+                        return
+                    # Пропускаме редовете, вече прочетени от предишния файл
+                    in_record = not (prev_ts and (ts < prev_ts or (ts == prev_ts and raw in prev_lines)))
+                    if in_record:
+                        if ts != last_ts:
+                            last_ts, last_lines = ts, set()
+                        last_lines.add(raw)
+                if in_record:
+                    yield raw.decode("utf-8", errors="replace")
+        except (OSError, EOFError, ValueError):
+            continue
@@ -4,9 +4,6 @@ import sys
 import os
 import signal
 import logging
-import numpy as np
-import json
-import subprocess
 
 # Настройка на logging
 os.makedirs("logs", exist_ok=True)
@@ -24,27 +21,27 @@ sys.path.append(os.path.dirname(__file__))
 
 from config import *
 from adapters import MEXCSpot, GateIOSpot, KuCoinSpot, CoinExSpot
-from utils import is_safe_market, is_market_trending
 from stats import record_trade, get_trend_7d
-
-# Telegram
-try:
-    from telegram_bot import send_telegram_message
-except ImportError:
-    def send_telegram_message(text):
-        pass
-
-# Android нотификация
-def notify_android(title, content, vibrate=300):
-    try:
-        subprocess.run(
-            ["bash", "notify_android.sh", title, content, str(vibrate)],
-            cwd=os.path.dirname(__file__),
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-    except Exception as e:
-        logger.debug(f"Android нотификация пропусната: {e}")
+from utils import trade_size, order_prices
+from ledger import LEDGER
+from events import EventLogHandler
+from balances import BALANCES
+from batch import fan_out
+from scanner import fetch_balances, rank_symbols, scan_markets
+from kline_store import KLINE_STORE
+from market_stream import MARKET_DATA
+from order_tracker import ORDER_TRACKER
+from grid import GridEngine
+from scheduler import RiskLimits, Scheduler
+from metrics import METRICS
+
+# Структурирани събития за daily_summary (грешките; сделките се записват от stats)
+logger.addHandler(EventLogHandler())
+
+# Нотификации — само опашка; изпращането е във фонова нишка (notifier.py)
+from notifier import NOTIFIER
+send_telegram_message = NOTIFIER.telegram
+notify_android = NOTIFIER.android
 
 # Активни борси
 EXCHANGES = [
@@ -53,59 +50,46 @@ EXCHANGES = [
     KuCoinSpot(),
     CoinExSpot()
 ]
+if ASYNC_ADAPTERS:
+    # aiohttp транспорт зад синхронна обвивка — останалият код не се променя
+    from async_adapters import aiohttp, SyncAdapter, ASYNC_EXCHANGES
+    if aiohttp is not None:
+        EXCHANGES = [SyncAdapter(cls()) for cls in ASYNC_EXCHANGES]
+    else:
+        logger.info("ℹ️ aiohttp не е инсталиран — използват се синхронните адаптери.")
 
-last_trade_timestamp = 0
 last_balance_report = 0
 error_log = []
 
 # Константи
-MIN_ABS_PROFIT_USD = 0.02
-MAX_RISK_PERCENT = 0.2
 BALANCE_REPORT_INTERVAL = 6 * 3600      # 6 часа
 PNL_REPORT_INTERVAL = 24 * 3600         # 24 часа
-PNL_FILE = "logs/pnl.json"
 
 # --- ФУНКЦИЯ: Зареждане или инициализация на P&L данни ---
 def load_or_init_pnl():
-    try:
-        with open(PNL_FILE, "r") as f:
-            data = json.load(f)
-            if "initial_balance" not in data or "last_pnl_report" not in 
-                raise ValueError("Invalid PnL file")
-            return data
-    except Exception as e:
-        logger.info("🆕 Инициализиране на P&L данни...")
-        total = 0.0
-        for ex in EXCHANGES:
-            if ex.is_active():
-                try:
-                    total += ex.get_balance("USDT")
-                except:
-                    pass
-        data = {
-            "initial_balance": total,
-            "last_pnl_report": time.time(),
-            "last_balance": total
-        }
-        os.makedirs("logs", exist_ok=True)
-        with open(PNL_FILE, "w") as f:
-            json.dump(data, f)
+    data = LEDGER.state()
+    if "initial_balance" in data and "last_pnl_report" in data:
         return data
+    logger.info("🆕 Инициализиране на P&L данни...")
+    active = [ex for ex in EXCHANGES if ex.is_active()]
+    total = sum(b.get("USDT", 0.0) for b in BALANCES.snapshot(active).values())
+    data = {
+        "initial_balance": total,
+        "last_pnl_report": time.time(),
+        "last_balance": total
+    }
+    save_pnl(data)
+    return data
 
 def save_pnl(data):
-    with open(PNL_FILE, "w") as f:
-        json.dump(data, f)
+    LEDGER.set_state(**data)
 
 # --- ФУНКЦИЯ: Отчет за P&L с тренд ---
 def report_pnl():
     pnl_data = load_or_init_pnl()
-    current_total = 0.0
-    for ex in EXCHANGES:
-        if ex.is_active():
-            try:
-                current_total += ex.get_balance("USDT")
-            except Exception as e:
-                logger.warning(f"P&L: грешка при {ex.name}: {e}")
+    active = [ex for ex in EXCHANGES if ex.is_active()]
+    snapshot = BALANCES.snapshot(active, on_error=lambda ex, e: logger.warning(f"P&L: грешка при {ex.name}: {e}"))
+    current_total = sum(b.get("USDT", 0.0) for b in snapshot.values())
 
     initial = pnl_data["initial_balance"]
     profit = current_total - initial
@@ -137,16 +121,15 @@ def report_pnl():
 def report_balances():
     total_usdt = 0.0
     report_lines = ["📊 **Текущи баланси по борси:**"]
-    for ex in EXCHANGES:
-        if not ex.is_active():
-            continue
-        try:
-            balance = ex.get_balance("USDT")
-            total_usdt += balance
-            report_lines.append(f"• {ex.name}: {balance:.2f} USDT")
-        except Exception as e:
+    active = [ex for ex in EXCHANGES if ex.is_active()]
+    snapshot = BALANCES.snapshot(active, on_error=lambda ex, e: logger.warning(f"Баланс грешка за {ex.name}: {e}"))
+    for ex in active:
+        if ex.name not in snapshot:
             report_lines.append(f"• {ex.name}: ❌ грешка")
-            logger.warning(f"Баланс грешка за {ex.name}: {e}")
+            continue
+        balance = snapshot[ex.name].get("USDT", 0.0)
+        total_usdt += balance
+        report_lines.append(f"• {ex.name}: {balance:.2f} USDT")
     
     report_lines.append(f"\n💰 **Общо USDT: {total_usdt:.2f}**")
     full_report = "\n".join(report_lines)
@@ -170,78 +153,236 @@ def retry(func, max_retries=3, delay=5):
         except Exception as e:
             if i == max_retries - 1:
                 raise e
+            METRICS.inc("call_retries_total")
             logger.warning(f"🔁 Опит {i+1}... Грешка: {e}")
             time.sleep(delay)
     return None
 
+def on_balance_error(ex, e):
+    logger.error(f"⚠️ {ex.name} грешка при баланс: {e}")
+    send_telegram_message(f"⚠️ {ex.name}: грешка баланс")
+
 def select_best_symbol_for_exchange(exchange):
-    best_symbol = None
-    best_score = -1
-    for sym in TRADE_SYMBOLS:
-        try:
-            klines = retry(lambda: exchange.get_klines(sym, "1h", 50))
-            if not klines or len(klines) < 20:
-                continue
-            if not (is_safe_market(klines) and is_market_trending(klines)):
-                continue
-            volatility = np.std(np.diff(np.log(klines)))
-            if volatility > best_score:
-                best_score = volatility
-                best_symbol = sym
-        except Exception as e:
-            logger.warning(f"⚠️ Грешка при анализ на {sym}: {e}")
-    return best_symbol
+    ranked = rank_symbols(exchange, TRADE_SYMBOLS, retry_fn=retry)
+    return ranked[0][0] if ranked else None
 
 def select_best_exchange():
-    candidates = []
-    for ex in EXCHANGES:
-        if not ex.is_active():
-            continue
-        try:
-            balance = retry(lambda: ex.get_balance("USDT"))
-            if balance < MIN_TRADE_USDT:
-                continue
-            candidates.append((ex, balance))
-        except Exception as e:
-            logger.error(f"⚠️ {ex.name} грешка при баланс: {e}")
-            send_telegram_message(f"⚠️ {ex.name}: грешка баланс")
+    candidates = [
+        (ex, balance)
+        for ex, balance in fetch_balances(EXCHANGES, retry_fn=retry, on_error=on_balance_error)
+        if balance >= MIN_TRADE_USDT
+    ]
     return max(candidates, key=lambda x: x[1]) if candidates else (None, 0)
 
 def cancel_all_orders(exchange, symbol=None):
+    """Отменя отворените поръчки за символа (или за всички TRADE_SYMBOLS) с пакетните заявки на борсата."""
     try:
-        orders = exchange.get_open_orders(symbol)
-        for order in orders:
-            exchange.cancel_order(symbol, order["orderId"])
-            logger.info(f"❌ Отменена поръчка {order['orderId']}")
+        for order_id in exchange.cancel_all_orders([symbol] if symbol else TRADE_SYMBOLS):
+            logger.info(f"❌ Отменена поръчка {order_id} ({exchange.name})")
     except Exception as e:
-        logger.error(f"Грешка при отмяна: {e}")
+        logger.error(f"Грешка при отмяна ({exchange.name}): {e}")
 
 def graceful_shutdown(signum, frame):
     logger.info("🛑 Получен сигнал за спиране. Отмяна на всички поръчки...")
-    for ex in EXCHANGES:
-        try:
-            cancel_all_orders(ex)
-        except:
-            pass
+    SCHEDULER.stop()
+    try:
+        KLINE_STORE.save_indicators()
+    except Exception as e:
+        logger.warning(f"⚠️ Състоянието на индикаторите не е записано: {e}")
+    # Всички борси едновременно — спирането не чака борса след борса
+    fan_out(cancel_all_orders, [(ex,) for ex in EXCHANGES])
     send_telegram_message("🔴 Ботът спря коректно.")
+    NOTIFIER.flush()
+    try:
+        METRICS.dump()
+    except Exception:
+        pass
     sys.exit(0)
 
+# --- СТРАТЕГИИ (по един работник за борса/символ, виж scheduler.py) ---
+def run_grid(worker):
+    """Стартира grid за работника; после той живее от събитията за изпълнение."""
+    if worker.state is not None:
+        return CHECK_INTERVAL
+    exchange, symbol = worker.exchange, worker.symbol
+    engine = GridEngine(exchange, symbol, notify=send_telegram_message, risk=RISK)
+    required = engine.required_usdt()
+    if not RISK.reserve(exchange.name, required, worker.balance):
+        logger.info(f"⏸️ {exchange.name} | {symbol}: рисковият лимит не позволява нов grid.")
+        return 600
+    try:
+        engine.start(worker.allocation)
+    except Exception as e:
+        # Неуспешен старт (баланс, минимум, нито една приета поръчка, мрежа) освобождава резерва
+        RISK.release(exchange.name, required)
+        logger.warning(f"❌ Grid не може да стартира ({exchange.name} | {symbol}): {e}")
+        return 600
+    worker.state = engine
+    if worker.stopped:
+        # Планировчикът е спрял работника по време на старта — stop_grid вече е минал без grid
+        stop_grid(worker)
+        return 600
+    msg = f"🧱 Grid стартиран: {exchange.name} | {symbol} | {engine.levels} нива × {engine.order_usdt} USDT"
+    logger.info(msg)
+    send_telegram_message(msg)
+    return CHECK_INTERVAL
+
+def stop_grid(worker):
+    engine = worker.state
+    if engine is not None:
+        engine.stop()
+        # Печалбата от двойките вече е в RISK (record_pnl при всяко изпълнение)
+        RISK.release(worker.exchange.name, engine.required_usdt())
+        worker.state = None
+
+def run_round_trip(worker):
+    """Една покупка → продажба; връща секунди до следващия опит."""
+    exchange, symbol, balance = worker.exchange, worker.symbol, worker.allocation
+    if too_many_errors():
+        return 3600
+
+    signal_at = time.monotonic()
+    symbol_info = exchange.get_symbol_info(symbol)
+    current_price = exchange.get_price(symbol)
+
+    trade_usdt, qty = trade_size(balance, current_price, symbol_info["quantity_precision"])
+    if qty < symbol_info["min_qty"]:
+        logger.warning(f"❌ Количеството {qty} е под минимума {symbol_info['min_qty']}")
+        return 600
+
+    maker_fee = getattr(exchange, 'maker_fee', 0.001)
+    ticker = exchange.get_ticker(symbol)
+    buy_price, sell_price = order_prices(float(ticker["bidPrice"]), float(ticker["askPrice"]), trade_usdt,
+                                         symbol_info["price_precision"], maker_fee)
+
+    if buy_price <= 0 or sell_price <= buy_price:
+        logger.warning("⚠️ Невалидни цени за поръчка.")
+        return 600
+
+    if not RISK.reserve(exchange.name, trade_usdt, worker.balance):
+        logger.info(f"⏸️ {exchange.name} | {symbol}: рисковият лимит не позволява нова сделка.")
+        return 600
+    real_profit = 0.0
+    try:
+        msg = f"📈 {exchange.name} | {symbol} | Баланс: {balance:.2f} USDT | Цел: ≥${MIN_ABS_PROFIT_USD}"
+        logger.info(msg)
+        send_telegram_message(msg)
+
+        # ПОКУПКА
+        buy_resp = retry(lambda: exchange.place_order(symbol, "BUY", buy_price, qty))
+        if not buy_resp or (isinstance(buy_resp, dict) and buy_resp.get("code", 0) != 0):
+            err = f"❌ Грешка при покупка: {buy_resp}"
+            logger.error(err)
+            send_telegram_message(f"❌ BUY грешка ({exchange.name})")
+            record_error()
+            return 600
+
+        order_id = buy_resp.get("orderId")
+        METRICS.observe("signal_to_order_seconds", time.monotonic() - signal_at, exchange=exchange.name)
+        filled_qty = 0
+        filled_price = 0
+        logger.info(f"⏳ Очакване за изпълнение на поръчка {order_id}...")
+
+        # Връща се веднага при събитие от частния поток (иначе адаптивно REST допитване)
+        buy_order = ORDER_TRACKER.track(exchange, symbol, order_id, side="BUY")
+        status = ORDER_TRACKER.wait(buy_order)
+        if status == "filled":
+            filled_qty = buy_order.filled_qty
+            filled_price = buy_order.avg_price or buy_price
+            if filled_qty <= 0:
+                try:
+                    trades = exchange.get_my_trades(symbol, order_id)
+                    filled_qty = sum(float(t["qty"]) for t in trades)
+                    total_cost = sum(float(t["quoteQty"]) for t in trades)
+                    filled_price = total_cost / filled_qty if filled_qty > 0 else buy_price
+                except Exception as e:
+                    logger.warning(f"⚠️ Проблем при проверка на статус: {e}")
+        elif status in ("canceled", "rejected"):
+            logger.warning(f"🛒 Поръчката е {status}. Пропускам сделка.")
+
+        if filled_qty <= 0:
+            logger.warning("⚠️ Поръчката не е изпълнена. Отмяна.")
+            try:
+                exchange.cancel_order(symbol, order_id)
+            except:
+                pass
+            return 600
+
+        # ПРОДАЖБА
+        sell_qty = round(filled_qty, symbol_info["quantity_precision"])
+        sell_resp = retry(lambda: exchange.place_order(symbol, "SELL", sell_price, sell_qty))
+        if not sell_resp or (isinstance(sell_resp, dict) and sell_resp.get("code", 0) != 0):
+            logger.error(f"❌ Грешка при продажба: {sell_resp}")
+            send_telegram_message(f"❌ SELL грешка ({exchange.name})")
+            record_error()
+            return 600
+
+        sell_order_id = sell_resp.get("orderId")
+        sell_order = ORDER_TRACKER.track(exchange, symbol, sell_order_id, side="SELL")
+        status = ORDER_TRACKER.wait(sell_order)
+        if status in ("canceled", "rejected"):
+            logger.warning(f"💰 Продажбата е {status}. Неуспешна.")
+
+        # Реална печалба
+        try:
+            buy_trades = exchange.get_my_trades(symbol, order_id)
+            sell_trades = exchange.get_my_trades(symbol, sell_order_id)
+            total_buy_cost = sum(float(t["quoteQty"]) for t in buy_trades)
+            total_sell_revenue = sum(float(t["quoteQty"]) for t in sell_trades)
+            real_profit = total_sell_revenue - total_buy_cost
+            success = True
+        except Exception as e:
+            real_profit = (sell_price - filled_price) * filled_qty
+            success = True
+            logger.warning(f"⚠️ Използвам оценена печалба: {e}")
+
+        # 🔔 НОТИФИКАЦИЯ + ЗАПИС НА СТАТИСТИКА
+        success_msg = f"✅ Успех!\n{exchange.name} | {symbol}\nПечалба: {real_profit:.4f} USDT"
+        logger.info(success_msg)
+        send_telegram_message(success_msg)
+        notify_android("✅ Печалба!", f"+${real_profit:.3f} от {symbol}", 500)
+        record_trade(real_profit, success=success, exchange=exchange.name, symbol=symbol)
+    finally:
+        RISK.release(exchange.name, trade_usdt, real_profit)
+
+    # 1 час между сделките на един работник
+    return 3600
+
+RISK = RiskLimits()
+SCHEDULER = (Scheduler(run_grid, on_stop=stop_grid, risk=RISK) if GRID_ENABLED
+             else Scheduler(run_round_trip, risk=RISK))
+
 # --- ОСНОВЕН ЦИКЪЛ ---
 def main():
-    global last_trade_timestamp, last_balance_report
+    global last_balance_report
     signal.signal(signal.SIGINT, graceful_shutdown)
     signal.signal(signal.SIGTERM, graceful_shutdown)
 
     logger.info("🚀 Ботът стартира...")
     send_telegram_message("🟢 Ботът е активен! Готов за търговия.")
 
+    # Поточните индикатори продължават от последното състояние
+    KLINE_STORE.load_indicators()
+
+    # WebSocket потоци за bid/ask и свещи (при липса → REST)
+    MARKET_DATA.start(EXCHANGES, TRADE_SYMBOLS)
+    ORDER_TRACKER.start_streams(EXCHANGES, TRADE_SYMBOLS)
+
     # Инициализираме P&L при стартиране
     load_or_init_pnl()
     time.sleep(2)
     report_balances()
 
+    # Локален /metrics (Prometheus) — латентности, изпълнения, повторения
+    try:
+        if METRICS.serve():
+            logger.info(f"📊 Метрики на http://127.0.0.1:{METRICS_PORT}/metrics")
+    except OSError as e:
+        logger.warning(f"⚠️ /metrics не стартира: {e}")
+
     while True:
         try:
+            loop_start = time.monotonic()
             # Периодичен отчет за баланс
             if time.time() - last_balance_report > BALANCE_REPORT_INTERVAL:
                 report_balances()
@@ -259,145 +400,24 @@ def main():
                 time.sleep(3600)
                 continue
 
-            exchange, balance = select_best_exchange()
-            if not exchange:
+            # Едно паралелно сканиране: баланси + свещи + тикери за всички борси/символи
+            funded, candidates = scan_markets(EXCHANGES, TRADE_SYMBOLS, retry_fn=retry,
+                                              on_balance_error=on_balance_error)
+            KLINE_STORE.save_indicators()
+            if not funded and not SCHEDULER.workers():
                 logger.warning("❌ Няма активна борса с достатъчен баланс.")
                 time.sleep(600)
                 continue
 
-            if time.time() - last_trade_timestamp < 3600:
-                logger.info("⏳ Чакам до следваща възможност (1 час между сделки)...")
-                time.sleep(600)
-                continue
-
-            symbol = select_best_symbol_for_exchange(exchange)
-            if not symbol:
+            if not candidates and not SCHEDULER.workers():
                 logger.warning("❌ Няма подходящ символ за търговия.")
                 time.sleep(1800)
                 continue
 
-            symbol_info = exchange.get_symbol_info(symbol)
-            current_price = exchange.get_price(symbol)
-
-            risk_pct = min(RISK_PERCENT, MAX_RISK_PERCENT)
-            trade_usdt = max(MIN_TRADE_USDT, balance * risk_pct)
-
-            qty_raw = trade_usdt / current_price
-            qty = round(qty_raw, symbol_info["quantity_precision"])
-            if qty < symbol_info["min_qty"]:
-                logger.warning(f"❌ Количеството {qty} е под минимума {symbol_info['min_qty']}")
-                time.sleep(600)
-                continue
-
-            maker_fee = getattr(exchange, 'maker_fee', 0.001)
-            min_profit_pct = (MIN_ABS_PROFIT_USD / trade_usdt) + 2 * maker_fee
-            profit_margin = max(PROFIT_TARGET, min_profit_pct, 0.003)
-
-            ticker = exchange.get_ticker(symbol)
-            bid = float(ticker["bidPrice"])
-            ask = float(ticker["askPrice"])
-            spread_pct = (ask - bid) / ask if ask > 0 else 0.001
-
-            buy_price_raw = bid * (1 - min(0.001, spread_pct * 2))
-            buy_price = round(buy_price_raw, symbol_info["price_precision"])
-            sell_price_raw = buy_price * (1 + profit_margin)
-            sell_price = round(sell_price_raw, symbol_info["price_precision"])
-
-            if buy_price <= 0 or sell_price <= buy_price:
-                logger.warning("⚠️ Невалидни цени за поръчка.")
-                time.sleep(600)
-                continue
-
-            msg = f"📈 {exchange.name} | {symbol} | Баланс: {balance:.2f} USDT | Цел: ≥${MIN_ABS_PROFIT_USD}"
-            logger.info(msg)
-            send_telegram_message(msg)
-
-            # ПОКУПКА
-            buy_resp = retry(lambda: exchange.place_order(symbol, "BUY", buy_price, qty))
-            if not buy_resp or (isinstance(buy_resp, dict) and buy_resp.get("code", 0) != 0):
-                err = f"❌ Грешка при покупка: {buy_resp}"
-                logger.error(err)
-                send_telegram_message(f"❌ BUY грешка ({exchange.name})")
-                record_error()
-                time.sleep(600)
-                continue
-
-            order_id = buy_resp.get("orderId")
-            filled_qty = 0
-            filled_price = 0
-            logger.info(f"⏳ Очакване за изпълнение на поръчка {order_id}...")
-
-            for attempt in range(40):
-                time.sleep(30)
-                try:
-                    status = exchange.get_order_status(symbol, order_id)
-                    if status == "filled":
-                        trades = exchange.get_my_trades(symbol, order_id)
-                        if trades:
-                            total_qty = sum(float(t["qty"]) for t in trades)
-                            total_cost = sum(float(t["quoteQty"]) for t in trades)
-                            filled_qty = total_qty
-                            filled_price = total_cost / total_qty if total_qty > 0 else buy_price
-                        break
-                    elif status in ("canceled", "rejected"):
-                        logger.warning(f"🛒 Поръчката е {status}. Пропускам сделка.")
-                        break
-                except Exception as e:
-                    logger.warning(f"⚠️ Проблем при проверка на статус: {e}")
-
-            if filled_qty <= 0:
-                logger.warning("⚠️ Поръчката не е изпълнена. Отмяна.")
-                try:
-                    exchange.cancel_order(symbol, order_id)
-                except:
-                    pass
-                time.sleep(600)
-                continue
-
-            # ПРОДАЖБА
-            sell_qty = round(filled_qty, symbol_info["quantity_precision"])
-            sell_resp = retry(lambda: exchange.place_order(symbol, "SELL", sell_price, sell_qty))
-            if not sell_resp or (isinstance(sell_resp, dict) and sell_resp.get("code", 0) != 0):
-                logger.error(f"❌ Грешка при продажба: {sell_resp}")
-                send_telegram_message(f"❌ SELL грешка ({exchange.name})")
-                record_error()
-                time.sleep(600)
-                continue
-
-            sell_order_id = sell_resp.get("orderId")
-            for attempt in range(40):
-                time.sleep(30)
-                try:
-                    status = exchange.get_order_status(symbol, sell_order_id)
-                    if status == "filled":
-                        break
-                    elif status in ("canceled", "rejected"):
-                        logger.warning(f"💰 Продажбата е {status}. Неуспешна.")
-                        break
-                except Exception as e:
-                    logger.warning(f"⚠️ Грешка при проверка на продажба: {e}")
-
-            # Реална печалба
-            try:
-                buy_trades = exchange.get_my_trades(symbol, order_id)
-                sell_trades = exchange.get_my_trades(symbol, sell_order_id)
-                total_buy_cost = sum(float(t["quoteQty"]) for t in buy_trades)
-                total_sell_revenue = sum(float(t["quoteQty"]) for t in sell_trades)
-                real_profit = total_sell_revenue - total_buy_cost
-                success = True
-            except Exception as e:
-                real_profit = (sell_price - filled_price) * filled_qty
-                success = True
-                logger.warning(f"⚠️ Използвам оценена печалба: {e}")
-
-            # 🔔 НОТИФИКАЦИЯ + ЗАПИС НА СТАТИСТИКА
-            success_msg = f"✅ Успех!\n{exchange.name} | {symbol}\nПечалба: {real_profit:.4f} USDT"
-            logger.info(success_msg)
-            send_telegram_message(success_msg)
-            notify_android("✅ Печалба!", f"+${real_profit:.3f} от {symbol}", 500)
-            record_trade(real_profit, success=success)
-
-            last_trade_timestamp = time.time()
+            # Работник за най-добрите символи на всяка финансирана борса
+            SCHEDULER.sync(funded, candidates)
+            METRICS.observe("loop_seconds", time.monotonic() - loop_start)
+            METRICS.dump()
             time.sleep(CHECK_INTERVAL)
 
         except KeyboardInterrupt:
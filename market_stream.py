@@ -0,0 +1,296 @@
+# market_stream.py
+"""
+WebSocket пазарни данни: най-добри bid/ask и свещи в паметта.
+get_ticker()/get_price() на адаптерите четат оттук и падат обратно на REST,
+ако потокът липсва или котировката е по-стара от WS_STALE_AFTER.
+Нужен е пакетът websocket-client; без него всичко минава през REST.
+"""
+import itertools
+import json
+import logging
+import threading
+import time
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+from config import WS_ENABLED, WS_STALE_AFTER, WS_URLS
+from http_pool import get_session
+from kline_store import KLINE_STORE
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataCache:
+    """Последните bid/ask по (борса, символ), символите са във вида "BTC/USDT"."""
+
+    def __init__(self):
+        self._tickers = {}
+        self._lock = threading.Lock()
+
+    def put_ticker(self, exchange, symbol, bid, ask):
+        with self._lock:
+            self._tickers[(exchange, symbol)] = (str(bid), str(ask), time.time())
+
+    def ticker(self, exchange, symbol, max_age=WS_STALE_AFTER):
+        with self._lock:
+            entry = self._tickers.get((exchange, symbol))
+        if entry is None or time.time() - entry[2] > max_age:
+            return None
+        return {"bidPrice": entry[0], "askPrice": entry[1]}
+
+
+class WebSocketFeed:
+    """
+    Един WebSocket поток към борса: абонира се, пази връзката с ping
+    и се свързва наново с нарастваща пауза при прекъсване.
+    """
+    key = None          # ключ в WS_URLS / EXCHANGE_KEYS
+    url = None
+    sep = ""            # разделител в символа на борсата: BTC<sep>USDT
+    ping_interval = 20
+
+    def __init__(self, name, symbols, cache, intervals=("1h",)):
+        self.name = name
+        self.symbols = {s.replace("/", self.sep): s for s in symbols}
+        self.cache = cache
+        self.intervals = list(intervals)
+        self.connected = False
+        self._ids = itertools.count(1)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def endpoint(self):
+        return WS_URLS.get(self.key, self.url)
+
+    def subscriptions(self):
+        return []
+
+    def ping_message(self):
+        return None
+
+    def handle(self, msg):
+        raise NotImplementedError
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"ws-{self.key}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        delay = 1
+        while not self._stop.is_set():
+            try:
+                self._session()
+                delay = 1
+            except Exception as e:
+                logger.warning(f"⚠️ WebSocket {self.name}: {e}. Повторно свързване след {delay}s")
+            self.connected = False
+            self._stop.wait(delay)
+            delay = min(delay * 2, 60)
+
+    def _session(self):
+        ws = websocket.create_connection(self.endpoint(), timeout=self.ping_interval)
+        try:
+            self.connected = True
+            for msg in self.subscriptions():
+                ws.send(json.dumps(msg))
+            last_ping = time.time()
+            while not self._stop.is_set():
+                try:
+                    raw = ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    raw = None
+                if time.time() - last_ping >= self.ping_interval:
+                    ping = self.ping_message()
+                    if ping:
+                        ws.send(json.dumps(ping))
+                    last_ping = time.time()
+                if not raw:
+                    continue
+                try:
+                    self.handle(json.loads(raw))
+                except (KeyError, IndexError, TypeError, ValueError) as e:
+                    logger.debug(f"WebSocket {self.name}: непознато съобщение {raw[:200]}: {e}")
+        finally:
+            ws.close()
+
+    def _kline(self, symbol, interval, row):
+        KLINE_STORE.push(self.name, symbol, interval, [float(x) for x in row])
+
+
+class MEXCFeed(WebSocketFeed):
+    key = "mexc"
+    url = "wss://wbs.mexc.com/ws"
+    intervals_map = {"1h": "Min60", "4h": "Hour4", "1d": "Day1"}
+
+    def subscriptions(self):
+        params = [f"spot@public.bookTicker.v3.api@{s}" for s in self.symbols]
+        params += [f"spot@public.kline.v3.api@{s}@{self.intervals_map[i]}"
+                   for s in self.symbols for i in self.intervals]
+        return [{"method": "SUBSCRIPTION", "params": params}]
+
+    def ping_message(self):
+        return {"method": "PING"}
+
+    def handle(self, msg):
+        channel = msg.get("c", "")
+        if not channel:
+            return
+        symbol = self.symbols[msg["s"]]
+        data = msg["d"]
+        if "bookTicker" in channel:
+            self.cache.put_ticker(self.name, symbol, data["b"], data["a"])
+        elif "kline" in channel:
+            k = data["k"]
+            interval = {v: i for i, v in self.intervals_map.items()}[k["i"]]
+            # REST свещите на MEXC са в милисекунди
+            self._kline(symbol, interval, [float(k["t"]) * 1000, k["o"], k["h"], k["l"], k["c"], k["v"]])
+
+
+class GateIOFeed(WebSocketFeed):
+    key = "gateio"
+    url = "wss://api.gateio.ws/ws/v4/"
+    sep = "_"
+
+    def subscriptions(self):
+        now = int(time.time())
+        msgs = [{"time": now, "channel": "spot.book_ticker", "event": "subscribe", "payload": list(self.symbols)}]
+        for s in self.symbols:
+            for i in self.intervals:
+                msgs.append({"time": now, "channel": "spot.candlesticks", "event": "subscribe", "payload": [i, s]})
+        return msgs
+
+    def ping_message(self):
+        return {"time": int(time.time()), "channel": "spot.ping"}
+
+    def handle(self, msg):
+        if msg.get("event") != "update":
+            return
+        result = msg["result"]
+        if msg["channel"] == "spot.book_ticker":
+            self.cache.put_ticker(self.name, self.symbols[result["s"]], result["b"], result["a"])
+        elif msg["channel"] == "spot.candlesticks":
+            interval, pair = result["n"].split("_", 1)
+            # Като REST: обемът е в котировъчната валута
+            self._kline(self.symbols[pair], interval,
+                        [result["t"], result["o"], result["h"], result["l"], result["c"], result["v"]])
+
+
+class KuCoinFeed(WebSocketFeed):
+    key = "kucoin"
+    url = "https://api.kucoin.com/api/v1/bullet-public"
+    sep = "-"
+    intervals_map = {"1h": "1hour", "4h": "4hour", "1d": "1day"}
+
+    def endpoint(self):
+        if self.key in WS_URLS:
+            return WS_URLS[self.key]
+        # KuCoin изисква временен токен за публичния поток
+        session = get_session("kucoin")
+        data = session.post(self.url, timeout=session.timeout_for("/api/v1/bullet-public")).json()["data"]
+        server = data["instanceServers"][0]
+        self.ping_interval = server["pingInterval"] / 1000
+        return f"{server['endpoint']}?token={data['token']}"
+
+    def subscriptions(self):
+        msgs = [{"id": next(self._ids), "type": "subscribe",
+                 "topic": "/market/ticker:" + ",".join(self.symbols), "response": True}]
+        for i in self.intervals:
+            topics = ",".join(f"{s}_{self.intervals_map[i]}" for s in self.symbols)
+            msgs.append({"id": next(self._ids), "type": "subscribe",
+                         "topic": "/market/candles:" + topics, "response": True})
+        return msgs
+
+    def ping_message(self):
+        return {"id": next(self._ids), "type": "ping"}
+
+    def handle(self, msg):
+        if msg.get("type") != "message":
+            return
+        topic = msg["topic"]
+        data = msg["data"]
+        if topic.startswith("/market/ticker:"):
+            symbol = self.symbols[topic.split(":", 1)[1]]
+            self.cache.put_ticker(self.name, symbol, data["bestBid"], data["bestAsk"])
+        elif topic.startswith("/market/candles:"):
+            pair, kc_interval = data["symbol"], topic.rsplit("_", 1)[1]
+            interval = {v: i for i, v in self.intervals_map.items()}[kc_interval]
+            c = data["candles"]  # [start, open, close, high, low, volume, turnover]
+            self._kline(self.symbols[pair], interval, [c[0], c[1], c[3], c[4], c[2], c[5]])
+
+
+class CoinExFeed(WebSocketFeed):
+    """CoinEx v1 дава само дълбочина → пазим малка локална книга и вадим върха ѝ."""
+    key = "coinex"
+    url = "wss://socket.coinex.com/"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._books = {}
+
+    def subscriptions(self):
+        return [{"method": "depth.subscribe_multi", "params": [[m, 5, "0"] for m in self.symbols],
+                 "id": next(self._ids)}]
+
+    def ping_message(self):
+        return {"method": "server.ping", "params": [], "id": next(self._ids)}
+
+    def handle(self, msg):
+        if msg.get("method") != "depth.update":
+            return
+        clean, depth, market = msg["params"][:3]
+        book = self._books.setdefault(market, {"bids": {}, "asks": {}})
+        for side in ("bids", "asks"):
+            if clean:
+                book[side] = {}
+            for price, qty in depth.get(side, []):
+                if float(qty) == 0:
+                    book[side].pop(price, None)
+                else:
+                    book[side][price] = qty
+        if book["bids"] and book["asks"]:
+            bid = max(book["bids"], key=float)
+            ask = min(book["asks"], key=float)
+            self.cache.put_ticker(self.name, self.symbols[market], bid, ask)
+
+
+FEEDS = {"MEXC": MEXCFeed, "Gate.io": GateIOFeed, "KuCoin": KuCoinFeed, "CoinEx": CoinExFeed}
+
+
+class MarketData:
+    """Управлява потоците за всички борси и споделения кеш."""
+
+    def __init__(self):
+        self.cache = MarketDataCache()
+        self.feeds = {}
+
+    def start(self, exchanges, symbols, intervals=("1h",)):
+        if not WS_ENABLED:
+            return
+        if websocket is None:
+            logger.info("ℹ️ websocket-client не е инсталиран — пазарните данни идват само през REST.")
+            return
+        for ex in exchanges:
+            feed_cls = FEEDS.get(ex.name)
+            if feed_cls is None or ex.name in self.feeds:
+                continue
+            feed = feed_cls(ex.name, symbols, self.cache, intervals)
+            feed.start()
+            self.feeds[ex.name] = feed
+
+    def stop(self):
+        for feed in self.feeds.values():
+            feed.stop()
+        self.feeds = {}
+
+    def ticker(self, exchange, symbol):
+        """Свежа котировка от потока или None (→ REST)."""
+        return self.cache.ticker(exchange, symbol)
+
+
+MARKET_DATA = MarketData()
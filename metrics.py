@@ -0,0 +1,195 @@
+# metrics.py
+"""
+Метрики на горещия път: латентност на заявките по борса/ендпойнт,
+сигнал → поръчка, поръчка → изпълнение, повторения и продължителност
+на итерацията на main(). Хистограмите са с фиксирани кофи (както в
+Prometheus) — запис е един bisect и събиране под заключване.
+
+Изнасяне:
+- GET /metrics на METRICS_PORT (текстов формат на Prometheus, само 127.0.0.1);
+- компактен JSON (брой, p50, p95, сума) в METRICS_DUMP_FILE за преглед
+  на телефона: python metrics.py
+"""
+import bisect
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_PORT, METRICS_DUMP_FILE
+
+PREFIX = "bot_"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1200, 3600)
+HELP = {
+    "request_seconds": "Латентност на HTTP заявките (session = HTTP сесията на борсата)",
+    "requests_total": "HTTP заявки по сесия, ендпойнт и код на отговора",
+    "signal_to_order_seconds": "От решението за сделка до приета поръчка",
+    "order_fill_seconds": "От приемане на поръчката до пълното ѝ изпълнение",
+    "loop_seconds": "Продължителност на една итерация на основния цикъл",
+    "call_retries_total": "Повторения след грешка (retry в main)",
+    "rate_limit_retries_total": "Повторно изпратени заявки след 429/418",
+}
+
+# ID на поръчки в пътя (/spot/orders/123, /api/v1/orders/5c35...) → {id}, за да не растат етикетите
+_ID = re.compile(r"\d+|[0-9a-f]{16,}")
+
+
+def endpoint(path):
+    return "/".join("{id}" if _ID.fullmatch(seg) else seg for seg in path.split("/"))
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # последната кофа е +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Оценка по кофите (линейно в кофата) — за компактния отчет."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= target:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (target - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+def _labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self._histograms = {}   # (име, етикети) → Histogram
+        self._counters = {}     # (име, етикети) → число
+        self._lock = threading.Lock()
+        self._server = None
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self):
+        """Текстов формат на Prometheus (version 0.0.4)."""
+        with self._lock:
+            histograms = [(k, list(h.counts), h.sum, h.count, h.buckets) for k, h in self._histograms.items()]
+            counters = list(self._counters.items())
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), counts, total, count, buckets in sorted(histograms, key=lambda h: h[0]):
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{PREFIX}{name}_bucket{_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_bucket{_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters):
+            describe(name, "counter")
+            lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Компактно: {име: {"етикети": [брой, p50, p95, сума]}} и броячите."""
+        with self._lock:
+            result = {}
+            for (name, labels), hist in sorted(self._histograms.items()):
+                p50, p95 = hist.quantile(0.5), hist.quantile(0.95)
+                result.setdefault(name, {})[" ".join(str(v) for _, v in labels) or "-"] = [
+                    hist.count, round(p50, 4), round(p95, 4), round(hist.sum, 3)]
+            for (name, labels), value in sorted(self._counters.items()):
+                result.setdefault(name, {})[" ".join(str(v) for _, v in labels) or "-"] = value
+            return result
+
+    def dump(self, path=METRICS_DUMP_FILE):
+        """Записва snapshot() атомарно (tmp + rename)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        """Пуска /metrics във фонова нишка (port = 0 → изключено)."""
+        if not port or self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return self._server
+
+
+METRICS = Metrics()
+
+
+def print_dump(path=METRICS_DUMP_FILE):
+    """Кратък отчет от последния dump (за терминала на телефона)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for name, series in data.items():
+        print(f"📊 {name}")
+        for labels, value in series.items():
+            if isinstance(value, list):
+                count, p50, p95, _ = value
+                print(f"   {labels:<40} n={count:<6} p50={p50:.3f}s p95={p95:.3f}s")
+            else:
+                print(f"   {labels:<40} {value}")
+
+
+if __name__ == "__main__":
+    print_dump()
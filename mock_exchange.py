@@ -0,0 +1,914 @@
+# mock_exchange.py
+"""
+Локален заместител на REST API-тата на MEXC, Gate.io, KuCoin и CoinEx
+(само stdlib) за възпроизводими тестове и бенчмаркове на адаптерите и main().
+
+Всяка борса е отделен HTTP сървър със своя диалект (пътища, имена на
+символи, формат на отговорите и грешките) за ендпойнтите, които ползват
+адаптерите. Зад него стои MatchingEngine: книга с лимитни поръчки
+(цена → време), баланси, maker/taker такси и синтетичен пазар — случайно
+блуждаене с фиксиран seed, което изпълнява чакащите поръчки частично,
+според наличната ликвидност на всяка стъпка.
+Закъснението и инжектираните грешки (429 с Retry-After, 500, 503, timeout)
+се задават за всеки сървър. Подписите не се проверяват.
+
+    servers = start_mock_exchanges(latency=(0.02, 0.08), errors={"429": 0.01})
+    # в config.py: REST_URLS = rest_urls(servers); WS_ENABLED = False
+
+    python mock_exchange.py --latency 0.02 0.08 --error 429=0.01 --error 500=0.005
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from config import TRADE_SYMBOLS
+
+START_PRICES = {"BTC": 60000.0, "ETH": 3000.0, "SOL": 150.0, "XRP": 0.5, "DOGE": 0.1}
+HISTORY_HOURS = 1200
+EPS = 1e-12
+
+
+def _s(x):
+    """Число като низ без експонента (както го връщат борсите)."""
+    text = f"{x:.10f}".rstrip("0").rstrip(".")
+    return text if text not in ("", "-0") else "0"
+
+
+class EngineError(Exception):
+    """reason: balance / not_found / invalid — всеки диалект го превежда в своята грешка."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class Order:
+    def __init__(self, order_id, symbol, side, price, qty):
+        self.id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.price = price
+        self.qty = qty
+        self.filled = 0.0
+        self.quote = 0.0
+        self.fee = 0.0
+        self.status = "open"    # open / filled / canceled
+        self.ts = time.time()
+        self.updated = self.ts
+        self.trades = []
+
+    @property
+    def remaining(self):
+        return max(self.qty - self.filled, 0.0)
+
+
+class Market:
+    def __init__(self, symbol, price, rng, volatility):
+        self.symbol = symbol
+        self.base, self.quote = symbol.split("/")
+        self.price = price
+        magnitude = int(math.floor(math.log10(price)))
+        self.price_precision = max(5 - magnitude, 0)
+        self.qty_precision = max(magnitude + 2, 0)
+        self.bids = []   # чакащи BUY, най-високата цена първа
+        self.asks = []   # чакащи SELL, най-ниската цена първа
+        self.candles = self._history(rng, volatility * 30)
+
+    def _history(self, rng, hourly_vol):
+        """Часови свещи назад във времето, завършващи на текущата цена."""
+        hour = int(time.time() // 3600) * 3600
+        close = self.price
+        rows = []
+        for k in range(HISTORY_HOURS):
+            open_ = close / math.exp(rng.gauss(0, hourly_vol))
+            wick = abs(rng.gauss(0, hourly_vol / 2))
+            rows.append([hour - k * 3600, open_, max(open_, close) * (1 + wick), min(open_, close) * (1 - wick),
+                         close, rng.uniform(50, 500) * 1000 / self.price])
+            close = open_
+        rows.reverse()
+        return rows
+
+    def update_candle(self, volume):
+        hour = int(time.time() // 3600) * 3600
+        last = self.candles[-1]
+        if last[0] < hour:
+            self.candles.append([hour, last[4], max(last[4], self.price), min(last[4], self.price), self.price, 0.0])
+            last = self.candles[-1]
+        last[2] = max(last[2], self.price)
+        last[3] = min(last[3], self.price)
+        last[4] = self.price
+        last[5] += volume
+
+
+class MatchingEngine:
+    """
+    Сметка и книга с поръчки за една борса. Входяща поръчка се среща първо
+    с чакащите насрещни (цена → време), после със синтетичната котировка
+    (bid/ask около цената, до liquidity USDT), а остатъкът чака в книгата.
+    tick() мести цената и изпълнява чакащите поръчки, до които е стигнала.
+    Таксата е в получения актив (BUY → базовия, SELL → USDT).
+    """
+
+    def __init__(self, symbols=TRADE_SYMBOLS, balances=None, maker_fee=0.001, taker_fee=0.001, spread=0.0005,
+                 volatility=0.0005, liquidity=200.0, seed=0):
+        self.rng = random.Random(seed)
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.spread = spread
+        self.volatility = volatility
+        self.liquidity = liquidity
+        self.markets = {
+            symbol: Market(symbol, START_PRICES.get(symbol.split("/")[0], 1.0), self.rng, volatility)
+            for symbol in symbols
+        }
+        self.free = dict(balances or {"USDT": 1000.0})
+        self.locked = {}
+        self.orders = {}
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # пазарни данни
+    def market(self, symbol):
+        market = self.markets.get(symbol)
+        if market is None:
+            raise EngineError("invalid", f"unknown symbol {symbol}")
+        return market
+
+    def quote(self, symbol):
+        """(bid, ask, последна цена)."""
+        market = self.market(symbol)
+        half = market.price * self.spread / 2
+        digits = market.price_precision
+        return round(market.price - half, digits), round(market.price + half, digits), round(market.price, digits)
+
+    def klines(self, symbol, seconds, limit, start=None, end=None):
+        """[[ts, open, high, low, close, volume]] по възходящо време (от часовите свещи)."""
+        with self._lock:
+            rows = [list(r) for r in self.market(symbol).candles]
+        step = max(int(seconds // 3600), 1)
+        if step > 1:
+            grouped = {}
+            for r in rows:
+                key = r[0] // (step * 3600) * step * 3600
+                g = grouped.get(key)
+                if g is None:
+                    grouped[key] = [key, r[1], r[2], r[3], r[4], r[5]]
+                else:
+                    g[2], g[3], g[4], g[5] = max(g[2], r[2]), min(g[3], r[3]), r[4], g[5] + r[5]
+            rows = list(grouped.values())
+        if start is not None:
+            rows = [r for r in rows if r[0] >= start]
+        if end is not None:
+            rows = [r for r in rows if r[0] <= end]
+        return rows[-limit:] if limit else rows
+
+    def balances(self):
+        with self._lock:
+            assets = set(self.free) | set(self.locked)
+            return {asset: (self.free.get(asset, 0.0), self.locked.get(asset, 0.0)) for asset in sorted(assets)}
+
+    # поръчки
+    def place(self, symbol, side, price, qty):
+        side = side.upper()
+        if side not in ("BUY", "SELL") or price <= 0 or qty <= 0:
+            raise EngineError("invalid", "invalid order parameters")
+        with self._lock:
+            market = self.market(symbol)
+            asset, amount = (market.quote, qty * price) if side == "BUY" else (market.base, qty)
+            if self.free.get(asset, 0.0) + EPS < amount:
+                raise EngineError("balance", f"insufficient {asset}")
+            self.free[asset] = self.free.get(asset, 0.0) - amount
+            self.locked[asset] = self.locked.get(asset, 0.0) + amount
+            order = Order(str(self._next_id), symbol, side, price, qty)
+            self._next_id += 1
+            self.orders[order.id] = order
+
+            # 1) насрещни чакащи поръчки, 2) синтетичната котировка, 3) книгата
+            book = market.asks if side == "BUY" else market.bids
+            for resting in list(book):
+                if order.remaining <= EPS:
+                    break
+                if (side == "BUY" and resting.price > price) or (side == "SELL" and resting.price < price):
+                    break
+                qty_match = min(order.remaining, resting.remaining)
+                self._fill(resting, qty_match, resting.price, maker=True)
+                self._fill(order, qty_match, resting.price, maker=False)
+            bid, ask, _ = self.quote(symbol)
+            if order.remaining > EPS and ((side == "BUY" and price >= ask) or (side == "SELL" and price <= bid)):
+                level = ask if side == "BUY" else bid
+                self._fill(order, min(order.remaining, self.liquidity / level), level, maker=False)
+            if order.status == "open":
+                self._rest(market, order)
+            return order
+
+    def _rest(self, market, order):
+        if order.side == "BUY":
+            market.bids.append(order)
+            market.bids.sort(key=lambda o: (-o.price, o.ts))
+        else:
+            market.asks.append(order)
+            market.asks.sort(key=lambda o: (o.price, o.ts))
+
+    def _fill(self, order, qty, price, maker):
+        market = self.markets[order.symbol]
+        rate = self.maker_fee if maker else self.taker_fee
+        quote = qty * price
+        if order.side == "BUY":
+            self.locked[market.quote] -= qty * order.price
+            self.free[market.quote] += qty * order.price - quote   # по-добра цена → връщаме разликата
+            fee = qty * rate
+            self.free[market.base] = self.free.get(market.base, 0.0) + qty - fee
+            fee_asset = market.base
+        else:
+            self.locked[market.base] -= qty
+            fee = quote * rate
+            self.free[market.quote] = self.free.get(market.quote, 0.0) + quote - fee
+            fee_asset = market.quote
+        order.filled += qty
+        order.quote += quote
+        order.fee += fee
+        order.updated = time.time()
+        order.trades.append({"id": f"{order.id}-{len(order.trades) + 1}", "qty": qty, "price": price, "quote": quote,
+                             "fee": fee, "fee_asset": fee_asset, "maker": maker, "ts": order.updated})
+        market.update_candle(qty)
+        if order.remaining <= EPS:
+            order.status = "filled"
+            self._unbook(market, order)
+
+    @staticmethod
+    def _unbook(market, order):
+        book = market.bids if order.side == "BUY" else market.asks
+        if order in book:
+            book.remove(order)
+
+    def get(self, order_id):
+        order = self.orders.get(str(order_id))
+        if order is None:
+            raise EngineError("not_found", f"order {order_id} not found")
+        return order
+
+    def cancel(self, order_id):
+        with self._lock:
+            order = self.get(order_id)
+            if order.status != "open":
+                raise EngineError("not_found", f"order {order_id} is {order.status}")
+            market = self.markets[order.symbol]
+            rest = order.remaining
+            asset, amount = (market.quote, rest * order.price) if order.side == "BUY" else (market.base, rest)
+            self.locked[asset] -= amount
+            self.free[asset] = self.free.get(asset, 0.0) + amount
+            order.status = "canceled"
+            order.updated = time.time()
+            self._unbook(market, order)
+            return order
+
+    def open_orders(self, symbol=None):
+        with self._lock:
+            return [o for o in self.orders.values() if o.status == "open" and symbol in (None, o.symbol)]
+
+    # синтетичен пазар
+    def tick(self):
+        """Една стъпка на цената за всеки пазар + изпълнение на чакащите поръчки (maker)."""
+        with self._lock:
+            for market in self.markets.values():
+                market.price *= math.exp(self.rng.gauss(0, self.volatility))
+                market.update_candle(self.rng.uniform(0.1, 1.0) * self.liquidity / market.price)
+                for order in [o for o in market.bids if o.price >= market.price] + \
+                             [o for o in market.asks if o.price <= market.price]:
+                    self._fill(order, min(order.remaining, self.liquidity / order.price), order.price, maker=True)
+
+    def start(self, interval=1.0):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, args=(interval,), name="mock-market", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            self.tick()
+
+
+# --- ДИАЛЕКТИ НА БОРСИТЕ ---
+
+class Reply(Exception):
+    """Готов отговор (статус, тяло) — за грешки на диалекта."""
+
+    def __init__(self, status, body):
+        super().__init__(status)
+        self.status = status
+        self.body = body
+
+
+class Dialect:
+    """Пътищата на една борса: [(метод, regex на пътя, функция(параметри, match))]."""
+    prefix = ""         # част от базовия адрес на адаптера (напр. /api/v4)
+    sep = ""            # разделител в името на символа
+    symbol_param = "symbol"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.symbols = {symbol.replace("/", self.sep): symbol for symbol in engine.markets}
+        self.routes = [(method, pattern, re.compile(f"^{pattern}$"), handler) for method, pattern, handler in self.table()]
+
+    def table(self):
+        return []
+
+    def name(self, symbol):
+        return symbol.replace("/", self.sep)
+
+    def symbol(self, params, key=None):
+        raw = params.get(key or self.symbol_param, "")
+        if raw not in self.symbols:
+            raise self.error(EngineError("invalid", f"unknown symbol {raw}"))
+        return self.symbols[raw]
+
+    def error(self, exc):
+        return Reply(400, {"msg": str(exc)})
+
+    def wrap(self, data):
+        return data
+
+    def dispatch(self, method, path, params):
+        for route_method, route, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                try:
+                    return 200, self.wrap(handler(params, match)), route
+                except EngineError as e:
+                    raise self.error(e)
+        raise Reply(404, {"msg": f"{method} {path} not found"})
+
+
+class MEXCDialect(Dialect):
+    intervals = {"1m": 60, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "4h": 14400, "1d": 86400}
+    statuses = {"filled": "FILLED", "canceled": "CANCELED"}
+
+    def table(self):
+        return [
+            ("GET", "/api/v3/ping", lambda p, m: {}),
+            ("GET", "/api/v3/time", lambda p, m: {"serverTime": int(time.time() * 1000)}),
+            ("GET", "/api/v3/account", self.account),
+            ("GET", "/api/v3/ticker/bookTicker", self.book_ticker),
+            ("GET", "/api/v3/klines", self.klines),
+            ("GET", "/api/v3/exchangeInfo", self.exchange_info),
+            ("POST", "/api/v3/order", self.place),
+            ("GET", "/api/v3/order", lambda p, m: self.order(self.engine.get(p.get("orderId")))),
+            ("DELETE", "/api/v3/order", lambda p, m: self.order(self.engine.cancel(p.get("orderId")))),
+            ("GET", "/api/v3/openOrders", self.open_orders),
+            ("DELETE", "/api/v3/openOrders", self.cancel_open),
+            ("POST", "/api/v3/batchOrders", self.batch),
+            ("GET", "/api/v3/myTrades", self.my_trades),
+            ("POST", "/api/v3/userDataStream", lambda p, m: {"listenKey": "mock-listen-key"}),
+            ("PUT", "/api/v3/userDataStream", lambda p, m: {}),
+        ]
+
+    def error(self, exc):
+        codes = {"balance": 30004, "not_found": -2013, "invalid": -1121}
+        return Reply(400, {"code": codes[exc.reason], "msg": str(exc)})
+
+    def order(self, o):
+        status = self.statuses.get(o.status) or ("PARTIALLY_FILLED" if o.filled > 0 else "NEW")
+        return {"symbol": self.name(o.symbol), "orderId": o.id, "price": _s(o.price), "origQty": _s(o.qty),
+                "executedQty": _s(o.filled), "cummulativeQuoteQty": _s(o.quote), "status": status,
+                "type": "LIMIT", "side": o.side, "time": int(o.ts * 1000), "updateTime": int(o.updated * 1000)}
+
+    def account(self, params, match):
+        return {"canTrade": True, "balances": [{"asset": a, "free": _s(f), "locked": _s(l)}
+                                               for a, (f, l) in self.engine.balances().items()]}
+
+    def book_ticker(self, params, match):
+        symbol = self.symbol(params)
+        bid, ask, _ = self.engine.quote(symbol)
+        return {"symbol": self.name(symbol), "bidPrice": _s(bid), "bidQty": "10", "askPrice": _s(ask), "askQty": "10"}
+
+    def klines(self, params, match):
+        seconds = self.intervals.get(params.get("interval"), 3600)
+        rows = self.engine.klines(self.symbol(params), seconds, int(params.get("limit", 500)))
+        return [[int(r[0] * 1000)] + [_s(x) for x in r[1:6]] + [int((r[0] + seconds) * 1000) - 1, _s(r[4] * r[5])]
+                for r in rows]
+
+    def exchange_info(self, params, match):
+        symbols = []
+        for market in self.engine.markets.values():
+            step = _s(10 ** -market.qty_precision)
+            symbols.append({
+                "symbol": self.name(market.symbol), "status": "1", "baseAsset": market.base, "quoteAsset": market.quote,
+                "filters": [
+                    {"filterType": "LOT_SIZE", "minQty": step, "stepSize": step},
+                    {"filterType": "PRICE_FILTER", "tickSize": _s(10 ** -market.price_precision)},
+                    {"filterType": "MIN_NOTIONAL", "minNotional": "1"},
+                ]})
+        return {"timezone": "UTC", "serverTime": int(time.time() * 1000), "symbols": symbols}
+
+    def place(self, params, match):
+        order = self.engine.place(self.symbol(params), params.get("side", ""),
+                                  float(params.get("price", 0)), float(params.get("quantity", 0)))
+        return {"symbol": params["symbol"], "orderId": order.id, "price": params["price"],
+                "origQty": params["quantity"], "type": "LIMIT", "side": order.side,
+                "transactTime": int(order.ts * 1000)}
+
+    def open_orders(self, params, match):
+        symbol = self.symbol(params) if params.get("symbol") else None
+        return [self.order(o) for o in self.engine.open_orders(symbol)]
+
+    def cancel_open(self, params, match):
+        return [self.order(self.engine.cancel(o.id)) for o in self.engine.open_orders(self.symbol(params))]
+
+    def batch(self, params, match):
+        result = []
+        for item in json.loads(params.get("batchOrders", "[]")):
+            try:
+                result.append(self.place({k: str(v) for k, v in item.items()}, match))
+            except EngineError as e:
+                result.append(self.error(e).body)
+        return result
+
+    def my_trades(self, params, match):
+        order = self.engine.get(params.get("orderId"))
+        return [{"symbol": self.name(order.symbol), "id": t["id"], "orderId": order.id, "price": _s(t["price"]),
+                 "qty": _s(t["qty"]), "quoteQty": _s(t["quote"]), "commission": _s(t["fee"]),
+                 "commissionAsset": t["fee_asset"], "time": int(t["ts"] * 1000), "isBuyer": order.side == "BUY",
+                 "isMaker": t["maker"]} for t in order.trades]
+
+
+class GateIODialect(Dialect):
+    prefix = "/api/v4"
+    sep = "_"
+    symbol_param = "currency_pair"
+    intervals = {"1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600, "4h": 14400, "8h": 28800, "1d": 86400}
+
+    def table(self):
+        return [
+            ("GET", "/spot/ping", lambda p, m: {"ok": True}),
+            ("GET", "/spot/time", lambda p, m: {"server_time": int(time.time() * 1000)}),
+            ("GET", "/spot/accounts", lambda p, m: [{"currency": a, "available": _s(f), "locked": _s(l)}
+                                                    for a, (f, l) in self.engine.balances().items()]),
+            ("GET", "/spot/tickers", self.tickers),
+            ("GET", "/spot/candlesticks", self.candlesticks),
+            ("GET", "/spot/currency_pairs", self.currency_pairs),
+            ("POST", "/spot/orders", self.place),
+            ("GET", r"/spot/orders/(?P<id>[^/]+)", lambda p, m: self.order(self.engine.get(m["id"]))),
+            ("DELETE", r"/spot/orders/(?P<id>[^/]+)", lambda p, m: self.order(self.engine.cancel(m["id"]))),
+            ("GET", "/spot/open_orders", self.open_orders),
+            ("POST", "/spot/batch_orders", self.batch),
+            ("POST", "/spot/cancel_batch_orders", self.cancel_batch),
+            ("DELETE", "/spot/orders", self.cancel_open),
+            ("GET", "/spot/my_trades", self.my_trades),
+        ]
+
+    def error(self, exc):
+        labels = {"balance": (400, "BALANCE_NOT_ENOUGH"), "not_found": (404, "ORDER_NOT_FOUND"),
+                  "invalid": (400, "INVALID_PARAM_VALUE")}
+        status, label = labels[exc.reason]
+        return Reply(status, {"label": label, "message": str(exc)})
+
+    def order(self, o):
+        status = {"open": "open", "filled": "closed", "canceled": "cancelled"}[o.status]
+        return {"id": o.id, "text": "", "create_time": str(int(o.ts)), "update_time": str(int(o.updated)),
+                "currency_pair": self.name(o.symbol), "status": status, "type": "limit", "account": "spot",
+                "side": o.side.lower(), "amount": _s(o.qty), "price": _s(o.price), "left": _s(o.remaining),
+                "filled_total": _s(o.quote), "fee": _s(o.fee), "fee_currency": o.trades[-1]["fee_asset"] if o.trades else "",
+                "finish_as": {"open": "open", "filled": "filled", "canceled": "cancelled"}[o.status]}
+
+    def tickers(self, params, match):
+        symbols = [self.symbol(params)] if params.get("currency_pair") else list(self.engine.markets)
+        result = []
+        for symbol in symbols:
+            bid, ask, last = self.engine.quote(symbol)
+            result.append({"currency_pair": self.name(symbol), "last": _s(last), "lowest_ask": _s(ask),
+                           "highest_bid": _s(bid), "change_percentage": "0"})
+        return result
+
+    def candlesticks(self, params, match):
+        seconds = self.intervals.get(params.get("interval"), 3600)
+        rows = self.engine.klines(self.symbol(params), seconds, int(params.get("limit", 100)))
+        # [t, обем в USDT, close, high, low, open, обем в базовия актив]
+        return [[str(int(r[0])), _s(r[4] * r[5]), _s(r[4]), _s(r[2]), _s(r[3]), _s(r[1]), _s(r[5])] for r in rows]
+
+    def currency_pairs(self, params, match):
+        return [{"id": self.name(m.symbol), "base": m.base, "quote": m.quote, "fee": "0.2",
+                 "min_base_amount": _s(10 ** -m.qty_precision), "min_quote_amount": "1",
+                 "amount_precision": m.qty_precision, "precision": m.price_precision, "trade_status": "tradable"}
+                for m in self.engine.markets.values()]
+
+    def place(self, params, match):
+        order = self.engine.place(self.symbol(params), params.get("side", ""),
+                                  float(params.get("price", 0)), float(params.get("amount", 0)))
+        return self.order(order)
+
+    def open_orders(self, params, match):
+        symbol = self.symbol(params) if params.get("currency_pair") else None
+        grouped = {}
+        for o in self.engine.open_orders(symbol):
+            grouped.setdefault(o.symbol, []).append(self.order(o))
+        return [{"currency_pair": self.name(s), "total": len(orders), "orders": orders} for s, orders in grouped.items()]
+
+    def batch(self, params, match):
+        result = []
+        for item in params.get("_items", []):
+            try:
+                result.append({**self.place({k: str(v) for k, v in item.items()}, match), "succeeded": True})
+            except EngineError as e:
+                result.append({"succeeded": False, **self.error(e).body})
+        return result
+
+    def cancel_batch(self, params, match):
+        result = []
+        for item in params.get("_items", []):
+            try:
+                self.engine.cancel(str(item.get("id")))
+                result.append({"currency_pair": item.get("currency_pair"), "id": str(item.get("id")), "succeeded": True})
+            except EngineError as e:
+                result.append({"currency_pair": item.get("currency_pair"), "id": str(item.get("id")),
+                               "succeeded": False, **self.error(e).body})
+        return result
+
+    def cancel_open(self, params, match):
+        return [self.order(self.engine.cancel(o.id)) for o in self.engine.open_orders(self.symbol(params))]
+
+    def my_trades(self, params, match):
+        order = self.engine.get(params.get("order_id"))
+        return [{"id": t["id"], "create_time": str(int(t["ts"])), "currency_pair": self.name(order.symbol),
+                 "side": order.side.lower(), "role": "maker" if t["maker"] else "taker", "amount": _s(t["qty"]),
+                 "price": _s(t["price"]), "order_id": order.id, "fee": _s(t["fee"]), "fee_currency": t["fee_asset"]}
+                for t in order.trades]
+
+
+class KuCoinDialect(Dialect):
+    sep = "-"
+    intervals = {"1min": 60, "5min": 300, "15min": 900, "30min": 1800, "1hour": 3600, "4hour": 14400, "1day": 86400}
+
+    def table(self):
+        return [
+            ("GET", "/api/v1/timestamp", lambda p, m: int(time.time() * 1000)),
+            ("GET", "/api/v1/accounts", self.accounts),
+            ("GET", "/api/v1/market/orderbook/level1", self.level1),
+            ("GET", "/api/v1/market/candles", self.candles),
+            ("GET", "/api/v1/symbols", self.symbols_info),
+            ("POST", "/api/v1/orders", self.place),
+            ("GET", "/api/v1/orders", self.list_orders),
+            ("DELETE", "/api/v1/orders", self.cancel_open),
+            ("POST", "/api/v1/orders/multi", self.multi),
+            ("GET", r"/api/v1/orders/(?P<id>[^/]+)", lambda p, m: self.order(self.engine.get(m["id"]))),
+            ("DELETE", r"/api/v1/orders/(?P<id>[^/]+)",
+             lambda p, m: {"cancelledOrderIds": [self.engine.cancel(m["id"]).id]}),
+            ("GET", "/api/v1/fills", self.fills),
+        ]
+
+    def wrap(self, data):
+        return {"code": "200000", "data": data}
+
+    def error(self, exc):
+        codes = {"balance": "200004", "not_found": "400100", "invalid": "400100"}
+        return Reply(400, {"code": codes[exc.reason], "msg": str(exc)})
+
+    @staticmethod
+    def page(items):
+        return {"currentPage": 1, "pageSize": 500, "totalNum": len(items), "totalPage": 1, "items": items}
+
+    def order(self, o):
+        return {"id": o.id, "symbol": self.name(o.symbol), "opType": "DEAL", "type": "limit", "side": o.side.lower(),
+                "price": _s(o.price), "size": _s(o.qty), "dealFunds": _s(o.quote), "dealSize": _s(o.filled),
+                "fee": _s(o.fee), "feeCurrency": o.trades[-1]["fee_asset"] if o.trades else "USDT",
+                "isActive": o.status == "open", "cancelExist": o.status == "canceled", "createdAt": int(o.ts * 1000)}
+
+    def accounts(self, params, match):
+        return [{"id": a, "currency": a, "type": "trade", "balance": _s(f + l), "available": _s(f), "holds": _s(l)}
+                for a, (f, l) in self.engine.balances().items() if params.get("currency") in (None, a)]
+
+    def level1(self, params, match):
+        bid, ask, last = self.engine.quote(self.symbol(params))
+        return {"sequence": str(int(time.time() * 1000)), "price": _s(last), "size": "1", "bestBid": _s(bid),
+                "bestBidSize": "10", "bestAsk": _s(ask), "bestAskSize": "10", "time": int(time.time() * 1000)}
+
+    def candles(self, params, match):
+        seconds = self.intervals.get(params.get("type"), 3600)
+        start = int(params["startAt"]) if params.get("startAt") else None
+        end = int(params["endAt"]) if params.get("endAt") else None
+        rows = self.engine.klines(self.symbol(params), seconds, 1500, start, end)
+        # KuCoin: [t, open, close, high, low, обем, оборот], най-новата първа
+        return [[str(int(r[0])), _s(r[1]), _s(r[4]), _s(r[2]), _s(r[3]), _s(r[5]), _s(r[4] * r[5])]
+                for r in reversed(rows)]
+
+    def symbols_info(self, params, match):
+        return [{"symbol": self.name(m.symbol), "name": self.name(m.symbol), "baseCurrency": m.base,
+                 "quoteCurrency": m.quote, "baseMinSize": _s(10 ** -m.qty_precision),
+                 "baseIncrement": _s(10 ** -m.qty_precision), "priceIncrement": _s(10 ** -m.price_precision),
+                 "quoteIncrement": "0.000001", "minFunds": "0.1", "enableTrading": True}
+                for m in self.engine.markets.values()]
+
+    def place(self, params, match):
+        order = self.engine.place(self.symbol(params), params.get("side", ""),
+                                  float(params.get("price", 0)), float(params.get("size", 0)))
+        return {"orderId": order.id}
+
+    def cancel_open(self, params, match):
+        symbol = self.symbol(params) if params.get("symbol") else None
+        return {"cancelledOrderIds": [self.engine.cancel(o.id).id for o in self.engine.open_orders(symbol)]}
+
+    def multi(self, params, match):
+        result = []
+        for item in params.get("orderList", []):
+            entry = {"symbol": params.get("symbol"), "side": item.get("side"), "type": "limit",
+                     "price": str(item.get("price")), "size": str(item.get("size")), "clientOid": item.get("clientOid")}
+            try:
+                order = self.place({**entry, "symbol": params.get("symbol", "")}, match)
+                result.append({**entry, "id": order["orderId"], "status": "success", "failMsg": ""})
+            except EngineError as e:
+                result.append({**entry, "id": None, "status": "fail", "failMsg": str(e)})
+        return {"data": result}
+
+    def list_orders(self, params, match):
+        symbol = self.symbol(params) if params.get("symbol") else None
+        if params.get("status", "done") == "active":
+            orders = self.engine.open_orders(symbol)
+        else:
+            orders = [o for o in self.engine.orders.values() if o.status != "open" and symbol in (None, o.symbol)]
+        return self.page([self.order(o) for o in orders])
+
+    def fills(self, params, match):
+        order = self.engine.get(params.get("orderId"))
+        return self.page([{"symbol": self.name(order.symbol), "tradeId": t["id"], "orderId": order.id,
+                           "side": order.side.lower(), "liquidity": "maker" if t["maker"] else "taker",
+                           "price": _s(t["price"]), "size": _s(t["qty"]), "funds": _s(t["quote"]),
+                           "fee": _s(t["fee"]), "feeCurrency": t["fee_asset"], "createdAt": int(t["ts"] * 1000)}
+                          for t in order.trades])
+
+
+class CoinExDialect(Dialect):
+    prefix = "/v1"
+    symbol_param = "market"
+    intervals = {"1min": 60, "5min": 300, "15min": 900, "30min": 1800, "1hour": 3600, "4hour": 14400, "1day": 86400}
+
+    def table(self):
+        return [
+            ("GET", "/market/ticker", self.ticker),
+            ("GET", "/balance(/info)?", lambda p, m: {a: {"available": _s(f), "frozen": _s(l)}
+                                                      for a, (f, l) in self.engine.balances().items()}),
+            ("GET", "/market/kline", self.kline),
+            ("GET", "/market/info", self.market_info),
+            ("POST", "/order/limit", self.place),
+            ("POST", "/order/limit/batch", self.batch),
+            ("GET", "/order/status", lambda p, m: self.order(self.engine.get(p.get("id")))),
+            ("GET", "/order/pending", self.pending),
+            ("DELETE", "/order/pending", self.cancel),
+            ("GET", "/order/deals", self.deals),
+        ]
+
+    def wrap(self, data):
+        return {"code": 0, "data": data, "message": "Success"}
+
+    def error(self, exc):
+        codes = {"balance": 107, "not_found": 600, "invalid": 2}
+        # CoinEx връща грешките с HTTP 200 и код в тялото
+        return Reply(200, {"code": codes[exc.reason], "data": {}, "message": str(exc)})
+
+    @staticmethod
+    def page(items):
+        return {"count": len(items), "curr_page": 1, "data": items, "has_next": False}
+
+    def order(self, o):
+        if o.status == "open":
+            status = "part_deal" if o.filled > 0 else "not_deal"
+        else:
+            status = "done" if o.status == "filled" else "cancel"
+        return {"id": int(o.id), "market": self.name(o.symbol), "type": o.side.lower(), "order_type": "limit",
+                "amount": _s(o.qty), "price": _s(o.price), "deal_amount": _s(o.filled), "deal_money": _s(o.quote),
+                "deal_fee": _s(o.fee), "left": _s(o.remaining), "status": status, "create_time": int(o.ts),
+                "avg_price": _s(o.quote / o.filled) if o.filled else "0"}
+
+    def ticker(self, params, match):
+        bid, ask, last = self.engine.quote(self.symbol(params))
+        return {"date": int(time.time() * 1000), "ticker": {"buy": _s(bid), "buy_amount": "10", "sell": _s(ask),
+                                                             "sell_amount": "10", "last": _s(last), "vol": "1000"}}
+
+    def kline(self, params, match):
+        period = params.get("type", "1hour")
+        if period.isdigit():
+            # адаптерът праща минути ("60", "240"), а за ден — секунди ("86400")
+            seconds = int(period) * 60 if int(period) <= 1440 else int(period)
+        else:
+            seconds = self.intervals.get(period, 3600)
+        symbol = self.symbol(params)
+        rows = self.engine.klines(symbol, seconds, int(params.get("limit", 100)))
+        return [[int(r[0]), _s(r[1]), _s(r[4]), _s(r[2]), _s(r[3]), _s(r[5]), _s(r[4] * r[5]), self.name(symbol)]
+                for r in rows]
+
+    def market_info(self, params, match):
+        return {self.name(m.symbol): {"name": self.name(m.symbol), "min_amount": _s(10 ** -m.qty_precision),
+                                      "maker_fee_rate": _s(self.engine.maker_fee),
+                                      "taker_fee_rate": _s(self.engine.taker_fee), "pricing_name": m.quote,
+                                      "pricing_decimal": m.price_precision, "trading_name": m.base,
+                                      "trading_decimal": m.qty_precision}
+                for m in self.engine.markets.values()}
+
+    def place(self, params, match):
+        order = self.engine.place(self.symbol(params), params.get("side", params.get("type", "")),
+                                  float(params.get("price", 0)), float(params.get("amount", 0)))
+        return self.order(order)
+
+    def batch(self, params, match):
+        items = params.get("batch_orders", "[]")
+        result = []
+        for item in json.loads(items) if isinstance(items, str) else items:
+            try:
+                order = self.place({**{k: str(v) for k, v in item.items()}, "market": params.get("market", "")}, match)
+                result.append(self.wrap(order))
+            except EngineError as e:
+                result.append(self.error(e).body)
+        return result
+
+    def cancel(self, params, match):
+        if params.get("id"):
+            return self.order(self.engine.cancel(params["id"]))
+        # Без id — отмяна на всички отворени поръчки на пазара
+        for o in self.engine.open_orders(self.symbol(params)):
+            self.engine.cancel(o.id)
+        return {}
+
+    def pending(self, params, match):
+        return self.page([self.order(o) for o in self.engine.open_orders(self.symbol(params))])
+
+    def deals(self, params, match):
+        order = self.engine.get(params.get("order_id"))
+        return self.page([{"id": t["id"], "create_time": int(t["ts"]), "order_id": int(order.id),
+                           "market": self.name(order.symbol), "type": order.side.lower(),
+                           "role": "maker" if t["maker"] else "taker", "amount": _s(t["qty"]),
+                           "price": _s(t["price"]), "deal_money": _s(t["quote"]), "fee": _s(t["fee"]),
+                           "fee_asset": t["fee_asset"]} for t in order.trades])
+
+
+DIALECTS = {"mexc": MEXCDialect, "gateio": GateIODialect, "kucoin": KuCoinDialect, "coinex": CoinExDialect}
+
+
+# --- HTTP СЪРВЪР ---
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, както при истинските борси
+
+    def _handle(self):
+        self.server.mock.handle(self)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockExchangeServer:
+    """
+    REST сървър за една борса (ключ като в REST_URLS: mexc/gateio/kucoin/coinex).
+    latency = (мин, макс) секунди закъснение на всяка заявка;
+    errors = {"429"|"500"|"503"|"timeout": вероятност} — инжектирани грешки.
+    """
+
+    def __init__(self, venue, engine=None, host="127.0.0.1", port=0, latency=(0.0, 0.0), errors=None,
+                 timeout_delay=15.0, seed=0):
+        self.venue = venue
+        self.engine = engine or MatchingEngine(seed=seed)
+        self.dialect = DIALECTS[venue](self.engine)
+        self.latency = latency
+        self.errors = dict(errors or {})
+        self.timeout_delay = timeout_delay
+        self.rng = random.Random(seed)
+        self.counts = Counter()
+        self.injected = Counter()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{self.dialect.prefix}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=f"mock-{self.venue}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _roll(self):
+        """(закъснение, инжектирана грешка или None) — от общия seed-нат генератор."""
+        with self._lock:
+            delay = self.rng.uniform(*self.latency) if self.latency[1] > 0 else 0.0
+            r = self.rng.random()
+        for kind, probability in self.errors.items():
+            if r < probability:
+                return delay, kind
+            r -= probability
+        return delay, None
+
+    def handle(self, request):
+        parts = urlsplit(request.path)
+        path = parts.path
+        if self.dialect.prefix and path.startswith(self.dialect.prefix):
+            path = path[len(self.dialect.prefix):]
+        params = dict(parse_qsl(parts.query))
+        length = int(request.headers.get("Content-Length") or 0)
+        if length:
+            try:
+                body = json.loads(request.rfile.read(length) or b"{}")
+                if isinstance(body, dict):
+                    params.update({k: v if isinstance(v, (list, dict)) else str(v) for k, v in body.items()})
+                elif isinstance(body, list):
+                    params["_items"] = body     # пакетни заявки с JSON масив (Gate.io)
+            except ValueError:
+                pass
+
+        delay, fault = self._roll()
+        if delay:
+            time.sleep(delay)
+        headers = {}
+        if fault == "timeout":
+            time.sleep(self.timeout_delay)
+            fault = None
+        if fault:
+            status = int(fault)
+            body = {"code": status, "msg": "injected error"}
+            if status == 429:
+                headers["Retry-After"] = "1"
+        else:
+            try:
+                status, body, route = self.dialect.dispatch(request.command, path, params)
+            except Reply as reply:
+                status, body, route = reply.status, reply.body, path   # грешка на диалекта
+        with self._lock:
+            if fault:
+                self.injected[fault] += 1
+            else:
+                self.counts[f"{request.command} {route}"] += 1
+
+        payload = json.dumps(body).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        for key, value in headers.items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def stats(self):
+        with self._lock:
+            return {"requests": dict(self.counts), "injected": dict(self.injected)}
+
+
+def start_mock_exchanges(venues=tuple(DIALECTS), host="127.0.0.1", base_port=0, tick_interval=1.0, seed=0, **options):
+    """Пуска сървър за всяка борса (всеки със свой MatchingEngine) → {ключ: сървър}."""
+    servers = {}
+    for i, venue in enumerate(venues):
+        engine = MatchingEngine(seed=seed + i)
+        engine.start(tick_interval)
+        port = base_port + i if base_port else 0
+        servers[venue] = MockExchangeServer(venue, engine, host, port, seed=seed + i, **options).start()
+    return servers
+
+
+def rest_urls(servers):
+    """{ключ: базов адрес} за config.REST_URLS."""
+    return {venue: server.url for venue, server in servers.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локални REST сървъри, които имитират борсите")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8801, help="първи порт (mexc, gateio, kucoin, coinex подред)")
+    parser.add_argument("--latency", nargs=2, type=float, default=(0.0, 0.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--error", action="append", default=[], metavar="KIND=P",
+                        help="инжектирана грешка: 429/500/503/timeout с вероятност P")
+    parser.add_argument("--tick", type=float, default=1.0, help="секунди между стъпките на пазара")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    errors = {kind: float(p) for kind, p in (e.split("=", 1) for e in args.error)}
+    servers = start_mock_exchanges(host=args.host, base_port=args.port, tick_interval=args.tick, seed=args.seed,
+                                   latency=tuple(args.latency), errors=errors)
+    print("🧪 Mock борсите работят. В config.py:")
+    print(f"REST_URLS = {json.dumps(rest_urls(servers), indent=4)}")
+    print("WS_ENABLED = False")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers.values():
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# notifier.py
+"""
+Неблокиращи нотификации: NOTIFIER.telegram()/android() само слагат
+съобщението в опашка — търговският цикъл не чака мрежа или bash.
+Фонова нишка събира поредица съобщения за NOTIFY_BATCH_WINDOW секунди,
+слива еднаквите ("… (×3)") и ги праща като едно Telegram съобщение
+(до NOTIFY_MAX_CHARS знака), най-много NOTIFY_PER_MINUTE в минута.
+Неизпратените Telegram съобщения се пазят в logs/notifications.db и
+тръгват след рестарт; Android нотификациите не се пазят.
+"""
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import deque
+
+from config import NOTIFY_BATCH_WINDOW, NOTIFY_PER_MINUTE, NOTIFY_MAX_CHARS, NOTIFY_RETRY_MAX
+from ratelimit import TokenBucket
+
+try:
+    from telegram_bot import deliver
+except ImportError:
+    deliver = None
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_FILE = "logs/notifications.db"
+ANDROID_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "notify_android.sh")
+
+
+def coalesce(items):
+    """Еднаквите съобщения → едно с брояч, по реда на първата поява."""
+    counts = {}
+    for item in items:
+        counts[item] = counts.get(item, 0) + 1
+    return list(counts.items())
+
+
+def batch(texts, limit=NOTIFY_MAX_CHARS):
+    """Слепва съобщенията в блокове до limit знака (по-дългите се режат)."""
+    chunks, current = [], ""
+    for text in texts:
+        text = text[:limit]
+        if current and len(current) + 2 + len(text) > limit:
+            chunks.append(current)
+            current = text
+        else:
+            current = f"{current}\n\n{text}" if current else text
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class Notifier:
+    def __init__(self, path=OUTBOX_FILE, window=NOTIFY_BATCH_WINDOW, per_minute=NOTIFY_PER_MINUTE):
+        self.path = path
+        self.window = window
+        self.bucket = TokenBucket(per_minute / 60, max(per_minute // 10, 1))
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._busy = False
+        self._flushing = False
+        self._stalled = False      # Telegram не отговаря — flush() не чака повече
+        self._backoff = 1.0
+        self._db = None
+
+    def telegram(self, text):
+        if deliver is not None:
+            self._put("telegram", str(text))
+
+    def android(self, title, content, vibrate=300):
+        self._put("android", (title, content, vibrate))
+
+    def _put(self, channel, payload):
+        with self._cond:
+            self._queue.append((channel, payload))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="notifier", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout=15):
+        """Изчаква опашката да се изпразни (при спиране на бота). True при успех."""
+        with self._cond:
+            if self._thread is None:
+                return True
+            self._flushing = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: not self._queue and (not self._busy or self._stalled), timeout)
+            leftover = [payload for channel, payload in self._queue if channel == "telegram"]
+            self._queue.clear()
+        if leftover:
+            # Telegram не отговаря — пазим опашката за следващото пускане
+            db = self._connect()
+            with db:
+                db.executemany("INSERT INTO outbox(ts, text) VALUES (?, ?)", [(time.time(), t) for t in leftover])
+            db.close()
+        return done and not leftover
+
+    # --- фонова нишка ---
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY, ts REAL NOT NULL, text TEXT NOT NULL)")
+        return db
+
+    def _store(self, texts):
+        with self._db:
+            now = time.time()
+            return [(self._db.execute("INSERT INTO outbox(ts, text) VALUES (?, ?)", (now, text)).lastrowid, text)
+                    for text in texts]
+
+    def _rebatch(self, pending, texts):
+        """Чакащите + новите съобщения → възможно най-малко блокове (една транзакция)."""
+        merged = batch([t if n == 1 else f"{t} (×{n})" for t, n in coalesce([t for _, t in pending] + texts)])
+        if not texts and len(merged) == len(pending):
+            return pending
+        with self._db:
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id, _ in pending])
+        return self._store(merged)
+
+    def _loop(self):
+        self._db = self._connect()
+        pending = self._db.execute("SELECT id, text FROM outbox ORDER BY id").fetchall()
+        if pending:
+            logger.info(f"📨 {len(pending)} неизпратени нотификации от предишно пускане")
+        while True:
+            with self._cond:
+                if not self._queue and not pending:
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait_for(lambda: self._queue)
+                self._busy = True
+                # Събираме поредицата съобщения, освен ако ботът спира
+                deadline = time.monotonic() + self.window
+                while self._queue and not self._flushing:
+                    left = deadline - time.monotonic()
+                    if left <= 0 or not self._cond.wait(left):
+                        break
+                items = list(self._queue)
+                self._queue.clear()
+            texts = [payload for channel, payload in items if channel == "telegram"]
+            for (title, content, vibrate), count in coalesce(p for c, p in items if c == "android"):
+                self._android(title, content if count == 1 else f"{content} (×{count})", vibrate)
+            try:
+                if texts or len(pending) > 1:
+                    pending = self._rebatch(pending, texts)
+                pending = self._send(pending)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Опашката за нотификации: {e}")
+
+    def _send(self, pending):
+        """Праща по ред; при временна грешка спира и връща останалите."""
+        while pending:
+            row_id, text = pending[0]
+            wait = self.bucket.reserve()
+            if wait > 0 and not self._flushing:
+                time.sleep(wait)
+            result, retry_after = deliver(text)
+            if result == "retry":
+                self._backoff = min(max(self._backoff * 2, retry_after), NOTIFY_RETRY_MAX)
+                self.bucket.block(self._backoff)
+                with self._cond:
+                    self._stalled = True
+                    self._cond.notify_all()
+                time.sleep(self._backoff)
+                return pending
+            self._backoff = 1.0
+            self._stalled = False
+            if result == "drop":
+                logger.warning("⚠️ Telegram отказа нотификацията — пропусната")
+            with self._db:
+                self._db.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            pending = pending[1:]
+        return pending
+
+    @staticmethod
+    def _android(title, content, vibrate):
+        try:
+            subprocess.run(
+                ["bash", ANDROID_SCRIPT, title, content, str(vibrate)],
+                cwd=os.path.dirname(ANDROID_SCRIPT),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10
+            )
+        except Exception as e:
+            logger.debug(f"Android нотификация пропусната: {e}")
+
+
+NOTIFIER = Notifier()
@@ -0,0 +1,344 @@
+# order_tracker.py
+"""
+Следене на поръчки до изпълнение.
+Където борсата има частен WebSocket поток, събитията идват от него веднага;
+REST допитването остава като резерва с адаптивно (експоненциално) забавяне:
+ORDER_POLL_MIN, ×2 след всяка проверка без промяна, до ORDER_POLL_MAX.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from balances import BALANCES
+from config import ORDER_POLL_MIN, ORDER_POLL_MAX, ORDER_TRACK_TIMEOUT, ORDER_EARLY_EVENT_TTL, WS_ENABLED, WS_URLS
+from ledger import LEDGER
+from market_stream import WebSocketFeed, websocket
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ("filled", "canceled", "rejected", "expired")
+
+
+class TrackedOrder:
+    """Състояние на следена поръчка; done се вдига при краен статус или изтекъл срок."""
+
+    def __init__(self, exchange, symbol, order_id, on_fill=None, on_partial=None, on_done=None,
+                 timeout=ORDER_TRACK_TIMEOUT, side=None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.order_id = str(order_id)
+        self.side = side
+        self.status = "open"
+        self.filled_qty = 0.0
+        self.filled_quote = 0.0
+        self.on_fill = on_fill
+        self.on_partial = on_partial
+        self.on_done = on_done
+        self.created = time.time()
+        self.deadline = self.created + timeout
+        self.interval = ORDER_POLL_MIN
+        self.done = threading.Event()
+
+    @property
+    def avg_price(self):
+        if self.filled_qty > 0 and self.filled_quote > 0:
+            return self.filled_quote / self.filled_qty
+        return None
+
+
+class OrderTracker:
+    def __init__(self, max_workers=4):
+        self._orders = {}
+        self._early = {}      # (борса, order_id) → (момент, статус, к-во, сума): събития преди track()
+        self._feeds = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._poller = None
+
+    def start_streams(self, exchanges, symbols):
+        """Пуска частните потоци за поръчки (ако има websocket-client)."""
+        if not WS_ENABLED or websocket is None:
+            return
+        for ex in exchanges:
+            feed_cls = PRIVATE_FEEDS.get(ex.name)
+            if feed_cls is None or ex.name in self._feeds:
+                continue
+            feed = feed_cls(ex, symbols, self.update)
+            feed.start()
+            self._feeds[ex.name] = feed
+
+    def streaming(self, exchange):
+        feed = self._feeds.get(exchange.name)
+        return feed is not None and feed.connected
+
+    def track(self, exchange, symbol, order_id, on_fill=None, on_partial=None, on_done=None,
+              timeout=ORDER_TRACK_TIMEOUT, side=None):
+        """
+        Започва следене на поръчка. Callback-ите получават TrackedOrder:
+        on_partial при всяко ново частично изпълнение, on_fill при пълно,
+        on_done при всеки край (вкл. отмяна и изтекъл срок).
+        Изпълнените поръчки се записват в дневника (LEDGER.fills).
+        """
+        order = TrackedOrder(exchange, symbol, order_id, on_fill, on_partial, on_done, timeout, side)
+        # При жив поток REST е само застраховка → направо с най-рядкото допитване
+        order.interval = ORDER_POLL_MAX if self.streaming(exchange) else ORDER_POLL_MIN
+        key = (exchange.name, order.order_id)
+        with self._cond:
+            self._orders[key] = order
+            early = self._early.pop(key, None)
+        # Новата поръчка блокира средства → балансите на борсата са остарели
+        BALANCES.invalidate(exchange.name)
+        if early is not None and time.time() - early[0] < ORDER_EARLY_EVENT_TTL:
+            # Потокът е изпреварил отговора на place_order — събитието се прилага веднага
+            self.update(exchange.name, order.order_id, *early[1:])
+        if not order.done.is_set():
+            self._schedule(order)
+        return order
+
+    def wait(self, order, timeout=None):
+        """Блокира до краен статус (или срока на поръчката) и връща статуса."""
+        if timeout is None:
+            timeout = max(order.deadline - time.time(), 0)
+        order.done.wait(timeout)
+        return order.status
+
+    def update(self, exchange_name, order_id, status, filled_qty=None, filled_quote=None):
+        """Ново състояние на поръчка — от поток или от REST допитване."""
+        with self._cond:
+            order = self._orders.get((exchange_name, str(order_id)))
+            if order is None:
+                self._buffer_early(exchange_name, str(order_id), status, filled_qty, filled_quote)
+                return
+            partial = False
+            if filled_qty is not None and filled_qty > order.filled_qty:
+                order.filled_qty = filled_qty
+                if filled_quote:
+                    order.filled_quote = filled_quote
+                partial = status not in FINAL_STATUSES
+                order.interval = ORDER_POLL_MIN
+            order.status = status
+            final = status in FINAL_STATUSES
+            if final:
+                self._orders.pop((exchange_name, order.order_id), None)
+        if partial or final:
+            BALANCES.invalidate(exchange_name)
+        if partial:
+            self._callback(order.on_partial, order)
+        if final:
+            self._finish(order)
+
+    def _buffer_early(self, exchange_name, order_id, status, filled_qty, filled_quote):
+        """Пази последното събитие за още неследена поръчка (извиква се под self._cond)."""
+        now = time.time()
+        for key in [k for k, v in self._early.items() if now - v[0] >= ORDER_EARLY_EVENT_TTL]:
+            del self._early[key]
+        key = (exchange_name, order_id)
+        previous = self._early.get(key)
+        # Крайният статус не се заменя с по-старо междинно събитие, дошло след него
+        if previous is not None and previous[1] in FINAL_STATUSES and status not in FINAL_STATUSES:
+            return
+        self._early[key] = (now, status, filled_qty, filled_quote)
+
+    def _finish(self, order):
+        if order.status == "filled":
+            METRICS.observe("order_fill_seconds", time.time() - order.created, exchange=order.exchange.name)
+            try:
+                LEDGER.record_fill(order.exchange.name, order.symbol, order.order_id, order.side,
+                                   order.filled_qty, order.filled_quote)
+            except Exception as e:
+                logger.warning(f"⚠️ Изпълнението на {order.order_id} не е записано: {e}")
+            self._callback(order.on_fill, order)
+        self._callback(order.on_done, order)
+        order.done.set()
+
+    @staticmethod
+    def _callback(func, order):
+        if func is None:
+            return
+        try:
+            func(order)
+        except Exception as e:
+            logger.error(f"Грешка в callback за поръчка {order.order_id}: {e}")
+
+    def _schedule(self, order):
+        with self._cond:
+            heapq.heappush(self._heap, (time.time() + order.interval, next(self._seq), order))
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll_loop, name="order-poller", daemon=True)
+                self._poller.start()
+            self._cond.notify()
+
+    def _poll_loop(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due, _, order = self._heap[0]
+                delay = due - time.time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+            if order.done.is_set():
+                continue
+            if time.time() >= order.deadline:
+                with self._cond:
+                    self._orders.pop((order.exchange.name, order.order_id), None)
+                self._finish(order)
+                continue
+            self._pool.submit(self._poll, order)
+
+    def _poll(self, order):
+        try:
+            status = order.exchange.get_order_status(order.symbol, order.order_id)
+            filled_qty = filled_quote = None
+            if status in ("filled", "partially_filled"):
+                trades = order.exchange.get_my_trades(order.symbol, order.order_id)
+                filled_qty = sum(float(t["qty"]) for t in trades)
+                filled_quote = sum(float(t["quoteQty"]) for t in trades)
+            if status:
+                self.update(order.exchange.name, order.order_id, status, filled_qty, filled_quote)
+        except Exception as e:
+            logger.warning(f"⚠️ Проблем при проверка на статус: {e}")
+        if not order.done.is_set():
+            order.interval = min(order.interval * 2, ORDER_POLL_MAX)
+            self._schedule(order)
+
+
+class PrivateFeed(WebSocketFeed):
+    """Частен поток за поръчки; on_event(борса, order_id, статус, изпълнено к-во, изпълнена сума)."""
+
+    def __init__(self, exchange, symbols, on_event):
+        super().__init__(exchange.name, symbols, cache=None, intervals=())
+        self.exchange = exchange
+        self.on_event = on_event
+
+    def endpoint(self):
+        return WS_URLS.get(f"{self.key}_private", self.url)
+
+
+class MEXCOrderFeed(PrivateFeed):
+    key = "mexc"
+    url = "wss://wbs.mexc.com/ws"
+    statuses = {1: "open", 2: "filled", 3: "partially_filled", 4: "canceled", 5: "canceled"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.listen_key = None
+        self._keepalive_at = 0
+
+    def endpoint(self):
+        if f"{self.key}_private" in WS_URLS:
+            return WS_URLS[f"{self.key}_private"]
+        self.listen_key = self.exchange.get_listen_key()
+        self._keepalive_at = time.time() + 1800
+        return f"{self.url}?listenKey={self.listen_key}"
+
+    def subscriptions(self):
+        return [{"method": "SUBSCRIPTION", "params": ["spot@private.orders.v3.api"]}]
+
+    def ping_message(self):
+        # listenKey изтича след 60 минути без подновяване
+        if self.listen_key and time.time() >= self._keepalive_at:
+            try:
+                self.exchange.keepalive_listen_key(self.listen_key)
+                self._keepalive_at = time.time() + 1800
+            except Exception as e:
+                logger.warning(f"⚠️ MEXC listenKey не е подновен: {e}")
+        return {"method": "PING"}
+
+    def handle(self, msg):
+        if "private.orders" not in msg.get("c", ""):
+            return
+        d = msg["d"]
+        self.on_event(self.name, d["i"], self.statuses.get(d["s"], "open"),
+                      float(d.get("cv", 0)), float(d.get("ca", 0)))
+
+
+class GateIOOrderFeed(PrivateFeed):
+    key = "gateio"
+    url = "wss://api.gateio.ws/ws/v4/"
+    sep = "_"
+
+    def subscriptions(self):
+        t = int(time.time())
+        return [{"time": t, "channel": "spot.orders", "event": "subscribe", "payload": list(self.symbols),
+                 "auth": self.exchange.ws_auth("spot.orders", "subscribe", t)}]
+
+    def ping_message(self):
+        return {"time": int(time.time()), "channel": "spot.ping"}
+
+    def handle(self, msg):
+        if msg.get("channel") != "spot.orders" or msg.get("event") != "update":
+            return
+        for o in msg["result"]:
+            left = float(o["left"])
+            filled = float(o["amount"]) - left
+            if o.get("event") == "finish":
+                status = "filled" if o.get("finish_as") == "filled" or left == 0 else "canceled"
+            else:
+                status = "partially_filled" if filled > 0 else "open"
+            self.on_event(self.name, o["id"], status, filled, float(o.get("filled_total", 0)))
+
+
+class KuCoinOrderFeed(PrivateFeed):
+    key = "kucoin"
+    sep = "-"
+    statuses = {"filled": "filled", "canceled": "canceled", "match": "partially_filled"}
+
+    def endpoint(self):
+        if f"{self.key}_private" in WS_URLS:
+            return WS_URLS[f"{self.key}_private"]
+        data = self.exchange.get_private_ws_token()
+        server = data["instanceServers"][0]
+        self.ping_interval = server["pingInterval"] / 1000
+        return f"{server['endpoint']}?token={data['token']}"
+
+    def subscriptions(self):
+        return [{"id": next(self._ids), "type": "subscribe", "topic": "/spotMarket/tradeOrders",
+                 "privateChannel": True, "response": True}]
+
+    def ping_message(self):
+        return {"id": next(self._ids), "type": "ping"}
+
+    def handle(self, msg):
+        if msg.get("type") != "message" or msg.get("topic") != "/spotMarket/tradeOrders":
+            return
+        d = msg["data"]
+        self.on_event(self.name, d["orderId"], self.statuses.get(d.get("type"), "open"),
+                      float(d.get("filledSize", 0)), None)
+
+
+class CoinExOrderFeed(PrivateFeed):
+    key = "coinex"
+    url = "wss://socket.coinex.com/"
+
+    def subscriptions(self):
+        return [{"method": "server.sign", "params": self.exchange.ws_sign_params(), "id": next(self._ids)},
+                {"method": "order.subscribe", "params": list(self.symbols), "id": next(self._ids)}]
+
+    def ping_message(self):
+        return {"method": "server.ping", "params": [], "id": next(self._ids)}
+
+    def handle(self, msg):
+        if msg.get("method") != "order.update":
+            return
+        event, order = msg["params"][:2]
+        filled = float(order.get("deal_stock", 0))
+        left = float(order.get("left", 0))
+        if event == 3:  # FINISH
+            status = "filled" if left == 0 else "canceled"
+        else:
+            status = "partially_filled" if filled > 0 else "open"
+        self.on_event(self.name, order["id"], status, filled, float(order.get("deal_money", 0)))
+
+
+PRIVATE_FEEDS = {"MEXC": MEXCOrderFeed, "Gate.io": GateIOOrderFeed, "KuCoin": KuCoinOrderFeed, "CoinEx": CoinExOrderFeed}
+
+ORDER_TRACKER = OrderTracker()
@@ -0,0 +1,232 @@
+# ratelimit.py
+"""
+Лимити на заявките към борсите: token bucket за всяка група ендпойнти
+с тегла по документацията на борсата. Заявка, за която няма достатъчно
+токени, чака на опашка, вместо да получи 429. Заглавките от отговора
+(оставащи заявки, време до нулиране) и 429/418 коригират кофите.
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from config import RATE_LIMIT_SAFETY
+
+
+class TokenBucket:
+    """
+    rate токена в секунда, най-много capacity натрупани. Заявките си
+    резервират токени по ред на пристигане (балансът може да стане
+    отрицателен) и чакат, докато резервацията им се покрие.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self, weight=1):
+        """Взима weight токена и връща колко секунди да се изчака преди заявката."""
+        weight = min(weight, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= weight
+            wait = max(self._updated - now, 0.0)
+            if self.tokens < 0:
+                wait += -self.tokens / self.rate
+            return wait
+
+    def acquire(self, weight=1):
+        """Блокира, докато има weight токена, и ги взима."""
+        wait = self.reserve(weight)
+        if wait > 0:
+            time.sleep(wait)
+
+    def sync(self, remaining, reset_in=None):
+        """Сървърът знае по-добре: свиваме токените до оставащото."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining)
+        if remaining <= 0 and reset_in:
+            self.block(reset_in)
+
+    def block(self, seconds):
+        """Никакви заявки следващите seconds секунди (след 429/418)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Пълненето започва чак след паузата
+            self.tokens = min(self.tokens, 0)
+            self._updated = max(self._updated, now + seconds)
+
+
+class RateLimiter:
+    """
+    Лимити на една борса:
+    buckets — {група: (заявки/тегло, за секунди)}
+    rules — [(метод или None, префикс на пътя, група, тегло)]; печели най-дългият префикс
+    """
+
+    def __init__(self, buckets, rules, default_group, default_weight=1, headers=None, safety=RATE_LIMIT_SAFETY):
+        self.buckets = {
+            group: TokenBucket(limit * safety / period, max(limit * safety, 1))
+            for group, (limit, period) in buckets.items()
+        }
+        self.rules = rules
+        self.default = (default_group, default_weight)
+        self.headers = headers
+
+    def rule_for(self, method, path):
+        best = None
+        for rule_method, prefix, group, weight in self.rules:
+            if rule_method not in (None, method) or not path.startswith(prefix):
+                continue
+            if best is None or len(prefix) > len(best[0]):
+                best = (prefix, group, weight)
+        return best[1:] if best else self.default
+
+    def reserve(self, method, path):
+        """Секунди за изчакване преди заявката (за asyncio: await asyncio.sleep)."""
+        group, weight = self.rule_for(method, path)
+        return self.buckets[group].reserve(weight)
+
+    def acquire(self, method, path):
+        group, weight = self.rule_for(method, path)
+        self.buckets[group].acquire(weight)
+
+    def feedback(self, method, path, status, headers):
+        """Коригира кофата на заявката по отговора на борсата."""
+        group, _ = self.rule_for(method, path)
+        bucket = self.buckets[group]
+        if status in (418, 429):
+            bucket.block(retry_after(headers))
+            return
+        if self.headers:
+            remaining, reset_in = self.headers(headers)
+            if remaining is not None:
+                bucket.sync(remaining * RATE_LIMIT_SAFETY, reset_in)
+
+
+def retry_after(headers, default=10.0):
+    value = headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return default
+
+
+def _gateio_headers(headers):
+    remain = headers.get("X-Gate-RateLimit-Requests-Remain")
+    if remain is None:
+        return None, None
+    reset = headers.get("X-Gate-RateLimit-Reset-Timestamp")
+    reset_in = max(float(reset) / 1000 - time.time(), 0.0) if reset else None
+    return float(remain), reset_in
+
+
+def _kucoin_headers(headers):
+    remain = headers.get("gw-ratelimit-remaining")
+    if remain is None:
+        return None, None
+    reset = headers.get("gw-ratelimit-reset")  # милисекунди до нулиране
+    return float(remain), float(reset) / 1000 if reset else None
+
+
+def _coinex_headers(headers):
+    remain = headers.get("X-RateLimit-Remaining")
+    if remain is None:
+        return None, None
+    return float(remain), None
+
+
+# Тегла и лимити по публичната документация на борсите (ниво VIP 0).
+# Пакетна поръчка тежи колкото пълен пакет (batch_size на адаптера) —
+# лимитът за нови поръчки се брои по поръчки, не по заявки.
+# Ключът е името на сесията в http_pool.get_session().
+LIMITS = {
+    # MEXC: 500 тегло / 10 s на IP за /api/v3
+    "mexc": lambda: RateLimiter(
+        buckets={"ip": (500, 10), "orders": (50, 10)},
+        rules=[
+            (None, "/api/v3/ping", "ip", 1),
+            (None, "/api/v3/exchangeInfo", "ip", 10),
+            (None, "/api/v3/klines", "ip", 1),
+            (None, "/api/v3/ticker/bookTicker", "ip", 1),
+            (None, "/api/v3/account", "ip", 10),
+            ("POST", "/api/v3/order", "orders", 1),
+            ("POST", "/api/v3/batchOrders", "orders", 20),
+            ("GET", "/api/v3/order", "ip", 2),
+            ("DELETE", "/api/v3/order", "ip", 1),
+            (None, "/api/v3/openOrders", "ip", 3),
+            (None, "/api/v3/myTrades", "ip", 10),
+            (None, "/api/v3/userDataStream", "ip", 1),
+        ],
+        default_group="ip",
+    ),
+    # Gate.io: 200 заявки / 10 s на ендпойнт, нови поръчки 10 / s
+    "gateio": lambda: RateLimiter(
+        buckets={"public": (200, 10), "private": (200, 10), "orders": (10, 1), "cancel": (200, 10)},
+        rules=[
+            ("POST", "/api/v4/spot/orders", "orders", 1),
+            ("POST", "/api/v4/spot/batch_orders", "orders", 10),
+            ("POST", "/api/v4/spot/cancel_batch_orders", "orders", 1),
+            ("DELETE", "/api/v4/spot/orders", "cancel", 1),
+            (None, "/api/v4/spot/accounts", "private", 1),
+            ("GET", "/api/v4/spot/orders", "private", 1),
+            (None, "/api/v4/spot/my_trades", "private", 1),
+            (None, "/api/v4/spot/open_orders", "private", 1),
+        ],
+        default_group="public",
+        headers=_gateio_headers,
+    ),
+    # KuCoin: пул Public 2000 / 30 s, пул Spot 4000 / 30 s с тегла на ендпойнт
+    "kucoin": lambda: RateLimiter(
+        buckets={"public": (2000, 30), "spot": (4000, 30)},
+        rules=[
+            (None, "/api/v1/timestamp", "public", 3),
+            (None, "/api/v1/market/orderbook/level1", "public", 2),
+            (None, "/api/v1/market/candles", "public", 3),
+            (None, "/api/v1/symbols", "public", 4),
+            (None, "/api/v1/bullet-public", "public", 10),
+            (None, "/api/v1/accounts", "spot", 5),
+            ("POST", "/api/v1/orders", "spot", 2),
+            ("POST", "/api/v1/orders/multi", "spot", 3),
+            ("GET", "/api/v1/orders", "spot", 2),
+            ("DELETE", "/api/v1/orders", "spot", 3),
+            (None, "/api/v1/fills", "spot", 10),
+            (None, "/api/v1/bullet-private", "spot", 10),
+        ],
+        default_group="public",
+        headers=_kucoin_headers,
+    ),
+    # CoinEx v1: пазарни 400 / s на IP, поръчки и сметка 100 / s на потребител
+    "coinex": lambda: RateLimiter(
+        buckets={"market": (400, 1), "orders": (100, 1), "account": (100, 1)},
+        rules=[
+            (None, "/v1/market", "market", 1),
+            (None, "/v1/order", "orders", 1),
+            ("POST", "/v1/order/limit/batch", "orders", 10),
+            (None, "/v1/balance", "account", 1),
+        ],
+        default_group="market",
+        headers=_coinex_headers,
+    ),
+}
+
+
+def limiter_for(name):
+    """Нов RateLimiter за борсата или None, ако нямаме таблица за нея."""
+    factory = LIMITS.get(name)
+    return factory() if factory else None
@@ -0,0 +1,157 @@
+# scanner.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from balances import BALANCES
+from config import MIN_TRADE_USDT, SCAN_MAX_WORKERS
+from indicators import evaluate_batch, klines_to_array, log_return_volatility, market_rule, CLOSE, VOLUME
+from kline_store import KLINE_STORE
+
+logger = logging.getLogger(__name__)
+
+KLINE_INTERVAL = "1h"
+KLINE_LIMIT = 50
+
+
+def _call(func, retry_fn=None):
+    return retry_fn(func) if retry_fn else func()
+
+
+def score_symbols(klines_list, markets=None):
+    """
+    Оценка на много символи наведнъж.
+    За всеки: None ако пазарът не е подходящ, иначе волатилността
+    на логаритмичните доходности (по-висока = по-добре).
+
+    markets = [(борса, символ)] в реда на klines_list: RSI/ADX се четат от
+    поточните индикатори на KLINE_STORE (O(1) на свещ). Целият прозорец се
+    преизчислява (evaluate_batch, един NumPy пакет) само за символите без
+    поточно състояние — студен старт или markets=None.
+    """
+    scores = [None] * len(klines_list)
+    cold = []
+    for i, klines in enumerate(klines_list):
+        if not klines or len(klines) < 20:
+            continue
+        ind = KLINE_STORE.indicators(*markets[i], KLINE_INTERVAL) if markets else None
+        arr = klines_to_array(klines)
+        if ind is None or np.isnan(ind["adx"]) or np.isnan(ind["rsi"]) or arr is None or len(arr) < 10:
+            cold.append(i)
+            continue
+        safe, trending = market_rule(arr[-10:, VOLUME].mean(), ind["adx"], ind["rsi"])
+        if safe and trending:
+            scores[i] = float(log_return_volatility(arr[:, CLOSE]))
+    if cold:
+        for i, r in zip(cold, evaluate_batch([klines_list[i] for i in cold])):
+            if r["safe"] and r["trending"]:
+                scores[i] = r["volatility"]
+    return scores
+
+
+def symbol_score(klines):
+    """Оценка на един символ (виж score_symbols)."""
+    return score_symbols([klines])[0]
+
+
+def _result(future, what, on_error=None):
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning(f"⚠️ Грешка при {what}: {e}")
+        if on_error:
+            on_error(e)
+        return None
+
+
+def fetch_balances(exchanges, asset="USDT", max_workers=SCAN_MAX_WORKERS, retry_fn=None, on_error=None):
+    """
+    Паралелно: is_active() + баланс (от BALANCES) за всяка борса.
+    Връща [(борса, баланс)] само за активните борси без грешка.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        active = {ex: pool.submit(ex.is_active) for ex in exchanges}
+        balances = {ex: pool.submit(_call, lambda ex=ex: BALANCES.balance(ex, asset), retry_fn) for ex in exchanges}
+        result = []
+        for ex in exchanges:
+            if not active[ex].result():
+                balances[ex].cancel()
+                continue
+            bal = _result(balances[ex], f"баланс {ex.name}", on_error and (lambda e, ex=ex: on_error(ex, e)))
+            if bal is not None:
+                result.append((ex, bal))
+        return result
+
+
+def rank_symbols(exchange, symbols, max_workers=SCAN_MAX_WORKERS, retry_fn=None):
+    """Паралелно изтегляне на свещи и класиране на символите за една борса: [(символ, оценка)]."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            sym: pool.submit(
+                _call, lambda sym=sym: KLINE_STORE.get_klines(exchange, sym, KLINE_INTERVAL, KLINE_LIMIT), retry_fn)
+            for sym in symbols
+        }
+        fetched = {sym: _result(fut, f"анализ на {sym}") for sym, fut in futures.items()}
+    scores = score_symbols(list(fetched.values()), [(exchange, sym) for sym in fetched])
+    ranked = [(sym, score) for sym, score in zip(fetched, scores) if score is not None]
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    return ranked
+
+
+def scan_markets(exchanges, symbols, min_balance=MIN_TRADE_USDT, max_workers=SCAN_MAX_WORKERS,
+                 retry_fn=None, on_balance_error=None):
+    """
+    Сканира всички борси и символи наведнъж: баланси, свещи и тикери тръгват
+    паралелно (най-много max_workers едновременни заявки).
+
+    Връща (funded, candidates):
+    - funded: [(борса, баланс)] с баланс >= min_balance, по низходящ баланс
+    - candidates: класирана таблица от dict с ключове exchange, symbol, balance,
+      score, bid, ask, spread — първият ред е най-добрият избор
+      (борсата с най-голям баланс, после символът с най-висока оценка)
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        active = {ex: pool.submit(ex.is_active) for ex in exchanges}
+        balances = {ex: pool.submit(_call, lambda ex=ex: BALANCES.balance(ex, "USDT"), retry_fn) for ex in exchanges}
+        klines = {}
+        tickers = {}
+        for ex in exchanges:
+            for sym in symbols:
+                klines[(ex, sym)] = pool.submit(
+                    _call, lambda ex=ex, sym=sym: KLINE_STORE.get_klines(ex, sym, KLINE_INTERVAL, KLINE_LIMIT), retry_fn)
+                tickers[(ex, sym)] = pool.submit(ex.get_ticker, sym)
+
+        funded = []
+        for ex in exchanges:
+            if not active[ex].result():
+                continue
+            on_error = on_balance_error and (lambda e, ex=ex: on_balance_error(ex, e))
+            bal = _result(balances[ex], f"баланс {ex.name}", on_error)
+            if bal is not None and bal >= min_balance:
+                funded.append((ex, bal))
+        funded.sort(key=lambda x: x[1], reverse=True)
+
+        pairs = [(ex, bal, sym) for ex, bal in funded for sym in symbols]
+        fetched = [_result(klines[(ex, sym)], f"анализ на {sym} ({ex.name})") for ex, _, sym in pairs]
+        scores = score_symbols(fetched, [(ex, sym) for ex, _, sym in pairs])
+
+        candidates = []
+        for (ex, bal, sym), score in zip(pairs, scores):
+            if score is None:
+                continue
+            ticker = _result(tickers[(ex, sym)], f"тикер {sym} ({ex.name})") or {}
+            bid = float(ticker.get("bidPrice", 0) or 0)
+            ask = float(ticker.get("askPrice", 0) or 0)
+            candidates.append({
+                "exchange": ex,
+                "symbol": sym,
+                "balance": bal,
+                "score": score,
+                "bid": bid,
+                "ask": ask,
+                "spread": (ask - bid) / ask if ask > 0 else None
+            })
+
+    candidates.sort(key=lambda c: (c["balance"], c["score"]), reverse=True)
+    return funded, candidates
@@ -0,0 +1,281 @@
+# scheduler.py
+"""
+Планировчик: независим работник (нишка) за всяка двойка борса/символ
+вместо един избор на най-добрата борса. Работниците на една борса делят
+нейния бюджет от заявки (EXCHANGE_REQUEST_BUDGET), а всички заедно —
+общите рискови лимити (RiskLimits).
+"""
+import logging
+import threading
+import time
+from datetime import date
+
+from config import (
+    SCHEDULER_MAX_WORKERS_PER_EXCHANGE, EXCHANGE_REQUEST_BUDGET, MAX_TOTAL_EXPOSURE_USDT,
+    MAX_EXPOSURE_PER_EXCHANGE, MAX_OPEN_POSITIONS, DAILY_LOSS_LIMIT_USDT
+)
+from market_stream import MARKET_DATA
+
+logger = logging.getLogger(__name__)
+
+# Методите на адаптерите, които правят заявка към борсата — само те се таксуват
+# в бюджета (is_active, get_symbol_info, name... минават без изчакване)
+NETWORK_METHODS = frozenset({
+    "get_balance", "get_balances", "get_klines", "get_order_status", "get_my_trades", "get_open_orders",
+    "place_order", "place_orders", "cancel_order", "cancel_orders", "cancel_all_orders",
+})
+# Котировките идват от WebSocket кеша, когато е свеж — заявка има само без него
+TICKER_METHODS = frozenset({"get_ticker", "get_price"})
+
+
+class RiskLimits:
+    """
+    Общи лимити за всички работници: обща и по-борсова експозиция,
+    брой отворени позиции и дневна загуба. reserve() преди сделка,
+    release() след нея (с реализираната печалба/загуба).
+    """
+
+    def __init__(self, max_total=MAX_TOTAL_EXPOSURE_USDT, max_per_exchange=MAX_EXPOSURE_PER_EXCHANGE,
+                 max_positions=MAX_OPEN_POSITIONS, daily_loss_limit=DAILY_LOSS_LIMIT_USDT):
+        self.max_total = max_total
+        self.max_per_exchange = max_per_exchange
+        self.max_positions = max_positions
+        self.daily_loss_limit = daily_loss_limit
+        self._exposure = {}
+        self._positions = 0
+        self._day = date.today()
+        self._daily_pnl = 0.0
+        self._lock = threading.Lock()
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._daily_pnl = 0.0
+
+    def halted(self):
+        """True при достигнат дневен лимит на загуба (до полунощ)."""
+        with self._lock:
+            self._roll_day()
+            return self._daily_pnl <= -self.daily_loss_limit
+
+    def exposure(self, exchange_name=None):
+        with self._lock:
+            if exchange_name is None:
+                return sum(self._exposure.values())
+            return self._exposure.get(exchange_name, 0.0)
+
+    def reserve(self, exchange_name, usdt, balance=None):
+        """Заделя usdt за нова позиция; False ако някой лимит би бил нарушен."""
+        with self._lock:
+            self._roll_day()
+            if self._daily_pnl <= -self.daily_loss_limit:
+                return False
+            if self._positions >= self.max_positions:
+                return False
+            if sum(self._exposure.values()) + usdt > self.max_total:
+                return False
+            current = self._exposure.get(exchange_name, 0.0)
+            if balance is not None and current + usdt > (current + balance) * self.max_per_exchange:
+                return False
+            self._exposure[exchange_name] = current + usdt
+            self._positions += 1
+            return True
+
+    def release(self, exchange_name, usdt, pnl=0.0):
+        with self._lock:
+            self._roll_day()
+            self._exposure[exchange_name] = max(self._exposure.get(exchange_name, 0.0) - usdt, 0.0)
+            self._positions = max(self._positions - 1, 0)
+            self._daily_pnl += pnl
+
+    def record_pnl(self, pnl):
+        """Печалба/загуба без затваряне на позиция (напр. изпълнена grid двойка)."""
+        with self._lock:
+            self._roll_day()
+            self._daily_pnl += pnl
+
+
+class ExchangeBudget:
+    """
+    Бюджет от заявки в минута за една борса, общ за всичките ѝ работници:
+    acquire() изчаква, докато заявката се побере в темпото.
+    """
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BudgetedExchange:
+    """
+    Обвивка на адаптер: методите, които ходят до борсата (NETWORK_METHODS,
+    котировка без свеж WebSocket кеш), минават през бюджета на борсата.
+    """
+
+    def __init__(self, exchange, budget):
+        self._exchange = exchange
+        self._budget = budget
+
+    def __getattr__(self, attr):
+        value = getattr(self._exchange, attr)
+        if attr not in NETWORK_METHODS and attr not in TICKER_METHODS:
+            return value
+
+        def call(*args, **kwargs):
+            symbol = args[0] if args else kwargs.get("symbol")
+            if attr in NETWORK_METHODS or MARKET_DATA.ticker(self._exchange.name, symbol) is None:
+                self._budget.acquire()
+            return value(*args, **kwargs)
+        return call
+
+
+class Worker:
+    """
+    Една стратегия за една борса/символ в собствена нишка.
+    run(worker) изпълнява една стъпка и връща секунди до следващата;
+    worker.state е свободно място за стратегията (напр. GridEngine).
+    """
+
+    def __init__(self, exchange, symbol, run, on_stop=None, risk=None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.balance = 0.0
+        self.allocation = 0.0
+        self.state = None
+        self.risk = risk
+        self._run_step = run
+        self._on_stop = on_stop
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def key(self):
+        return (self.exchange.name, self.symbol)
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name=f"worker-{self.exchange.name}-{self.symbol}",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._on_stop:
+            try:
+                self._on_stop(self)
+            except Exception as e:
+                logger.warning(f"⚠️ Спиране на {self.exchange.name} | {self.symbol}: {e}")
+
+    def sleep(self, seconds):
+        """Пауза, която се прекъсва при спиране; True ако работникът е спрян."""
+        return self._stop.wait(seconds)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if self.risk is not None and self.risk.halted():
+                self._stop.wait(600)
+                continue
+            if not self.exchange.is_active():
+                # Прекъсвачът в HEALTH е отворен — изчакваме повторната проверка
+                self._stop.wait(60)
+                continue
+            try:
+                delay = self._run_step(self)
+            except Exception as e:
+                logger.exception(f"💥 {self.exchange.name} | {self.symbol}: {str(e)[:150]}")
+                delay = 600
+            self._stop.wait(delay or 0)
+
+
+class Scheduler:
+    """
+    Държи по един работник за всяка избрана двойка борса/символ —
+    до max_per_exchange символа на всяка борса с достатъчен баланс.
+    """
+
+    def __init__(self, run, on_stop=None, risk=None, budgets=None, max_per_exchange=SCHEDULER_MAX_WORKERS_PER_EXCHANGE):
+        self.run = run
+        self.on_stop = on_stop
+        self.risk = risk or RiskLimits()
+        self.max_per_exchange = max_per_exchange
+        self._budget_config = EXCHANGE_REQUEST_BUDGET if budgets is None else budgets
+        self._budgets = {}
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def budget(self, exchange_name):
+        with self._lock:
+            return self._budget_locked(exchange_name)
+
+    def workers(self):
+        with self._lock:
+            return list(self._workers.values())
+
+    def sync(self, funded, candidates):
+        """
+        Обновява работниците по резултата от scan_markets(): стартира нови
+        за най-добрите символи на всяка борса и обновява баланса/дела им.
+        Работещите не се спират при смяна на класирането, за да не се
+        изоставят отворени позиции. Спират се само работниците без позиция
+        (worker.state) на борса, която е отпаднала от funded — иначе биха
+        търгували с MIN_TRADE_USDT при дял 0.
+        Връща списъка с новостартирани работници.
+        """
+        balances = {ex.name: bal for ex, bal in funded}
+        started = []
+        with self._lock:
+            retired = [w for w in self._workers.values() if w.exchange.name not in balances and w.state is None]
+            for worker in retired:
+                del self._workers[worker.key]
+            per_exchange = {}
+            for worker in self._workers.values():
+                per_exchange[worker.exchange.name] = per_exchange.get(worker.exchange.name, 0) + 1
+            for c in candidates:
+                ex, symbol = c["exchange"], c["symbol"]
+                if ex.name not in balances or (ex.name, symbol) in self._workers:
+                    continue
+                if per_exchange.get(ex.name, 0) >= self.max_per_exchange:
+                    continue
+                worker = Worker(BudgetedExchange(ex, self._budget_locked(ex.name)), symbol,
+                                self.run, self.on_stop, self.risk)
+                self._workers[worker.key] = worker
+                per_exchange[ex.name] = per_exchange.get(ex.name, 0) + 1
+                started.append(worker)
+            for worker in self._workers.values():
+                name = worker.exchange.name
+                worker.balance = balances.get(name, 0.0)
+                worker.allocation = worker.balance / max(per_exchange.get(name, 1), 1)
+        for worker in retired:
+            worker.stop()
+            logger.info(f"⏹️ Работник {worker.exchange.name} | {worker.symbol} спрян: борсата вече няма баланс")
+        for worker in started:
+            worker.start()
+            logger.info(f"▶️ Работник {worker.exchange.name} | {worker.symbol} (дял {worker.allocation:.2f} USDT)")
+        return started
+
+    def _budget_locked(self, exchange_name):
+        budget = self._budgets.get(exchange_name)
+        if budget is None:
+            budget = ExchangeBudget(self._budget_config.get(exchange_name))
+            self._budgets[exchange_name] = budget
+        return budget
+
+    def stop(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers = {}
+        for worker in workers:
+            worker.stop()
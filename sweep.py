@@ -0,0 +1,151 @@
+# sweep.py
+"""
+Търсене на параметрите на стратегията (PROFIT_TARGET, RISK_PERCENT, праг на
+ADX, неутрален диапазон на RSI) върху бектеста, на всички ядра.
+
+Конфигурациите (пълна решетка или случайна извадка от нея) се пускат в
+пул от процеси. Свещите не се копират към процесите: всеки отваря
+.npy файловете с memory-map, така че данните са едни и същи страници в
+кеша на ОС. Конфигурациите се подреждат по индикаторните параметри и
+се раздават на парчета, за да може всеки процес да преизползва
+оценките на символите (score_matrix) за еднакви ADX/RSI настройки.
+
+    python sweep.py --exchange MEXC --days 90
+    python sweep.py --random 200 --top 30 --csv logs/sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import backtest
+from config import TRADE_SYMBOLS, BACKTEST_DATA_DIR, BACKTEST_BALANCE
+
+SEARCH_SPACE = {
+    "profit_target": [0.003, 0.005, 0.008, 0.012],
+    "risk_percent": [0.05, 0.1, 0.2],
+    "adx_threshold": [15, 20, 25, 30],
+    "rsi_low": [30, 35, 40],
+    "rsi_high": [60, 65, 70],
+}
+INDICATOR_KEYS = ("adx_threshold", "rsi_low", "rsi_high", "min_avg_volume_usdt")
+COLUMNS = ("profit", "return_pct", "realized", "trades", "win_rate", "max_drawdown", "fees")
+
+# Състояние на всеки процес от пула
+_CANDLES = None
+_SCORES = {}
+
+
+def configurations(space=SEARCH_SPACE, samples=None, seed=None):
+    """Всички комбинации от space или samples случайни от тях."""
+    keys = list(space)
+    configs = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if samples and samples < len(configs):
+        configs = random.Random(seed).sample(configs, samples)
+    return configs
+
+
+def to_params(config):
+    """Конфигурация → параметри на backtest.backtest (rsi_low/rsi_high → rsi_neutral_range)."""
+    params = {**backtest.DEFAULT_PARAMS, **config}
+    low, high = params.pop("rsi_low", None), params.pop("rsi_high", None)
+    if low is not None or high is not None:
+        default_low, default_high = backtest.DEFAULT_PARAMS["rsi_neutral_range"]
+        params["rsi_neutral_range"] = (low if low is not None else default_low,
+                                       high if high is not None else default_high)
+    return params
+
+
+def _init(paths, days):
+    global _CANDLES
+    _CANDLES = {}
+    for symbol, path in paths.items():
+        arr = backtest.load_candles(path)
+        if days and len(arr):
+            arr = arr[arr[:, 0].searchsorted(arr[-1, 0] - days * 86400):]
+        _CANDLES[symbol] = arr
+
+
+def _run(config, balance):
+    params = to_params(config)
+    key = (params["adx_threshold"], params["rsi_neutral_range"], params["min_avg_volume_usdt"])
+    if key not in _SCORES:
+        _SCORES[key] = backtest.score_matrix(_CANDLES, params)
+    result = backtest.backtest(_CANDLES, params, balance=balance, score_table=_SCORES[key])
+    result.pop("trade_log")
+    return config, result
+
+
+def sweep(paths, configs, workers=None, balance=BACKTEST_BALANCE, days=None, metric="profit"):
+    """
+    paths = {символ: .npy файл}. Връща [(конфигурация, резултат)], подредени
+    по metric (низходящо; за max_drawdown — възходящо).
+    """
+    workers = workers or os.cpu_count() or 1
+    configs = sorted(configs, key=lambda c: tuple(str(c.get(k)) for k in INDICATOR_KEYS))
+    chunksize = max(1, len(configs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(paths, days)) as pool:
+        results = list(pool.map(_run, configs, itertools.repeat(balance), chunksize=chunksize))
+    results.sort(key=lambda r: r[1][metric], reverse=metric != "max_drawdown")
+    return results
+
+
+def print_table(results, top=20):
+    keys = list(results[0][0]) if results else []
+    header = ["#"] + keys + list(COLUMNS)
+    rows = []
+    for rank, (config, result) in enumerate(results[:top], 1):
+        rows.append([str(rank)] + [f"{config[k]:g}" for k in keys] + [
+            f"{result['profit']:.4f}", f"{result['return_pct']:.2f}%", f"{result['realized']:.4f}",
+            str(result["trades"]), f"{result['win_rate']:.0%}", f"{result['max_drawdown']:.2%}",
+            f"{result['fees']:.4f}"])
+    widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(cell.rjust(w) for cell, w in zip(row, widths)))
+
+
+def write_csv(results, path):
+    keys = list(results[0][0]) if results else []
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(keys + list(COLUMNS))
+        for config, result in results:
+            writer.writerow([config[k] for k in keys] + [result[c] for c in COLUMNS])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Търсене на параметри на стратегията върху бектеста")
+    parser.add_argument("--exchange", default="MEXC")
+    parser.add_argument("--symbols", nargs="*", default=TRADE_SYMBOLS)
+    parser.add_argument("--days", type=float, default=None, help="само последните N дни")
+    parser.add_argument("--balance", type=float, default=BACKTEST_BALANCE)
+    parser.add_argument("--data-dir", default=BACKTEST_DATA_DIR)
+    parser.add_argument("--random", type=int, default=None, help="N случайни конфигурации вместо цялата решетка")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--metric", default="profit", choices=COLUMNS)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--csv", default=None, help="запиши цялата таблица в CSV")
+    args = parser.parse_args()
+
+    paths = {symbol: backtest.candles_path(args.exchange, symbol, data_dir=args.data_dir) for symbol in args.symbols}
+    paths = {symbol: path for symbol, path in paths.items() if os.path.exists(path)}
+    if not paths:
+        raise SystemExit(f"❌ Няма свещи в {args.data_dir} за {args.exchange} (пусни backtest.py --download)")
+
+    configs = configurations(samples=args.random, seed=args.seed)
+    started = time.time()
+    results = sweep(paths, configs, args.workers, args.balance, args.days, args.metric)
+    print(f"🔎 {len(results)} конфигурации | {args.exchange} | {', '.join(paths)} | {time.time() - started:.1f}s")
+    print_table(results, args.top)
+    if args.csv:
+        write_csv(results, args.csv)
+        print(f"💾 {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# symbol_cache.py
+import json
+import logging
+import os
+import threading
+import time
+
+from config import SYMBOL_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = "logs/symbol_cache.json"
+DEFAULT_INFO = {"min_qty": 0.01, "quantity_precision": 2, "price_precision": 4}
+
+
+def decimals(step):
+    """Брой знаци след десетичната точка на стъпка като "0.00100" → 3."""
+    step = str(step)
+    return len(step.rstrip('0').split('.')[-1]) if '.' in step else 0
+
+
+def make_info(min_qty, step_size, tick_size, min_notional=None):
+    """Унифициран запис за символ (стъпките са низове, както ги дава борсата)."""
+    return {
+        "min_qty": float(min_qty),
+        "quantity_precision": decimals(step_size),
+        "price_precision": decimals(tick_size),
+        "step_size": float(step_size),
+        "tick_size": float(tick_size),
+        "min_notional": float(min_notional) if min_notional else None
+    }
+
+
+def step_from_precision(precision):
+    """Стъпка като низ от брой знаци: 3 → "0.001"."""
+    precision = int(precision)
+    return "1" if precision <= 0 else "0." + "0" * (precision - 1) + "1"
+
+
+class SymbolInfoCache:
+    """
+    Кеш за параметрите на символите по борса: {борса: {символ: info}}.
+    Всяка борса се тегли наведнъж чрез exchange.load_symbols_info().
+    След изтичане на TTL връща старите данни и обновява във фонов поток.
+    Записва се на диска, за да не се тегли всичко при рестарт
+    (path=None — само в паметта, напр. за бенчмарка).
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=SYMBOL_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._data = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                self._data = json.load(f)
+        except Exception:
+            self._data = {}
+
+    def _save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock:
+            payload = json.dumps(self._data)
+        with open(tmp, "w") as f:
+            f.write(payload)
+        os.replace(tmp, self.path)
+
+    def refresh(self, exchange):
+        """Изтегля наново всички символи на борсата (блокиращо)."""
+        symbols = exchange.load_symbols_info()
+        entry = {"updated": time.time(), "symbols": symbols}
+        with self._lock:
+            self._data[exchange.name] = entry
+        try:
+            self._save()
+        except Exception as e:
+            logger.warning(f"⚠️ Кешът за символи не е записан: {e}")
+        return entry
+
+    def _refresh_in_background(self, exchange):
+        try:
+            self.refresh(exchange)
+        except Exception as e:
+            logger.warning(f"⚠️ Обновяване на символи за {exchange.name} неуспешно: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(exchange.name)
+
+    def get(self, exchange, symbol):
+        """Параметри на символ (в нотацията на борсата), DEFAULT_INFO ако липсва."""
+        with self._lock:
+            entry = self._data.get(exchange.name)
+            stale = entry is not None and time.time() - entry["updated"] > self.ttl
+            start = stale and exchange.name not in self._refreshing
+            if start:
+                self._refreshing.add(exchange.name)
+        if entry is None:
+            entry = self.refresh(exchange)
+        elif start:
+            threading.Thread(target=self._refresh_in_background, args=(exchange,), daemon=True).start()
+        return dict(entry["symbols"].get(symbol, DEFAULT_INFO))
+
+
+SYMBOL_CACHE = SymbolInfoCache()
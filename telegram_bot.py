@@ -2,9 +2,13 @@
 import requests
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 
-def send_telegram_message(text):
+def deliver(text):
+    """
+    Едно изпращане към Telegram → (резултат, пауза): "ok", "retry"
+    (мрежа, 429, 5xx — пауза = retry_after от отговора) или "drop" (друга 4xx).
+    """
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        return
+        return "drop", 0
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
         "chat_id": TELEGRAM_CHAT_ID,
@@ -12,6 +16,30 @@ def send_telegram_message(text):
         "parse_mode": "Markdown"
     }
     try:
-        requests.post(url, json=payload, timeout=10)
+        resp = requests.post(url, json=payload, timeout=10)
     except Exception as e:
-        print(f"텔еграм грешка: {e}")
+        print(f"Телеграм грешка: {e}")
+        return "retry", 0
+    if resp.status_code == 200:
+        return "ok", 0
+    if resp.status_code == 400 and "parse" in resp.text:
+        # Невалиден Markdown (напр. "_" в символ) — пращаме като обикновен текст
+        payload.pop("parse_mode")
+        try:
+            resp = requests.post(url, json=payload, timeout=10)
+        except Exception:
+            return "retry", 0
+        if resp.status_code == 200:
+            return "ok", 0
+    if resp.status_code == 429 or resp.status_code >= 500:
+        try:
+            wait = resp.json().get("parameters", {}).get("retry_after", 0)
+        except ValueError:
+            wait = 0
+        return "retry", wait
+    print(f"Телеграм грешка: {resp.status_code} {resp.text[:200]}")
+    return "drop", 0
+
+def send_telegram_message(text):
+    """Синхронно изпращане (за отделни скриптове като daily_summary; ботът ползва notifier.py)."""
+    return deliver(text)[0] == "ok"
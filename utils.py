@@ -1,15 +1,15 @@
 # utils.py
-import numpy as np
-import pandas as pd
-from ta.trend import ADXIndicator, SMAIndicator
-from ta.volatility import AverageTrueRange
-from ta.momentum import RSIIndicator
+import math
+
+from config import MIN_TRADE_USDT, RISK_PERCENT, PROFIT_TARGET, MIN_ABS_PROFIT_USD, MAX_RISK_PERCENT
+from indicators import klines_to_array, adx, rsi, market_rule, HIGH, LOW, CLOSE, VOLUME
 
 def klines_to_dataframe(klines):
     """
     Преобразува списък от свещи (open, high, low, close, volume) в pandas DataFrame.
     Очаква формат: [[ts, open, high, low, close, volume], ...]
     """
+    import pandas as pd
     if not klines or len(klines[0]) < 6:
         return None
     df = pd.DataFrame(klines, columns=["timestamp", "open", "high", "low", "close", "volume"])
@@ -22,35 +22,55 @@ def is_safe_market(klines, min_avg_volume_usdt=5000):
     """
     Проверява дали пазарът е достатъчно ликвиден.
     """
-    df = klines_to_dataframe(klines)
-    if df is None or len(df) < 10:
+    arr = klines_to_array(klines)
+    if arr is None or len(arr) < 10:
         return False
-    avg_vol = df["volume"].tail(10).mean()
+    avg_vol = arr[-10:, VOLUME].mean()
     return avg_vol >= min_avg_volume_usdt
 
-def is_market_trending(klines, adx_threshold=20, rsi_neutral_range=(35, 65)):
+def is_market_trending(klines, adx_threshold=20, rsi_neutral_range=(35, 65), indicators=None):
     """
     Определя дали има значим тренд:
     - ADX > adx_threshold → силен тренд
     - RSI извън прегрято/предозаредено → по-добра входна точка
+    indicators = KLINE_STORE.indicators(...) — готовите поточни стойности,
+    без преизчисляване на прозореца.
     """
-    df = klines_to_dataframe(klines)
-    if df is None or len(df) < 20:
+    if indicators is not None and not (math.isnan(indicators["adx"]) or math.isnan(indicators["rsi"])):
+        _, trending = market_rule(0, indicators["adx"], indicators["rsi"], adx_threshold, rsi_neutral_range)
+        return bool(trending)
+    arr = klines_to_array(klines)
+    if arr is None or len(arr) < 20:
         return False
 
     # ADX (Trend Strength)
-    adx = ADXIndicator(high=df["high"], low=df["low"], close=df["close"], window=14)
-    df["adx"] = adx.adx()
+    latest_adx = adx(arr[:, HIGH], arr[:, LOW], arr[:, CLOSE], window=14)[-1]
 
     # RSI (Momentum)
-    rsi = RSIIndicator(close=df["close"], window=14)
-    df["rsi"] = rsi.rsi()
-
-    latest_adx = df["adx"].iloc[-1]
-    latest_rsi = df["rsi"].iloc[-1]
+    latest_rsi = rsi(arr[:, CLOSE], window=14)[-1]
 
     strong_trend = latest_adx > adx_threshold
     not_overbought = latest_rsi < rsi_neutral_range[1]  # не над 65
     not_oversold = latest_rsi > rsi_neutral_range[0]   # не под 35
 
     return strong_trend and not_overbought and not_oversold
+
+def trade_size(balance, price, quantity_precision, risk_percent=RISK_PERCENT):
+    """Сума (USDT) и количество за една сделка покупка → продажба."""
+    risk_pct = min(risk_percent, MAX_RISK_PERCENT)
+    trade_usdt = max(MIN_TRADE_USDT, balance * risk_pct)
+    qty = round(trade_usdt / price, quantity_precision)
+    return trade_usdt, qty
+
+def order_prices(bid, ask, trade_usdt, price_precision, maker_fee=0.001, profit_target=PROFIT_TARGET):
+    """
+    Цени на покупката (малко под bid) и продажбата (+ марж, покриващ
+    двете такси и MIN_ABS_PROFIT_USD). Общо за main и backtest.py.
+    """
+    min_profit_pct = (MIN_ABS_PROFIT_USD / trade_usdt) + 2 * maker_fee
+    profit_margin = max(profit_target, min_profit_pct, 0.003)
+    spread_pct = (ask - bid) / ask if ask > 0 else 0.001
+
+    buy_price = round(bid * (1 - min(0.001, spread_pct * 2)), price_precision)
+    sell_price = round(buy_price * (1 + profit_margin), price_precision)
+    return buy_price, sell_price